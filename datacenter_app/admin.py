@@ -1,9 +1,13 @@
 from django.contrib import admin
-from .models import DataCenter,Equipment
+from .models import DataCenter,DataCenterStats,Equipment,ImportJob,ExportJob,UploadSession
 from django_celery_beat.models import PeriodicTask, IntervalSchedule
 
 
 
 # Register DataCenter model
 admin.site.register(DataCenter)
-admin.site.register(Equipment)
\ No newline at end of file
+admin.site.register(Equipment)
+admin.site.register(ImportJob)
+admin.site.register(ExportJob)
+admin.site.register(UploadSession)
+admin.site.register(DataCenterStats)
\ No newline at end of file
@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class DatacenterAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'datacenter_app'
+
+    def ready(self):
+        from .search import install_missing_search_index
+        post_migrate.connect(install_missing_search_index, sender=self)
@@ -0,0 +1,80 @@
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Equipment
+
+# Per-datacenter indexes kept in memory (one per datacenter and field), least recently used evicted first
+AUTOCOMPLETE_CACHE_SIZE = getattr(settings, 'AUTOCOMPLETE_CACHE_SIZE', 64)
+# Suggestions returned for a prefix unless ?limit= asks otherwise, and the largest limit accepted
+AUTOCOMPLETE_LIMIT = getattr(settings, 'AUTOCOMPLETE_LIMIT', 20)
+AUTOCOMPLETE_MAX_LIMIT = getattr(settings, 'AUTOCOMPLETE_MAX_LIMIT', 1000)
+
+
+class PrefixIndex:
+    """
+    Distinct values of one field in a sorted array, searched by bisection:
+    a prefix lookup costs O(log n + limit). Matching ignores case.
+    """
+
+    def __init__(self, values):
+        pairs = sorted((value.casefold(), value) for value in set(values))
+        self.keys = [key for key, _ in pairs]
+        self.values = [value for _, value in pairs]
+
+    def __len__(self):
+        return len(self.values)
+
+    def match(self, prefix, limit=None):
+        """Values starting with `prefix` in sorted order, at most `limit` of them (all when None)."""
+        prefix = prefix.casefold()
+        start = bisect_left(self.keys, prefix)
+        end = len(self.keys) if limit is None else min(start + limit, len(self.keys))
+        if not prefix:
+            return self.values[start:end]
+        matches = []
+        for position in range(start, end):
+            if not self.keys[position].startswith(prefix):
+                break
+            matches.append(self.values[position])
+        return matches
+
+
+class AutocompleteCache:
+    """
+    Bounded LRU of PrefixIndex per (datacenter, field), stamped with the
+    datacenter's data_version: any equipment change makes the next lookup
+    rebuild the index from the database, otherwise it is served from memory.
+    """
+
+    def __init__(self, max_size=AUTOCOMPLETE_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, datacenter, field):
+        key = (datacenter.id, field)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == datacenter.data_version:
+                self.entries.move_to_end(key)
+                return entry[1]
+
+        # Built outside the lock; concurrent misses may both build, the last one wins
+        values = Equipment.live.filter(datacenter_id=datacenter.id).values_list(field, flat=True).distinct()
+        index = PrefixIndex(values)
+        with self.lock:
+            self.entries[key] = (datacenter.data_version, index)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+autocomplete_cache = AutocompleteCache()
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+
+import django
+from billiard.pool import Pool
+from django.conf import settings
+from django.db import connections
+from django.utils.text import slugify
+
+from .export_cache import consolidated_cache_key, export_cache
+from .exports import EXPORT_HEADERS, export_queryset, iter_export_rows, iter_sheet_xml, stream_workbook, stream_zip
+from .models import DataCenter
+from .utils import iter_export, open_export
+
+# Worker processes used to render datacenters in parallel (0 = one per core)
+CONSOLIDATED_EXPORT_WORKERS = getattr(settings, 'CONSOLIDATED_EXPORT_WORKERS', 0) or os.cpu_count() or 1
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def _init_worker():
+    # No-op for forked workers; spawned ones start from a bare interpreter
+    django.setup()
+
+
+def _render_sheet(datacenter_id, directory):
+    """Write the worksheet XML of one datacenter to a file in `directory`."""
+    datacenter = DataCenter.objects.get(pk=datacenter_id)
+    rows = iter_export_rows(export_queryset(datacenter))
+    fd, path = tempfile.mkstemp(suffix='.xml', dir=directory)
+    with os.fdopen(fd, 'wb') as output:
+        output.writelines(iter_sheet_xml(EXPORT_HEADERS, rows))
+    return path
+
+
+def _render_pdf(datacenter_id):
+    """Render one datacenter's PDF into the export cache (a no-op when already cached)."""
+    with open_export(DataCenter.objects.get(pk=datacenter_id), 'pdf'):
+        pass
+
+
+def _read_chunks(path):
+    with open(path, 'rb') as f:
+        yield from iter(lambda: f.read(READ_BLOCK_SIZE), b'')
+
+
+def run_parallel(function, args_list, workers=None):
+    """
+    Call `function(*args)` for every entry of `args_list` in a process pool
+    and return the results in order.
+
+    Runs inline when one worker suffices or when called off the main thread,
+    e.g. from a threaded web server, which must not be forked while it serves
+    other requests. The pool is billiard's, as multiprocessing refuses to
+    start one from a (daemonic) Celery prefork worker.
+    """
+    workers = min(workers or CONSOLIDATED_EXPORT_WORKERS, len(args_list))
+    if workers <= 1 or threading.current_thread() is not threading.main_thread():
+        return [function(*args) for args in args_list]
+    # Children must open their own database connections rather than share ours
+    connections.close_all()
+    with Pool(processes=workers, initializer=_init_worker) as pool:
+        return pool.starmap(function, args_list)
+
+
+def bundle_file_name(datacenter, extension):
+    return f"equipments_{datacenter.id}_{slugify(datacenter.name) or 'datacenter'}.{extension}"
+
+
+def write_consolidated_workbook(output, datacenters, workers=None):
+    """
+    Write one workbook with a sheet per datacenter to `output`. Sheets are
+    rendered in parallel to temporary files, then stitched into the archive.
+    """
+    with tempfile.TemporaryDirectory(prefix='consolidated-') as directory:
+        paths = run_parallel(_render_sheet, [(dc.id, directory) for dc in datacenters], workers)
+        sheets = [(dc.name, _read_chunks(path)) for dc, path in zip(datacenters, paths)]
+        output.writelines(stream_workbook(sheets))
+
+
+def write_pdf_bundle(output, datacenters, workers=None):
+    """
+    Write a zip with one PDF report per datacenter to `output`. The PDFs are
+    rendered in parallel into the export cache and then copied in order.
+    """
+    run_parallel(_render_pdf, [(dc.id,) for dc in datacenters], workers)
+    # PDF pages are already compressed, so the archive only stores them
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for datacenter in datacenters:
+            with open_export(datacenter, 'pdf') as pdf, archive.open(bundle_file_name(datacenter, 'pdf'), 'w') as entry:
+                shutil.copyfileobj(pdf, entry, READ_BLOCK_SIZE)
+
+
+CONSOLIDATED_WRITERS = {
+    'xlsx': write_consolidated_workbook,
+    'pdf.zip': write_pdf_bundle,
+}
+
+
+def open_consolidated_export(file_format, datacenters=None, workers=None):
+    """
+    Open the export of every datacenter, an 'xlsx' workbook or a 'pdf.zip'
+    bundle, rendering it into the export cache on a miss with `workers`
+    processes (see run_parallel).
+    """
+    if datacenters is None:
+        datacenters = list(DataCenter.objects.order_by('name', 'id'))
+    write = CONSOLIDATED_WRITERS[file_format]
+    # Cached until any datacenter changes; concurrent identical requests share one render
+    return export_cache.get_or_write(consolidated_cache_key(datacenters, file_format),
+                                     lambda output: write(output, datacenters, workers))
+
+
+def stream_report_bundle(datacenters):
+    """
+    Stream a zip with the Excel and PDF report of every datacenter. Entries
+    are generated one at a time while the archive is being sent.
+    """
+    def entries():
+        for datacenter in datacenters:
+            for extension in ('xlsx', 'pdf'):
+                yield bundle_file_name(datacenter, extension), iter_export(datacenter, extension)
+
+    return stream_zip(entries())
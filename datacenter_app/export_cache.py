@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from django.conf import settings
+
+EXPORT_CACHE_DIR = getattr(settings, 'EXPORT_CACHE_DIR', os.path.join(settings.BASE_DIR, 'export_cache'))
+EXPORT_CACHE_MAX_BYTES = getattr(settings, 'EXPORT_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+# Temp and lock files this old are left over from a crashed writer and can be removed
+ORPHAN_TEMP_AGE = 60 * 60
+TEMP_PREFIX = '.tmp-'
+LOCK_PREFIX = '.lock-'
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def export_cache_key(datacenter, extension, **filters):
+    """
+    Cache key (and file name) of one export artifact.
+
+    Keyed by datacenter, format, filters and the datacenter's data version,
+    so any equipment change makes the old entries unreachable.
+    """
+    filters = {name: value for name, value in filters.items() if value}
+    digest = hashlib.sha256(json.dumps([extension, filters], sort_keys=True).encode()).hexdigest()[:20]
+    return f"{datacenter.id}-{datacenter.data_version}-{digest}.{extension}"
+
+
+def consolidated_cache_key(datacenters, extension):
+    """
+    Cache key of an export covering several datacenters. It uses scope 0 and
+    the summed data versions, and its digest covers every (id, version) pair.
+    """
+    versions = sorted((datacenter.id, datacenter.data_version) for datacenter in datacenters)
+    digest = hashlib.sha256(json.dumps([extension, versions]).encode()).hexdigest()[:20]
+    return f"0-{sum(version for _, version in versions)}-{digest}.{extension}"
+
+
+def _parse_key(name):
+    datacenter_id, version, _ = name.split('-', 2)
+    return int(datacenter_id), int(version)
+
+
+class ExportCache:
+    """
+    Export artifacts on local disk with size-bounded LRU eviction.
+
+    Entries are published with an atomic rename, so readers only ever see
+    complete files; a hit refreshes the file's mtime, which is what the
+    eviction order is based on.
+
+    Rendering is single-flight per key: an flock on a per-key lock file
+    makes concurrent identical requests, from any thread or worker process
+    on this host, wait for the render in progress and share its result.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or EXPORT_CACHE_DIR
+        self.max_bytes = EXPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def open(self, key):
+        """Open a cached artifact for reading, or return None on a miss."""
+        path = self.path(key)
+        try:
+            handle = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return handle
+
+    def _temp_file(self):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=self.directory)
+        return os.fdopen(fd, 'w+b'), temp_path
+
+    def _publish(self, key, temp_path):
+        os.replace(temp_path, self.path(key))
+        self.prune(key)
+
+    def _lock(self, key, blocking=True):
+        """
+        Take the render lock of `key`. Returns the locked file (closing it
+        releases the lock), or None when not blocking and the lock is busy.
+        Every open() is its own lock holder, so this also serialises threads.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        lock_path = os.path.join(self.directory, f"{LOCK_PREFIX}{key}")
+        lock_file = open(lock_path, 'a+b')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                lock_file.close()
+                return None
+        # Keeps prune from mistaking a lock in use for an orphan
+        os.utime(lock_path)
+        return lock_file
+
+    def get_or_write(self, key, render):
+        """
+        Open the entry for `key`, rendering it with `render(file)` on a miss.
+        Concurrent callers for the same key wait for a single render.
+        """
+        artifact = self.open(key)
+        if artifact is not None:
+            return artifact
+        with self._lock(key):
+            # Whoever held the lock before us may have just published it
+            artifact = self.open(key)
+            if artifact is None:
+                artifact = self.write(key, render)
+        return artifact
+
+    def write(self, key, render):
+        """
+        Produce an artifact with `render(file)`, store it under `key` and
+        return it opened for reading.
+        """
+        handle, temp_path = self._temp_file()
+        try:
+            render(handle)
+            handle.flush()
+            handle.seek(0)
+            self._publish(key, temp_path)
+        except BaseException:
+            handle.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return handle
+
+    def stream(self, key, chunks):
+        """
+        Write `chunks` to the cache under the render lock, then stream the
+        published artifact. The lock is released before the first byte is
+        sent, so a slow client never holds up other requests for the key.
+        An aborted render leaves no truncated artifact behind.
+
+        If an identical render published the entry while we waited for the
+        lock, its result is sent and `chunks` is never produced.
+        """
+        def render(handle):
+            for chunk in chunks:
+                handle.write(chunk)
+
+        try:
+            artifact = self.get_or_write(key, render)
+        finally:
+            # Releases the generator's resources (e.g. a DB cursor) when it was not needed
+            chunks.close()
+        with artifact:
+            yield from iter(lambda: artifact.read(READ_BLOCK_SIZE), b'')
+
+    def prune(self, key=None):
+        """
+        Drop entries of older data versions of `key`'s datacenter, then evict
+        least recently used entries until the cache fits in `max_bytes`.
+        """
+        if key is not None:
+            datacenter_id, version = _parse_key(key)
+        entries = []
+        total = 0
+        now = time.time()
+        try:
+            listing = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in listing:
+            try:
+                stat = entry.stat()
+                if entry.name.startswith((TEMP_PREFIX, LOCK_PREFIX)):
+                    if now - stat.st_mtime > ORPHAN_TEMP_AGE:
+                        os.remove(entry.path)
+                    continue
+                if key is not None:
+                    entry_datacenter_id, entry_version = _parse_key(entry.name)
+                    if entry_datacenter_id == datacenter_id and entry_version < version:
+                        os.remove(entry.path)
+                        continue
+            except (OSError, ValueError):
+                # Vanished under a concurrent prune, or not one of our files
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+export_cache = ExportCache()
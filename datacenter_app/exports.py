@@ -0,0 +1,288 @@
+import csv
+import json
+import re
+import zipfile
+import zlib
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Equipment
+from .search import get_search_backend
+
+# Rows fetched per database round-trip while streaming an export
+EXPORT_CHUNK_SIZE = getattr(settings, 'EQUIPMENT_EXPORT_CHUNK_SIZE', 2000)
+# Buffered output handed to the client at once
+STREAM_BUFFER_SIZE = 64 * 1024
+
+EXPORT_HEADERS = ["ID", "Equipment Type", "Service Tag", "License Type", "Serial Number", "License Expiry Date"]
+EXPORT_FIELDS = ('id', 'equipment_type', 'service_tag', 'license_type', 'serial_number', 'license_expired_date')
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_CONTENT_TYPE = "text/csv; charset=utf-8"
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+GZIP_CONTENT_TYPE = "application/gzip"
+
+# Characters XML 1.0 does not allow, even escaped
+ILLEGAL_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+INVALID_SHEET_TITLE_CHARS = re.compile(r'[\[\]:*?/\\]')
+EXCEL_EPOCH = date(1899, 12, 30)
+
+
+def export_queryset(datacenter, service_tag=None, license_type=None):
+    """Live equipment of `datacenter` with the export search filters applied."""
+    equipments = Equipment.live.filter(datacenter=datacenter)
+    return get_search_backend().filter(equipments, service_tag=service_tag, license_type=license_type)
+
+
+def iter_export_rows(equipments, chunk_size=None):
+    """Yield export rows as plain tuples from a chunked cursor."""
+    return equipments.order_by('id').values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size or EXPORT_CHUNK_SIZE)
+
+
+class StreamSink:
+    """
+    Write-only, non-seekable file object collecting what ZipFile writes.
+
+    ZipFile falls back to data descriptors when it cannot seek, so an archive
+    can be produced front to back and drained to the client while it grows.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._buffered = 0
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._buffered += len(data)
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    @property
+    def buffered(self):
+        return self._buffered
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self._buffered = 0
+        return data
+
+
+def sheet_title(title, used_titles=()):
+    """Make `title` a valid, unique worksheet name (31 chars, no []:*?/\\)."""
+    title = INVALID_SHEET_TITLE_CHARS.sub('_', str(title)).strip("'") or 'Sheet'
+    title = title[:31]
+    candidate, suffix = title, 1
+    while candidate.lower() in {used.lower() for used in used_titles}:
+        suffix += 1
+        candidate = f"{title[:31 - len(str(suffix)) - 1]}_{suffix}"
+    return candidate
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        # Style 1 is the yyyy-mm-dd date format declared in styles.xml
+        return f'<c s="1"><v>{(value - EXCEL_EPOCH).days}</v></c>'
+    text = escape(ILLEGAL_XML_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_package_parts(titles):
+    sheets = ''.join(
+        f'<sheet name="{escape(title, {chr(34): "&quot;"})}" sheetId="{idx}" r:id="rId{idx}"/>'
+        for idx, title in enumerate(titles, 1)
+    )
+    sheet_rels = ''.join(
+        f'<Relationship Id="rId{idx}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{idx}.xml"/>'
+        for idx in range(1, len(titles) + 1)
+    )
+    sheet_overrides = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{idx}.xml" '
+        f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for idx in range(1, len(titles) + 1)
+    )
+    styles_rel = len(titles) + 1
+    return {
+        '[Content_Types].xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{sheet_overrides}</Types>'
+        ),
+        '_rels/.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>'
+        ),
+        'xl/workbook.xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheets}</sheets></workbook>'
+        ),
+        'xl/_rels/workbook.xml.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{sheet_rels}<Relationship Id="rId{styles_rel}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/></Relationships>'
+        ),
+        'xl/styles.xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd"/></numFmts>'
+            '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+            '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+            '<fill><patternFill patternType="gray125"/></fill></fills>'
+            '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+            '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+            '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            '</styleSheet>'
+        ),
+    }
+
+
+def _with_header(headers, rows):
+    if headers:
+        yield headers
+    yield from rows
+
+
+def iter_sheet_xml(headers, rows):
+    """Yield the worksheet XML for `rows` (headers first), one row per chunk."""
+    yield (b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+           b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+    for row_num, row in enumerate(_with_header(headers, rows), 1):
+        cells = ''.join(_xlsx_cell(value) for value in row)
+        yield f'<row r="{row_num}">{cells}</row>'.encode()
+    yield b'</sheetData></worksheet>'
+
+
+def stream_workbook(sheets):
+    """
+    Stream a workbook from `(title, chunks)` pairs, where `chunks` is the
+    worksheet XML (see iter_sheet_xml), either generated on the fly or read
+    back from a sheet rendered elsewhere.
+    """
+    sheets = list(sheets)
+    titles = []
+    for title, _ in sheets:
+        titles.append(sheet_title(title, titles))
+
+    sink = StreamSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _xlsx_package_parts(titles).items():
+            archive.writestr(name, content)
+        yield sink.drain()
+
+        for idx, (_, chunks) in enumerate(sheets, 1):
+            with archive.open(f'xl/worksheets/sheet{idx}.xml', 'w') as sheet:
+                for chunk in chunks:
+                    sheet.write(chunk)
+                    if sink.buffered >= STREAM_BUFFER_SIZE:
+                        yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream_xlsx(sheets):
+    """
+    Stream a write-only workbook as it is produced.
+
+    `sheets` is a sequence of `(title, headers, rows)`; each `rows` iterable is
+    consumed lazily and written straight into the archive, so memory stays
+    constant and the first bytes leave before the last row is read.
+    """
+    return stream_workbook((title, iter_sheet_xml(headers, rows)) for title, headers, rows in sheets)
+
+
+def stream_zip(entries):
+    """
+    Stream a zip archive from `(name, chunks)` pairs as the entries are
+    produced. Nothing beyond the current output buffer is held in memory and
+    no temporary file is needed for the archive. Entries are stored as they
+    come, since the exports inside are already compressed.
+    """
+    sink = StreamSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name, chunks in entries:
+            with archive.open(name, 'w') as entry:
+                yield sink.drain()
+                for chunk in chunks:
+                    entry.write(chunk)
+                    if sink.buffered >= STREAM_BUFFER_SIZE:
+                        yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+class _Echo:
+    """File-like object whose write() just returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(headers, rows):
+    """Yield CSV text in buffered blocks, one row at a time from `rows`."""
+    writer = csv.writer(_Echo())
+    buffer, size = [writer.writerow(headers)], 0
+    for row in rows:
+        line = writer.writerow([value.isoformat() if isinstance(value, date) else value for value in row])
+        buffer.append(line)
+        size += len(line)
+        if size >= STREAM_BUFFER_SIZE:
+            yield ''.join(buffer).encode()
+            buffer, size = [], 0
+    yield ''.join(buffer).encode()
+
+
+def stream_ndjson(fields, rows):
+    """Yield one JSON object per line keyed by `fields`, in buffered blocks."""
+    buffer, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+        buffer.append(line)
+        size += len(line)
+        if size >= STREAM_BUFFER_SIZE:
+            yield ''.join(buffer).encode()
+            buffer, size = [], 0
+    yield ''.join(buffer).encode()
+
+
+def gzip_stream(chunks, level=6):
+    """Compress a byte stream on the fly into a single gzip member."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,113 @@
+import os
+import re
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+RANGE_BLOCK_SIZE = 64 * 1024
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_byte_range(header, size):
+    """
+    Parse a single-range `Range` header against a file of `size` bytes.
+
+    Returns an inclusive (start, end) pair, None when the header is absent
+    or not something we serve partially (multiple ranges, other units), and
+    raises ValueError when the range cannot be satisfied.
+    """
+    match = BYTE_RANGE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(RANGE_BLOCK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def ranged_file_response(request, path, content_type, filename, etag=None):
+    """
+    Download response for a file on disk honouring `Range` (and `If-Range`
+    against `etag`), so interrupted downloads can be resumed.
+    """
+    size = os.path.getsize(path)
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or (etag and if_range == etag):
+        try:
+            byte_range = parse_byte_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(path, start, end - start + 1), status=206,
+                                         content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if etag:
+        response['ETag'] = etag
+    return response
+
+
+def negotiated_etag(request, etag):
+    """
+    Qualify `etag` with the media type DRF negotiated for `request`: the
+    JSON, columnar and MessagePack bodies of the same data are different
+    representations and must not validate each other.
+    """
+    media_type = re.sub(r'[\s"]', '', getattr(request, 'accepted_media_type', '') or '')
+    return f"{etag}-{media_type}" if media_type else etag
+
+
+def set_validators(response, etag, last_modified):
+    """
+    Add `ETag`/`Last-Modified` to `response` and make clients revalidate
+    before reusing it, so polling turns into cheap conditional requests.
+    The body depends on the `Accept` header, so caches are told so.
+    """
+    response['ETag'] = quote_etag(etag)
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def not_modified(request, etag, last_modified):
+    """
+    304 response when the client's copy (`If-None-Match` / `If-Modified-Since`)
+    is still current, otherwise None. Call it before running the list query.
+    """
+    response = get_conditional_response(request, etag=quote_etag(etag), last_modified=int(last_modified.timestamp()))
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
@@ -0,0 +1,752 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import uuid
+from collections import Counter
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from itertools import chain, islice
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, models, transaction
+from openpyxl import load_workbook
+
+from .models import DataCenter, DataCenterStats, Equipment
+
+# Number of rows looked up / written per round-trip. Kept below SQLite's
+# historical 999 bound-parameter limit so the `IN` prefetch stays valid.
+IMPORT_BATCH_SIZE = getattr(settings, 'EQUIPMENT_IMPORT_BATCH_SIZE', 500)
+# Rejected-row messages kept in memory and returned in responses; all of them go to the error report
+IMPORT_ERROR_LIMIT = getattr(settings, 'EQUIPMENT_IMPORT_ERROR_LIMIT', 1000)
+
+TEXT_FIELDS = ('equipment_type', 'service_tag', 'license_type', 'serial_number')
+UPDATE_FIELDS = ['equipment_type', 'service_tag', 'license_type', 'license_expired_date', 'datacenter', 'import_hash']
+
+# Map of possible column names to their standard names
+COLUMN_MAPPING = {
+    'equipment type': ('equipment_type', 'equipment type', 'type', 'equipment'),
+    'service tag': ('service_tag', 'service tag', 'service', 'tag'),
+    'license type': ('license_type', 'license type', 'license'),
+    'serial number': ('serial_number', 'serial number', 'serial', 'sn'),
+    'license expiry date': ('license_expired_date', 'license expiry date', 'license expiry', 'expiry date', 'expires', 'expiry'),
+}
+REQUIRED_COLUMNS = ['equipment type', 'service tag', 'license type', 'serial number']
+
+# Map of display names to model fields
+FIELD_MAPPING = {
+    'equipment type': 'equipment_type',
+    'service tag': 'service_tag',
+    'license type': 'license_type',
+    'serial number': 'serial_number',
+    'license expiry date': 'license_expired_date',
+}
+REQUIRED_FIELDS = {
+    'equipment_type': 'Equipment Type',
+    'service_tag': 'Service Tag',
+    'license_type': 'License Type',
+    'serial_number': 'Serial Number',
+}
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d', '%d-%m-%Y', '%m-%d-%Y')
+DATE_FORMAT_LABELS = {
+    '%Y-%m-%d': 'YYYY-MM-DD',
+    '%d/%m/%Y': 'DD/MM/YYYY',
+    '%m/%d/%Y': 'MM/DD/YYYY',
+    '%Y/%m/%d': 'YYYY/MM/DD',
+    '%d-%m-%Y': 'DD-MM-YYYY',
+    '%m-%d-%Y': 'MM-DD-YYYY',
+}
+# Rows buffered to infer the date format of the expiry column
+DATE_SAMPLE_SIZE = 1000
+# NDJSON lines scanned for keys to build the synthesised header row
+NDJSON_HEADER_SAMPLE_SIZE = 1000
+# Maximum number of per-row update details returned by a dry run
+PREVIEW_DETAIL_LIMIT = 1000
+
+
+class MissingColumnsError(Exception):
+    def __init__(self, missing_columns, available_columns):
+        super().__init__(f"Missing required columns: {', '.join(missing_columns)}")
+        self.missing_columns = missing_columns
+        self.available_columns = available_columns
+
+
+class AmbiguousDateFormatError(Exception):
+    def __init__(self, candidate_formats):
+        labels = [DATE_FORMAT_LABELS[fmt] for fmt in candidate_formats]
+        super().__init__(f"Ambiguous date format, could be any of: {', '.join(labels)}")
+        self.candidate_formats = labels
+
+
+class ImportErrors:
+    """
+    Rejected-row messages of an import. Every error is counted, but only the
+    first `limit` are kept in memory; with `report_path` each message is also
+    appended to that file as it occurs, so the full report costs no memory.
+    """
+
+    def __init__(self, limit=None, report_path=None):
+        self.limit = IMPORT_ERROR_LIMIT if limit is None else limit
+        self.report_path = report_path
+        self.messages = []
+        self.count = 0
+        self._report = None
+
+    def append(self, message):
+        self.count += 1
+        if len(self.messages) < self.limit:
+            self.messages.append(message)
+        if self.report_path:
+            if self._report is None:
+                self._report = open(self.report_path, 'w')
+            self._report.write(message + "\n")
+
+    @property
+    def truncated(self):
+        return self.count > len(self.messages)
+
+    def close(self):
+        if self._report is not None:
+            self._report.close()
+            self._report = None
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.messages)
+
+
+class SeenKeys:
+    """
+    Serial numbers and service tags already read from the file being
+    imported, kept in a temporary table so duplicates across batches are
+    caught without holding every key of a large file in memory.
+    """
+
+    def __init__(self):
+        self.table = f"import_seen_{uuid.uuid4().hex}"
+        self._created = False
+
+    def add(self, keys):
+        """Record `keys` and return the ones that had been recorded before."""
+        keys = list(keys)
+        if not keys:
+            return set()
+        with connection.cursor() as cursor:
+            if not self._created:
+                cursor.execute(f"CREATE TEMPORARY TABLE {self.table} (seen_key VARCHAR(110) PRIMARY KEY)")
+                self._created = True
+            seen = set()
+            for start in range(0, len(keys), IMPORT_BATCH_SIZE):
+                chunk = keys[start:start + IMPORT_BATCH_SIZE]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"SELECT seen_key FROM {self.table} WHERE seen_key IN ({placeholders})", chunk)
+                seen.update(key for key, in cursor.fetchall())
+            cursor.executemany(f"INSERT INTO {self.table} (seen_key) VALUES (%s)", [(key,) for key in keys if key not in seen])
+        return seen
+
+    def close(self):
+        if self._created:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+            self._created = False
+
+
+def read_xlsx_rows(excel_file):
+    """
+    Yield the active sheet of `excel_file` as plain value tuples.
+
+    The workbook is opened in read-only mode, so rows are parsed lazily from
+    the underlying XML and never held as cell objects.
+    """
+    wb = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        # Some exporters write a wrong <dimension>; scan the sheet to its real end.
+        ws.reset_dimensions()
+        yield from ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def read_csv_rows(csv_file):
+    """Yield a CSV upload row by row, with blank cells as None."""
+    text = io.TextIOWrapper(csv_file, encoding='utf-8-sig', newline='')
+    try:
+        for row in csv.reader(text):
+            yield tuple(value.strip() or None for value in row)
+    finally:
+        # Hand the underlying file back to its owner instead of closing it
+        text.detach()
+
+
+class InvalidRow:
+    """A source row that could not be read; normalize_rows() reports it as a row error."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def parse_ndjson_line(line):
+    """Return the object on an NDJSON line, None for a blank line or an InvalidRow."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return InvalidRow(f"Invalid JSON - {str(e)}")
+    if not isinstance(record, dict):
+        return InvalidRow("Expected a JSON object")
+    return record
+
+
+def read_ndjson_rows(ndjson_file):
+    """
+    Yield an NDJSON upload as a header row followed by one value tuple per line.
+
+    The header is the union of the keys of the first NDJSON_HEADER_SAMPLE_SIZE
+    objects, in the order they first appear, so a column absent from the first
+    line is still picked up. Every object is read against it: missing keys
+    become None and keys first seen past the sample are ignored. Malformed
+    lines are yielded as InvalidRow so they are reported like any other bad row.
+    """
+    records = (parse_ndjson_line(line) for line in ndjson_file)
+    sample = list(islice(records, NDJSON_HEADER_SAMPLE_SIZE))
+    keys = {}
+    for record in sample:
+        if isinstance(record, dict):
+            keys.update(dict.fromkeys(record))
+    header = tuple(keys)
+    yield header
+    for record in chain(sample, records):
+        if isinstance(record, dict):
+            yield tuple(record.get(key) for key in header)
+        else:
+            yield record or ()
+
+
+# Raw row readers per upload format, and the row number of the first data row
+ROW_READERS = {
+    'xlsx': (read_xlsx_rows, 2),
+    'csv': (read_csv_rows, 2),
+    # The NDJSON header is synthesised, so data rows are numbered by line
+    'ndjson': (read_ndjson_rows, 1),
+}
+
+
+def detect_import_format(file_name, content_type=None):
+    """Return the ROW_READERS key for an upload, or None if it is not supported."""
+    extension = os.path.splitext(file_name or '')[1].lower()
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if extension in ('.xlsx', '.xls'):
+        return 'xlsx'
+    if extension == '.csv' or content_type in ('text/csv', 'application/csv'):
+        return 'csv'
+    if extension in ('.ndjson', '.jsonl') or content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        return 'ndjson'
+    return None
+
+
+def map_columns(header_row):
+    """Return the normalised headers and the column index of each known field."""
+    headers = [
+        str(value).strip().lower() if value else f"column_{idx+1}"
+        for idx, value in enumerate(header_row or ())
+    ]
+    header_positions = {header: idx for idx, header in enumerate(headers)}
+
+    column_positions = {}
+    for display_name, aliases in COLUMN_MAPPING.items():
+        for alias in aliases:
+            if alias in header_positions:
+                column_positions[display_name] = header_positions[alias]
+                break
+    return headers, column_positions
+
+
+def resolve_date_format(value):
+    """Map a strftime pattern or its label (e.g. 'DD/MM/YYYY') to a DATE_FORMATS entry."""
+    value = (value or '').strip()
+    for fmt, label in DATE_FORMAT_LABELS.items():
+        if value in (fmt, label) or value.upper() == label:
+            return fmt
+    return None
+
+
+def compile_date_parser(fmt):
+    """
+    Build a parser for one of DATE_FORMATS from a precompiled regex.
+
+    Matches what strptime accepts for these formats (including single digit
+    days and months) at a fraction of the cost.
+    """
+    pattern = re.escape(fmt)
+    for directive, group in (('%Y', r'(?P<year>\d{4})'), ('%m', r'(?P<month>\d{1,2})'), ('%d', r'(?P<day>\d{1,2})')):
+        pattern = pattern.replace(re.escape(directive), group)
+    match = re.compile(pattern).fullmatch
+
+    def parse(value):
+        m = match(value)
+        if m is None:
+            raise ValueError(f"'{value}' does not match {DATE_FORMAT_LABELS[fmt]}")
+        return date(int(m['year']), int(m['month']), int(m['day']))
+    return parse
+
+
+DATE_PARSERS = {fmt: compile_date_parser(fmt) for fmt in DATE_FORMATS}
+
+
+def infer_date_format(values):
+    """
+    Pick the single format that parses the most of the sampled string dates.
+
+    Returns None when there is nothing to infer from, and raises
+    AmbiguousDateFormatError when several formats fit the sample equally well
+    (e.g. only days <= 12 in a DD/MM vs MM/DD file).
+    """
+    matches = dict.fromkeys(DATE_FORMATS, 0)
+    for value in values:
+        for fmt, parse in DATE_PARSERS.items():
+            try:
+                parse(value)
+            except ValueError:
+                continue
+            matches[fmt] += 1
+
+    best = max(matches.values())
+    if not best:
+        return None
+    candidates = [fmt for fmt, count in matches.items() if count == best]
+    if len(candidates) > 1:
+        raise AmbiguousDateFormatError(candidates)
+    return candidates[0]
+
+
+class DateColumn:
+    """
+    Parses the license expiry column with one format for the whole file.
+
+    Unless a format is forced, the first DATE_SAMPLE_SIZE rows are buffered
+    to infer it; every string date is then parsed with that format only.
+    """
+
+    def __init__(self, date_format=None):
+        self.date_format = date_format
+
+    @property
+    def label(self):
+        return DATE_FORMAT_LABELS.get(self.date_format)
+
+    def parse_records(self, records, errors):
+        records = iter(records)
+        if self.date_format is None:
+            sample = list(islice(records, DATE_SAMPLE_SIZE))
+            self.date_format = infer_date_format(
+                data['license_expired_date'] for _, data in sample
+                if isinstance(data.get('license_expired_date'), str)
+            ) or DATE_FORMATS[0]
+            records = chain(sample, records)
+
+        parse = DATE_PARSERS[self.date_format]
+        for row_num, equipment_data in records:
+            value = equipment_data.get('license_expired_date')
+            if isinstance(value, str):
+                try:
+                    equipment_data['license_expired_date'] = parse(value)
+                except ValueError:
+                    errors.append(f"Row {row_num}: Invalid license expiry date '{value}' (expected {self.label})")
+                    continue
+            yield row_num, equipment_data
+
+
+def normalize_rows(rows, column_positions, errors, start_row):
+    """Turn raw value tuples into `(row_num, equipment_data)` pairs."""
+    for row_num, row in enumerate(rows, start=start_row):
+        if isinstance(row, InvalidRow):
+            errors.append(f"Row {row_num}: {row.message}")
+            continue
+        # Skip empty rows
+        if not row or all(value is None for value in row):
+            continue
+
+        equipment_data = {}
+        for display_name, col_idx in column_positions.items():
+            if col_idx >= len(row) or row[col_idx] is None:
+                continue
+            field_name = FIELD_MAPPING[display_name]
+            value = row[col_idx]
+            if field_name != 'license_expired_date':
+                equipment_data[field_name] = str(value).strip()
+            elif isinstance(value, datetime):
+                equipment_data[field_name] = value.date()
+            elif isinstance(value, date):
+                equipment_data[field_name] = value
+            else:
+                # Strings are parsed column-wide by DateColumn
+                equipment_data[field_name] = str(value).strip() or None
+
+        if not any(equipment_data.values()):
+            errors.append(f"Row {row_num}: Empty row skipped")
+            continue
+        yield row_num, equipment_data
+
+
+def validate_rows(records, errors):
+    """Drop rows missing required fields and fill in the default expiry date."""
+    default_expiry = (datetime.now() + timedelta(days=365)).date()  # Default to 1 year from now
+    for row_num, equipment_data in records:
+        missing_fields = [
+            display_name for field, display_name in REQUIRED_FIELDS.items()
+            if not equipment_data.get(field)
+        ]
+        if missing_fields:
+            errors.append(
+                f"Row {row_num}: Missing or empty required fields: {', '.join(missing_fields)}. "
+                f"Available columns: {', '.join(equipment_data.keys())}"
+            )
+            continue
+
+        yield row_num, {
+            'equipment_type': equipment_data['equipment_type'],
+            'service_tag': equipment_data['service_tag'],
+            'license_type': equipment_data['license_type'],
+            'serial_number': equipment_data['serial_number'],
+            'license_expired_date': equipment_data.get('license_expired_date') or default_expiry,
+        }
+
+
+def diff_equipment(equipment, equipment_data, datacenter):
+    """Return `{field: (current, imported)}` for every field the import would change."""
+    changes = {
+        field: (getattr(equipment, field), value)
+        for field, value in equipment_data.items()
+        if field != 'serial_number' and getattr(equipment, field) != value
+    }
+    if equipment.datacenter_id != datacenter.id:
+        changes['datacenter'] = (equipment.datacenter_id, datacenter)
+    return changes
+
+
+class EquipmentUpserter:
+    """
+    Buffers validated import rows and writes them to the database in batches.
+
+    Each flush prefetches the ids and content hashes of the existing equipment
+    for the batch with a single `serial_number IN (...)` query. Rows whose
+    hash matches are skipped; the rest go into one bulk_create and one
+    bulk_update. Rows that would violate a unique constraint are rejected up
+    front so they can be reported individually.
+    """
+
+    def __init__(self, datacenter, batch_size=None, progress=None, error_report_path=None):
+        self.datacenter = datacenter
+        self.batch_size = batch_size or IMPORT_BATCH_SIZE
+        # Optional callable invoked with the upserter after every flushed batch
+        self.progress = progress
+        self.created_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0
+        self.errors = ImportErrors(report_path=error_report_path)
+        # Label of the expiry date format used, set once the import has run
+        self.date_format = None
+        # Datacenters whose equipment this import touched, so their data version is bumped
+        self.changed_datacenter_ids = set()
+        self._pending = []
+        # Keys of earlier batches; duplicates within a batch are caught in flush()
+        self._seen = SeenKeys()
+
+    @property
+    def processed_count(self):
+        return self.created_count + self.updated_count + self.unchanged_count + len(self.errors)
+
+    def add(self, row_num, equipment_data):
+        for field in TEXT_FIELDS:
+            max_length = Equipment._meta.get_field(field).max_length
+            if len(equipment_data[field]) > max_length:
+                self.errors.append(f"Row {row_num}: {field} exceeds {max_length} characters")
+                return
+
+        self._pending.append((row_num, equipment_data))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def upsert_all(self, records):
+        """Consume `(row_num, equipment_data)` pairs inside a single transaction."""
+        with transaction.atomic():
+            for row_num, equipment_data in records:
+                self.add(row_num, equipment_data)
+            self.flush()
+            if self.changed_datacenter_ids:
+                DataCenter.bump_data_version(*self.changed_datacenter_ids)
+                DataCenterStats.refresh(*self.changed_datacenter_ids)
+
+    def close(self):
+        self._seen.close()
+        self.errors.close()
+
+    def _drop_duplicates(self, rows):
+        """Reject rows repeating a serial number or service tag seen earlier in the file; first one wins."""
+        batch_keys = set()
+        unique = []
+        for row_num, data in rows:
+            serial_key = f"s:{data['serial_number']}"
+            tag_key = f"t:{data['service_tag']}"
+            if serial_key in batch_keys:
+                self.errors.append(f"Row {row_num}: Duplicate serial number {data['serial_number']} in file")
+            elif tag_key in batch_keys:
+                self.errors.append(f"Row {row_num}: Duplicate service tag {data['service_tag']} in file")
+            else:
+                batch_keys.update((serial_key, tag_key))
+                unique.append((row_num, data, serial_key, tag_key))
+
+        seen = self._seen.add(batch_keys)
+        rows = []
+        for row_num, data, serial_key, tag_key in unique:
+            if serial_key in seen:
+                self.errors.append(f"Row {row_num}: Duplicate serial number {data['serial_number']} in file")
+            elif tag_key in seen:
+                self.errors.append(f"Row {row_num}: Duplicate service tag {data['service_tag']} in file")
+            else:
+                rows.append((row_num, data))
+        return rows
+
+    def flush(self):
+        rows, self._pending = self._pending, []
+        rows = self._drop_duplicates(rows)
+        if not rows:
+            if self.progress:
+                self.progress(self)
+            return
+
+        serials = {data['serial_number'] for _, data in rows}
+        service_tags = [data['service_tag'] for _, data in rows]
+        # Only ids and content hashes are needed to tell new, changed and unchanged rows apart
+        existing = {
+            serial: (pk, import_hash, datacenter_id)
+            for serial, pk, import_hash, datacenter_id in Equipment.objects.filter(serial_number__in=serials)
+            .values_list('serial_number', 'id', 'import_hash', 'datacenter_id')
+        }
+        tag_owners = dict(
+            Equipment.objects.filter(service_tag__in=service_tags).values_list('service_tag', 'serial_number')
+        )
+        new_serials = serials - existing.keys()
+
+        to_create = []
+        to_update = []
+        for row_num, data in rows:
+            serial = data['serial_number']
+            owner = tag_owners.get(data['service_tag'])
+            if owner is not None and owner != serial:
+                self.errors.append(
+                    f"Row {row_num}: Service tag {data['service_tag']} is already used by equipment {owner}"
+                )
+                continue
+
+            row_hash = Equipment.content_hash(data, self.datacenter.id)
+            if serial in new_serials:
+                to_create.append((row_num, data, row_hash))
+                continue
+            pk, current_hash, current_datacenter_id = existing[serial]
+            if row_hash == current_hash:
+                self.unchanged_count += 1
+            else:
+                to_update.append((row_num, pk, data, row_hash))
+                # A moved row changes the datacenter it leaves as well
+                self.changed_datacenter_ids.add(current_datacenter_id)
+        if to_create or to_update:
+            self.changed_datacenter_ids.add(self.datacenter.id)
+
+        self._write(to_create, to_update)
+        if self.progress:
+            self.progress(self)
+
+    def _write(self, to_create, to_update):
+        new_equipments = [
+            (row_num, Equipment(datacenter=self.datacenter, import_hash=row_hash, **data))
+            for row_num, data, row_hash in to_create
+        ]
+        # Every imported field is overwritten, so the rows need not be loaded first
+        updated_equipments = [
+            (row_num, Equipment(pk=pk, datacenter=self.datacenter, import_hash=row_hash, **data))
+            for row_num, pk, data, row_hash in to_update
+        ]
+
+        try:
+            with transaction.atomic():
+                if new_equipments:
+                    Equipment.objects.bulk_create([eq for _, eq in new_equipments], batch_size=self.batch_size)
+                if updated_equipments:
+                    # A plain QuerySet: upsert_all() bumps the data versions once for the whole import,
+                    # instead of EquipmentQuerySet.update() doing it for every batch
+                    models.QuerySet(Equipment).bulk_update(
+                        [eq for _, eq in updated_equipments], UPDATE_FIELDS, batch_size=self.batch_size
+                    )
+        except IntegrityError:
+            # Something slipped past the pre-checks (e.g. a concurrent insert);
+            # replay the batch row by row so the offending rows are reported.
+            self._write_rows(new_equipments, updated_equipments)
+            return
+        self.created_count += len(new_equipments)
+        self.updated_count += len(updated_equipments)
+
+    def _write_rows(self, to_create, to_update):
+        for row_num, equipment in to_create:
+            equipment.pk = None
+            equipment._state.adding = True
+            try:
+                with transaction.atomic():
+                    equipment.save(force_insert=True)
+                self.created_count += 1
+            except IntegrityError as e:
+                self.errors.append(f"Row {row_num}: Error creating equipment - {str(e)}")
+        for row_num, equipment in to_update:
+            try:
+                with transaction.atomic():
+                    equipment.save(update_fields=UPDATE_FIELDS)
+                self.updated_count += 1
+            except DatabaseError as e:
+                self.errors.append(f"Row {row_num}: Error updating equipment - {str(e)}")
+
+
+class EquipmentImportPreview(EquipmentUpserter):
+    """
+    Runs the import pipeline without writing anything.
+
+    Each batch is diffed against the existing equipment and only the
+    outcome is recorded: rows that would be created, updated (and which
+    fields change), moved from another datacenter, left unchanged or
+    rejected.
+    """
+
+    def __init__(self, datacenter, batch_size=None, progress=None, error_report_path=None):
+        super().__init__(datacenter, batch_size=batch_size, progress=progress, error_report_path=error_report_path)
+        self.moved_count = 0
+        self.field_change_counts = Counter()
+        # Per-row details are capped so the preview stays cheap on huge files
+        self.updates = []
+
+    def upsert_all(self, records):
+        for row_num, equipment_data in records:
+            self.add(row_num, equipment_data)
+        self.flush()
+
+    def _write(self, to_create, to_update):
+        self.created_count += len(to_create)
+        # Rows whose hash matched were already counted as unchanged; only
+        # the remaining candidates are loaded to work out their field diff.
+        current = Equipment.objects.in_bulk([pk for _, pk, _, _ in to_update])
+        for row_num, pk, data, _ in to_update:
+            equipment = current[pk]
+            changes = diff_equipment(equipment, data, self.datacenter)
+            if not changes:
+                self.unchanged_count += 1
+                continue
+            self.updated_count += 1
+            self.field_change_counts.update(changes.keys())
+            if 'datacenter' in changes:
+                self.moved_count += 1
+            if len(self.updates) < PREVIEW_DETAIL_LIMIT:
+                self.updates.append({
+                    'row': row_num,
+                    'serial_number': equipment.serial_number,
+                    'changes': {
+                        field: {'from': old, 'to': new.id if field == 'datacenter' else new}
+                        for field, (old, new) in changes.items()
+                    },
+                })
+
+
+def import_equipment_rows(datacenter, rows, batch_size=None, progress=None, start_row=2, date_format=None,
+                          dry_run=False, error_report_path=None):
+    """
+    Run the streaming import pipeline over raw sheet rows (header first):
+    header detection -> row normalisation -> date parsing -> validation ->
+    batched persistence.
+
+    Only one batch of rows (or the date sample) is materialised at a time.
+    With `dry_run` an EquipmentImportPreview is used and nothing is written.
+    Rejected rows are counted in `upserter.errors`; with `error_report_path`
+    every message is also written to that file.
+    Raises MissingColumnsError when the header lacks a required column and
+    AmbiguousDateFormatError when the expiry date format cannot be inferred.
+    """
+    rows = iter(rows)
+    headers, column_positions = map_columns(next(rows, None))
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in column_positions]
+    if missing_columns:
+        raise MissingColumnsError(missing_columns, headers)
+
+    upserter_class = EquipmentImportPreview if dry_run else EquipmentUpserter
+    upserter = upserter_class(datacenter, batch_size=batch_size, progress=progress,
+                              error_report_path=error_report_path)
+    date_column = DateColumn(date_format)
+    records = normalize_rows(rows, column_positions, upserter.errors, start_row)
+    records = date_column.parse_records(records, upserter.errors)
+    records = validate_rows(records, upserter.errors)
+    try:
+        upserter.upsert_all(records)
+    finally:
+        upserter.close()
+    upserter.date_format = date_column.label
+    return upserter
+
+
+def import_equipment_file(datacenter, source, file_format, **kwargs):
+    """Import an open upload in one of the ROW_READERS formats."""
+    reader, start_row = ROW_READERS[file_format]
+    # Close the reader before the caller closes the source, even when the import stops early
+    with closing(reader(source)) as rows:
+        return import_equipment_rows(datacenter, rows, start_row=start_row, **kwargs)
+
+
+def stage_upload(uploaded_file, name, file_format):
+    """
+    Copy an uploaded file to the import staging directory chunk by chunk.
+
+    The staged file is named after its import format so the worker can pick
+    the matching reader.
+    """
+    os.makedirs(settings.IMPORT_STAGING_DIR, exist_ok=True)
+    path = os.path.join(settings.IMPORT_STAGING_DIR, f"{name}.{file_format}")
+    with open(path, 'wb') as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+    return path
+
+
+def receive_upload_chunk(stream, length, checksum, chunk_path):
+    """
+    Spool `length` bytes from `stream` into a file of their own at `chunk_path`.
+
+    The chunk is hashed while it is written and never held in memory as a
+    whole. Returns False (and removes the file) when the body is short or
+    its SHA-256 does not match `checksum`.
+    """
+    digest = hashlib.sha256()
+    remaining = length
+    with open(chunk_path, 'wb') as destination:
+        while remaining > 0:
+            block = stream.read(min(remaining, 64 * 1024))
+            if not block:
+                break
+            digest.update(block)
+            destination.write(block)
+            remaining -= len(block)
+    if remaining or digest.hexdigest() != checksum.strip().lower():
+        os.remove(chunk_path)
+        return False
+    return True
+
+
+def append_upload_chunk(path, offset, chunk_path):
+    """Copy a chunk spooled by receive_upload_chunk() into the file at `path` at `offset`, then remove it."""
+    with open(chunk_path, 'rb') as chunk, open(path, 'r+b') as destination:
+        destination.seek(offset)
+        shutil.copyfileobj(chunk, destination, 1024 * 1024)
+        destination.truncate()
+    os.remove(chunk_path)
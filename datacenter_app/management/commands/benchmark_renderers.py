@@ -0,0 +1,92 @@
+import datetime
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+from datacenter_app import renderers
+from datacenter_app.middleware import RESPONSE_ZSTD_LEVEL, zstandard
+from datacenter_app.models import DataCenter, Equipment
+from datacenter_app.serializers import EquipmentValuesSerializer
+
+
+def synthetic_payload(rows):
+    """Rows shaped like the EquipmentFetchView response."""
+    start = datetime.date(2025, 1, 1)
+    return [
+        {
+            'id': i,
+            'equipment_type': ('Server', 'Switch', 'Router', 'Firewall')[i % 4],
+            'service_tag': f'ST{i:08d}',
+            'license_type': ('Enterprise', 'Standard', 'Premium')[i % 3],
+            'serial_number': f'SN-{i * 7919 % 10 ** 9:09d}',
+            'license_expired_date': (start + datetime.timedelta(days=i % 1000)).isoformat(),
+            'datacenter': 'Main Datacenter',
+        }
+        for i in range(rows)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Compare render time and size of the API renderers and response compression on equipment list payloads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Rows in the synthetic payload')
+        parser.add_argument('--datacenter', type=int, help='Benchmark the real equipment list of this datacenter instead')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per renderer (the median is reported)')
+
+    def handle(self, *args, **options):
+        if options['datacenter']:
+            try:
+                datacenter = DataCenter.objects.get(pk=options['datacenter'])
+            except DataCenter.DoesNotExist:
+                raise CommandError(f"DataCenter {options['datacenter']} not found")
+            serializer = EquipmentValuesSerializer(datacenter=datacenter)
+            data = serializer.to_representation(serializer.values(Equipment.live.filter(datacenter=datacenter)))
+        else:
+            data = synthetic_payload(options['rows'])
+        self.stdout.write(f"{len(data)} rows, median of {options['repeat']} runs")
+
+        candidates = [('JSONRenderer (DRF)', JSONRenderer().render)]
+        if renderers.orjson is not None:
+            candidates.append(('FastJSONRenderer', renderers.FastJSONRenderer().render))
+        else:
+            self.stdout.write('FastJSONRenderer: orjson not installed, skipped')
+        if renderers.msgpack is not None:
+            candidates.append(('MessagePackRenderer', renderers.MessagePackRenderer().render))
+        else:
+            self.stdout.write('MessagePackRenderer: msgpack not installed, skipped')
+
+        baseline = None
+        for label, render in candidates:
+            seconds, body = self.measure(render, data, options['repeat'])
+            baseline = baseline or seconds
+            self.report(label, seconds, len(body), baseline)
+
+        json_body = JSONRenderer().render(data)
+        codings = [('gzip', compress_string)]
+        if zstandard is not None:
+            codings.append((f'zstd level {RESPONSE_ZSTD_LEVEL}', zstandard.ZstdCompressor(level=RESPONSE_ZSTD_LEVEL).compress))
+        else:
+            self.stdout.write('zstd: zstandard not installed, skipped')
+        for label, compress in codings:
+            seconds, body = self.measure(compress, json_body, options['repeat'])
+            self.stdout.write(
+                f"{'JSON + ' + label:<24} {seconds * 1000:9.1f} ms  {len(body) / 1024:9.0f} KiB"
+                f"  ({len(body) / len(json_body):.1%} of the JSON body)"
+            )
+
+    @staticmethod
+    def measure(function, data, repeat):
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            result = function(data)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings), result
+
+    def report(self, label, seconds, size, baseline):
+        self.stdout.write(
+            f"{label:<24} {seconds * 1000:9.1f} ms  {size / 1024:9.0f} KiB  ({baseline / seconds:.1f}x)"
+        )
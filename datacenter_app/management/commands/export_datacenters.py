@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from datacenter_app.consolidated import write_consolidated_workbook, write_pdf_bundle
+from datacenter_app.models import DataCenter
+
+
+class Command(BaseCommand):
+    help = 'Export every datacenter into one workbook (a sheet per datacenter) or a zip of their PDF reports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the file to write')
+        parser.add_argument('--format', choices=['xlsx', 'pdf'], default='xlsx',
+                            help='xlsx: one workbook with a sheet per datacenter; pdf: zip bundle of PDF reports')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processes rendering datacenters in parallel (default: CONSOLIDATED_EXPORT_WORKERS)')
+
+    def handle(self, *args, **options):
+        datacenters = list(DataCenter.objects.order_by('name', 'id'))
+        if not datacenters:
+            raise CommandError('No datacenters found')
+
+        started = time.monotonic()
+        write = write_consolidated_workbook if options['format'] == 'xlsx' else write_pdf_bundle
+        with open(options['output'], 'wb') as output:
+            write(output, datacenters, workers=options['workers'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {len(datacenters)} datacenter(s) to {options['output']} in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from datacenter_app.models import DataCenter, DataCenterStats
+
+
+class Command(BaseCommand):
+    help = 'Recount the equipment counters of every datacenter and report the ones that had drifted.'
+
+    def handle(self, *args, **options):
+        fields = DataCenterStats.COUNTER_FIELDS
+        before = {stats.datacenter_id: stats for stats in DataCenterStats.objects.all()}
+        refreshed = DataCenterStats.refresh(*DataCenter.objects.values_list('id', flat=True))
+
+        drifted = 0
+        for stats in refreshed:
+            old = before.get(stats.datacenter_id)
+            if old is None:
+                self.stdout.write(f"Datacenter {stats.datacenter_id}: counters created")
+                continue
+            # Expiry counters legitimately move when they were computed on an earlier day
+            changes = [
+                f"{field} {getattr(old, field)} -> {getattr(stats, field)}"
+                for field in fields if getattr(old, field) != getattr(stats, field)
+            ]
+            if changes and old.computed_on == stats.computed_on:
+                drifted += 1
+                self.stdout.write(self.style.WARNING(f"Datacenter {stats.datacenter_id}: {', '.join(changes)}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt counters of {len(refreshed)} datacenter(s), {drifted} had drifted"
+        ))
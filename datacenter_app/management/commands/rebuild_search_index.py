@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from datacenter_app.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Re-create the equipment search index (and its sync triggers) and repopulate it.'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        started = time.monotonic()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt the {type(backend).__name__} search index on {connection.vendor} "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+# Optional: zstd is offered to clients that accept it when the package is installed
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Responses smaller than this are not worth compressing
+RESPONSE_COMPRESSION_MIN_BYTES = getattr(settings, 'RESPONSE_COMPRESSION_MIN_BYTES', 1024)
+RESPONSE_ZSTD_LEVEL = getattr(settings, 'RESPONSE_ZSTD_LEVEL', 3)
+# Formats that are compressed already (xlsx/zip archives, PDF streams)
+COMPRESSED_CONTENT_TYPES = (
+    'application/pdf',
+    'application/zip',
+    'application/gzip',
+    'application/vnd.openxmlformats-officedocument',
+)
+
+
+def accepted_encodings(header):
+    """Content codings from an `Accept-Encoding` header, without the ones refused with q=0."""
+    encodings = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            encodings.add(coding.strip().lower())
+    return encodings
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress API responses above RESPONSE_COMPRESSION_MIN_BYTES with the
+    best coding the client accepts: zstd (when `zstandard` is installed),
+    otherwise gzip through Django's GZipMiddleware.
+
+    Byte-range downloads and formats that are already compressed are left
+    alone; recompressing them costs CPU for nothing and would break resumes.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < RESPONSE_COMPRESSION_MIN_BYTES:
+            return response
+        if response.has_header('Content-Encoding') or response.has_header('Accept-Ranges'):
+            return response
+        if response.get('Content-Type', '').startswith(COMPRESSED_CONTENT_TYPES):
+            return response
+
+        encodings = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if zstandard is not None and 'zstd' in encodings and not getattr(response, 'is_async', False):
+            return self.compress_zstd(response)
+        if 'gzip' in encodings:
+            return super().process_response(request, response)
+        # Not GZipMiddleware's own check, which would still compress for `gzip;q=0`
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def compress_zstd(self, response):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressor = zstandard.ZstdCompressor(level=RESPONSE_ZSTD_LEVEL)
+        if response.streaming:
+            response.streaming_content = self._zstd_sequence(compressor, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = compressor.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'zstd'
+        return response
+
+    @staticmethod
+    def _zstd_sequence(compressor, chunks):
+        stream = compressor.compressobj()
+        for chunk in chunks:
+            # Flush each block so streamed rows reach the client as they are produced
+            data = stream.compress(chunk) + stream.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            if data:
+                yield data
+        yield stream.flush()
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datacenter_app', '0004_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='date_format',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+    ]
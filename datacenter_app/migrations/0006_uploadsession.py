@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('datacenter_app', '0005_importjob_date_format'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('total_size', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('received_bytes', models.PositiveBigIntegerField(default=0)),
+                ('file_path', models.CharField(max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('datacenter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='datacenter_app.datacenter')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datacenter_app', '0006_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='import_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='unchanged_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
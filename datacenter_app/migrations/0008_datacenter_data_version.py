@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datacenter_app', '0007_equipment_import_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datacenter',
+            name='data_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# The SQL is frozen here rather than taken from datacenter_app.search, so this
+# migration keeps doing the same thing whatever that module becomes later.
+INSTALL_SQL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS equipment_search USING fts5("
+        "service_tag, serial_number, license_type, equipment_type, "
+        "content='datacenter_app_equipment', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS equipment_search_ai AFTER INSERT ON datacenter_app_equipment BEGIN "
+        "INSERT INTO equipment_search(rowid, service_tag, serial_number, license_type, equipment_type) "
+        "VALUES (new.id, new.service_tag, new.serial_number, new.license_type, new.equipment_type); END",
+        "CREATE TRIGGER IF NOT EXISTS equipment_search_ad AFTER DELETE ON datacenter_app_equipment BEGIN "
+        "INSERT INTO equipment_search(equipment_search, rowid, service_tag, serial_number, license_type, equipment_type) "
+        "VALUES ('delete', old.id, old.service_tag, old.serial_number, old.license_type, old.equipment_type); END",
+        "CREATE TRIGGER IF NOT EXISTS equipment_search_au AFTER UPDATE OF "
+        "service_tag, serial_number, license_type, equipment_type ON datacenter_app_equipment BEGIN "
+        "INSERT INTO equipment_search(equipment_search, rowid, service_tag, serial_number, license_type, equipment_type) "
+        "VALUES ('delete', old.id, old.service_tag, old.serial_number, old.license_type, old.equipment_type); "
+        "INSERT INTO equipment_search(rowid, service_tag, serial_number, license_type, equipment_type) "
+        "VALUES (new.id, new.service_tag, new.serial_number, new.license_type, new.equipment_type); END",
+        # Index the rows that already exist
+        "INSERT INTO equipment_search(equipment_search) VALUES ('rebuild')",
+    ],
+    'postgresql': [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        *(
+            f'CREATE INDEX IF NOT EXISTS equipment_{field}_trgm ON datacenter_app_equipment '
+            f'USING gin ((UPPER("{field}"::text)) gin_trgm_ops)'
+            for field in ('service_tag', 'serial_number', 'license_type', 'equipment_type')
+        ),
+    ],
+}
+
+UNINSTALL_SQL = {
+    'sqlite': [
+        "DROP TRIGGER IF EXISTS equipment_search_ai",
+        "DROP TRIGGER IF EXISTS equipment_search_ad",
+        "DROP TRIGGER IF EXISTS equipment_search_au",
+        "DROP TABLE IF EXISTS equipment_search",
+    ],
+    'postgresql': [
+        f"DROP INDEX IF EXISTS equipment_{field}_trgm"
+        for field in ('service_tag', 'serial_number', 'license_type', 'equipment_type')
+    ],
+}
+
+
+def install_search_index(apps, schema_editor):
+    for statement in INSTALL_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+
+
+def uninstall_search_index(apps, schema_editor):
+    for statement in UNINSTALL_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datacenter_app', '0009_exportjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
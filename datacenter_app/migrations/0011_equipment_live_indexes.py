@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datacenter_app', '0010_equipment_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['datacenter', 'id'], name='equipment_live_dc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['license_expired_date'], name='equipment_live_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['datacenter', '-deleted_at', '-id'], name='equipment_history_idx'),
+        ),
+    ]
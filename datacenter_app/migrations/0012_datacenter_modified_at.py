@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datacenter_app', '0011_equipment_live_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datacenter',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_datacenter_stats(apps, schema_editor):
+    # Counters for the datacenters that already exist; later writes keep them up to date
+    from datacenter_app.models import DataCenterStats
+    DataCenter = apps.get_model('datacenter_app', 'DataCenter')
+    DataCenterStats.refresh(*DataCenter.objects.values_list('id', flat=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datacenter_app', '0012_datacenter_modified_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataCenterStats',
+            fields=[
+                ('datacenter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='datacenter_app.datacenter')),
+                ('live_count', models.PositiveIntegerField(default=0)),
+                ('deleted_count', models.PositiveIntegerField(default=0)),
+                ('expiring_count', models.PositiveIntegerField(default=0)),
+                ('expired_count', models.PositiveIntegerField(default=0)),
+                ('computed_on', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_datacenter_stats, migrations.RunPython.noop),
+    ]
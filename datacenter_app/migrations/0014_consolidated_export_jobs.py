@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datacenter_app', '0013_datacenterstats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='datacenter',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='datacenter_app.datacenter'),
+        ),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='file_format',
+            field=models.CharField(choices=[('xlsx', 'Excel'), ('pdf', 'PDF'), ('pdf.zip', 'Zip of PDFs')], max_length=10),
+        ),
+    ]
@@ -1,12 +1,79 @@
+import datetime
+import hashlib
+import uuid
+
+from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.functions import Greatest
+from django.utils import timezone
 
 class DataCenter(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
+    # Bumped on every change to this datacenter's equipment; cached exports are keyed by it
+    data_version = models.PositiveBigIntegerField(default=0, editable=False)
+    # Last change to the datacenter or its equipment; Last-Modified of the list endpoints
+    modified_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def bump_data_version(cls, *datacenter_ids):
+        cls.objects.filter(pk__in=datacenter_ids).update(
+            data_version=models.F('data_version') + 1, modified_at=timezone.now()
+        )
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            # A new datacenter has no equipment, so its counters start out exact
+            DataCenterStats.objects.get_or_create(datacenter=self, defaults={'computed_on': timezone.localdate()})
 
     def __str__(self):
         return self.name
 
+class EquipmentQuerySet(models.QuerySet):
+    """
+    Bumps the data version of the datacenters whose equipment a bulk update
+    or delete touches, and recounts their DataCenterStats.
+    """
+
+    def _datacenter_ids(self):
+        return set(self.order_by().values_list('datacenter_id', flat=True).distinct())
+
+    def update(self, **kwargs):
+        datacenter_ids = self._datacenter_ids()
+        # Moved rows also change the datacenter they land in (the new value may be an expression)
+        moved_pks = None
+        if 'datacenter' in kwargs or 'datacenter_id' in kwargs:
+            moved_pks = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        if moved_pks:
+            datacenter_ids |= self.model.objects.filter(pk__in=moved_pks)._datacenter_ids()
+        if rows:
+            DataCenter.bump_data_version(*datacenter_ids)
+            DataCenterStats.refresh(*datacenter_ids)
+        return rows
+
+    update.alters_data = True
+
+    def delete(self):
+        datacenter_ids = self._datacenter_ids()
+        result = super().delete()
+        if result[0]:
+            DataCenter.bump_data_version(*datacenter_ids)
+            DataCenterStats.refresh(*datacenter_ids)
+        return result
+
+    delete.alters_data = True
+
+
+class LiveEquipmentManager(models.Manager.from_queryset(EquipmentQuerySet)):
+    """Equipment that has not been soft-deleted; matches the partial indexes on live rows."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Equipment(models.Model):
     equipment_type = models.CharField(max_length=50)  # CharField without choices
     service_tag = models.CharField(max_length=100, unique=True)
@@ -19,6 +86,256 @@ class Equipment(models.Model):
     
     # ForeignKey to DataCenter (many equipments can belong to one datacenter)
     datacenter = models.ForeignKey(DataCenter, related_name='equipments', on_delete=models.CASCADE)
+    # Hash of the imported fields, lets re-imports skip rows that did not change
+    import_hash = models.CharField(max_length=32, blank=True, editable=False)
+
+    # Fields covered by import_hash, in hashing order
+    CONTENT_HASH_FIELDS = ('equipment_type', 'service_tag', 'license_type', 'serial_number', 'license_expired_date')
+
+    # `objects` stays the default manager so imports, admin and history still see deleted rows
+    objects = EquipmentQuerySet.as_manager()
+    live = LiveEquipmentManager()
+
+    class Meta:
+        indexes = [
+            # Listings, lookups and exports of a datacenter's live equipment (ordered by id)
+            models.Index(fields=['datacenter', 'id'], condition=models.Q(is_deleted=False),
+                         name='equipment_live_dc_idx'),
+            # License expiry notifications
+            models.Index(fields=['license_expired_date'], condition=models.Q(is_deleted=False),
+                         name='equipment_live_expiry_idx'),
+            # Deleted-equipment history, most recently deleted first
+            models.Index(fields=['datacenter', '-deleted_at', '-id'], condition=models.Q(is_deleted=True),
+                         name='equipment_history_idx'),
+        ]
+
+    @classmethod
+    def content_hash(cls, values, datacenter_id):
+        payload = '\x1f'.join(str(values[field]) for field in cls.CONTENT_HASH_FIELDS)
+        return hashlib.blake2b(f'{payload}\x1f{datacenter_id}'.encode(), digest_size=16).hexdigest()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a save that moves or (un)deletes the equipment can tell where it was counted
+        instance._loaded_datacenter_id = instance.__dict__.get('datacenter_id')
+        instance._loaded_is_deleted = instance.__dict__.get('is_deleted')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Keep the hash in step with every write so edits made outside an import invalidate it
+        self.import_hash = self.content_hash(
+            {field: getattr(self, field) for field in self.CONTENT_HASH_FIELDS}, self.datacenter_id
+        )
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'import_hash' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'import_hash']
+        created = self._state.adding and update_fields is None
+        loaded_datacenter_id = getattr(self, '_loaded_datacenter_id', None)
+        loaded_is_deleted = getattr(self, '_loaded_is_deleted', None)
+        super().save(*args, **kwargs)
+        # Every write path (API, admin, shell) invalidates the caches keyed by data_version
+        DataCenter.bump_data_version(*{self.datacenter_id, loaded_datacenter_id} - {None})
+
+        # Follow the row between the live/deleted counters; expiry counters wait for the nightly refresh
+        if created:
+            DataCenterStats.count_change(self.datacenter_id, self.is_deleted, 1)
+        elif None not in (loaded_datacenter_id, loaded_is_deleted) and \
+                (loaded_datacenter_id, loaded_is_deleted) != (self.datacenter_id, self.is_deleted):
+            DataCenterStats.count_change(loaded_datacenter_id, loaded_is_deleted, -1)
+            DataCenterStats.count_change(self.datacenter_id, self.is_deleted, 1)
+        self._loaded_datacenter_id = self.datacenter_id
+        self._loaded_is_deleted = self.is_deleted
+
+    def delete(self, *args, **kwargs):
+        datacenter_id, is_deleted = self.datacenter_id, self.is_deleted
+        result = super().delete(*args, **kwargs)
+        DataCenter.bump_data_version(datacenter_id)
+        DataCenterStats.count_change(datacenter_id, is_deleted, -1)
+        return result
+
+    def __str__(self):
+        return f'{self.equipment_type} - {self.service_tag}'
+
+class DataCenterStats(models.Model):
+    """
+    Equipment counters shown with each datacenter, so the datacenter list
+    does not count equipment per request. Single-row writes move the live
+    and deleted counters by one; imports and bulk updates recount. Expiry
+    counters move with the date, so the nightly refresh_datacenter_stats
+    task recounts everything once the day they are relative to
+    (`computed_on`) has passed.
+    """
+    EXPIRING_WITHIN_DAYS = 30
+    COUNTER_FIELDS = ('live_count', 'deleted_count', 'expiring_count', 'expired_count')
+
+    datacenter = models.OneToOneField(DataCenter, primary_key=True, related_name='stats', on_delete=models.CASCADE)
+    live_count = models.PositiveIntegerField(default=0)
+    deleted_count = models.PositiveIntegerField(default=0)
+    # Live equipment whose license expires within EXPIRING_WITHIN_DAYS days / has already expired
+    expiring_count = models.PositiveIntegerField(default=0)
+    expired_count = models.PositiveIntegerField(default=0)
+    computed_on = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def refresh(cls, *datacenter_ids):
+        """Recount the equipment of the given datacenters with one grouped query and upsert their rows."""
+        if not datacenter_ids:
+            return []
+        today = timezone.localdate()
+        soon = today + datetime.timedelta(days=cls.EXPIRING_WITHIN_DAYS)
+        live = models.Q(is_deleted=False)
+        counts = {
+            row['datacenter_id']: row
+            for row in Equipment.objects.filter(datacenter_id__in=datacenter_ids).values('datacenter_id').annotate(
+                live_count=models.Count('id', filter=live),
+                deleted_count=models.Count('id', filter=models.Q(is_deleted=True)),
+                expiring_count=models.Count('id', filter=live & models.Q(license_expired_date__range=(today, soon))),
+                expired_count=models.Count('id', filter=live & models.Q(license_expired_date__lt=today)),
+            )
+        }
+        existing = DataCenter.objects.filter(pk__in=datacenter_ids).values_list('id', flat=True)
+        stats = [
+            cls(datacenter_id=datacenter_id, computed_on=today,
+                **{field: counts.get(datacenter_id, {}).get(field, 0) for field in cls.COUNTER_FIELDS})
+            for datacenter_id in existing
+        ]
+        return cls.objects.bulk_create(
+            stats, update_conflicts=True, unique_fields=['datacenter'],
+            update_fields=[*cls.COUNTER_FIELDS, 'computed_on', 'updated_at'],
+        )
+
+    @classmethod
+    def count_change(cls, datacenter_id, is_deleted, delta):
+        """Move the live or deleted counter of one datacenter by `delta` in place, without recounting."""
+        field = 'deleted_count' if is_deleted else 'live_count'
+        cls.objects.filter(datacenter_id=datacenter_id).update(
+            **{field: Greatest(models.F(field) + delta, 0)}, updated_at=timezone.now()
+        )
+
+    @classmethod
+    def refresh_stale(cls, *datacenter_ids):
+        """Recount datacenters (all, or the given ones) without counters or with counters from an earlier day."""
+        stale = DataCenter.objects.exclude(stats__computed_on=timezone.localdate())
+        if datacenter_ids:
+            stale = stale.filter(pk__in=datacenter_ids)
+        return cls.refresh(*stale.values_list('id', flat=True))
+
+    def __str__(self):
+        return f'Stats of datacenter {self.datacenter_id}'
+
+
+class ImportJob(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    # The job id doubles as the Celery task id
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    datacenter = models.ForeignKey(DataCenter, related_name='import_jobs', on_delete=models.CASCADE)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    file_name = models.CharField(max_length=255)
+    # Staged upload on local disk, removed once the job has run
+    file_path = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # Expiry date format label (e.g. DD/MM/YYYY): the requested one, or the one inferred by the import
+    date_format = models.CharField(max_length=20, blank=True)
+    rows_processed = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    unchanged_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    error_report_path = models.CharField(max_length=500, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def rows_per_second(self):
+        if not self.started_at:
+            return None
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.rows_processed / elapsed, 1) if elapsed > 0 else None
+
+    def __str__(self):
+        return f'Import {self.id} ({self.status})'
+
+
+class ExportJob(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    FORMAT_XLSX = 'xlsx'
+    FORMAT_PDF = 'pdf'
+    FORMAT_PDF_BUNDLE = 'pdf.zip'
+    FORMAT_CHOICES = [
+        (FORMAT_XLSX, 'Excel'),
+        (FORMAT_PDF, 'PDF'),
+        (FORMAT_PDF_BUNDLE, 'Zip of PDFs'),
+    ]
+
+    # The job id doubles as the Celery task id
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # None for a consolidated export of every datacenter
+    datacenter = models.ForeignKey(DataCenter, related_name='export_jobs', null=True, blank=True,
+                                   on_delete=models.CASCADE)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    # Same filters as the synchronous export views
+    service_tag = models.CharField(max_length=100, blank=True)
+    license_type = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # Rendered artifact on local disk, kept until the job expires
+    file_path = models.CharField(max_length=500, blank=True)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def file_name(self):
+        if self.datacenter_id is None:
+            return f'equipments_all_datacenters.{self.file_format}'
+        return f'equipments_{self.datacenter_id}.{self.file_format}'
+
+    def __str__(self):
+        return f'Export {self.id} ({self.status})'
+
+
+class UploadSession(models.Model):
+    # Chunked upload of an import file, assembled on disk before it is imported
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    datacenter = models.ForeignKey(DataCenter, related_name='upload_sessions', on_delete=models.CASCADE)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    # Expected size in bytes, if the client announced it
+    total_size = models.PositiveBigIntegerField(null=True, blank=True)
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    file_path = models.CharField(max_length=500)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_complete(self):
+        return self.total_size is not None and self.received_bytes == self.total_size
 
     def __str__(self):
-        return f'{self.equipment_type} - {self.service_tag}'
\ No newline at end of file
+        return f'Upload {self.id} ({self.received_bytes} bytes)'
@@ -0,0 +1,164 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in cursor pagination that seeks on (ordering field, id) instead of
+    using OFFSET, so every page costs the same however deep the client is.
+
+    Pagination kicks in when the request carries `cursor` or `page_size`;
+    otherwise the view keeps returning the full, unpaginated list. The
+    cursor is opaque (base64 JSON) and bound to the ordering it was issued
+    for. NULLs of a nullable ordering field come last in either direction.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    page_size = getattr(settings, 'EQUIPMENT_PAGE_SIZE', 100)
+    max_page_size = getattr(settings, 'EQUIPMENT_MAX_PAGE_SIZE', 1000)
+    # Ordering fields besides `id`, which is always the tie-breaker
+    ordering_fields = ('license_expired_date', 'service_tag')
+    default_ordering = 'id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if ordering.lstrip('-') in ('id', *self.ordering_fields):
+            return ordering
+        return self.default_ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'o': self.ordering, 'p': position, 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        """
+        Return the `[value, id]` position and direction of the request's
+        cursor, with both values converted to their model field types.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            position, reverse = payload['p'], bool(payload['r'])
+            if payload['o'] != self.ordering or not isinstance(position, list) or len(position) != 2:
+                raise ValueError
+            value, pk = position
+            if isinstance(value, (list, dict)) or pk is None:
+                raise ValueError
+            pk = model._meta.pk.to_python(pk)
+            if value is not None:
+                value = model._meta.get_field(self.field).to_python(value)
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return [value, pk], reverse
+
+    def _position(self, obj):
+        # Rows are model instances or `values()` dicts
+        if isinstance(obj, dict):
+            value, pk = obj[self.field], obj['id']
+        else:
+            value, pk = getattr(obj, self.field), obj.pk
+        return [value.isoformat() if hasattr(value, 'isoformat') else value, pk]
+
+    def seek_columns(self, request):
+        """Columns a `values()` queryset must include for its rows to be paginated."""
+        return 'id', self.get_ordering(request).lstrip('-')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.ordering = self.get_ordering(request)
+        self.field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        # Walking backwards flips the sort; the page is flipped back afterwards
+        scan_descending = descending != reverse
+        nullable = self.field != 'id' and queryset.model._meta.get_field(self.field).null
+        if position is not None:
+            value, pk = position
+            op = 'lt' if scan_descending else 'gt'
+            if self.field == 'id':
+                queryset = queryset.filter(**{f'id__{op}': pk})
+            elif value is None:
+                # NULLs come last: past one only NULLs with a further id remain, or, walking backwards, every value too
+                seek = Q(**{f'{self.field}__isnull': True, f'id__{op}': pk})
+                if reverse:
+                    seek |= Q(**{f'{self.field}__isnull': False})
+                queryset = queryset.filter(seek)
+            else:
+                seek = Q(**{f'{self.field}__{op}': value}) | Q(**{self.field: value, f'id__{op}': pk})
+                if nullable and not reverse:
+                    seek |= Q(**{f'{self.field}__isnull': True})
+                queryset = queryset.filter(seek)
+        order = ('-' if scan_descending else '')
+        if self.field == 'id':
+            order_by = [f'{order}id']
+        elif nullable:
+            nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            column = F(self.field).desc(**nulls) if scan_descending else F(self.field).asc(**nulls)
+            order_by = [column, f'{order}id']
+        else:
+            order_by = [f'{order}{self.field}', f'{order}id']
+
+        # One extra row tells whether there is a page beyond this one
+        rows = list(queryset.order_by(*order_by)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self._position(self.page[-1]), False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.page:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self._position(self.page[0]), True))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class HistoryPagination(KeysetPagination):
+    """Deleted-equipment history: most recently deleted first unless asked otherwise."""
+    ordering_fields = ('deleted_at', *KeysetPagination.ordering_fields)
+    default_ordering = '-deleted_at'
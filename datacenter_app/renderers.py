@@ -0,0 +1,71 @@
+from rest_framework.utils import encoders
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# Optional accelerators: without them the JSON renderer falls back to DRF's own
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    # Types the fast encoders do not know (Decimal, lazy strings, ...) get DRF's conversion
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer encoding with orjson, which
+    is several times faster on large equipment lists. Output is the same
+    compact JSON; indented output (browsable API, `; indent=`) and installs
+    without orjson go through the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Dates and times go through DRF's encoder too, which writes UTC as 'Z' where orjson writes '+00:00'
+        ret = orjson.dumps(data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+        # Same strict-javascript-subset escaping as JSONRenderer
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """
+    `?format=columnar` (or `Accept: application/vnd.datacenter.columnar+json`)
+    on the equipment list views, which then return
+    EquipmentValuesSerializer.to_columns() instead of a list of objects.
+    """
+    media_type = 'application/vnd.datacenter.columnar+json'
+    format = 'columnar'
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack for clients sending `Accept: application/msgpack`; smaller
+    and cheaper to decode than JSON. Requires the optional `msgpack` package
+    (the renderer is only enabled in settings when it is installed).
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True)
@@ -0,0 +1,181 @@
+from django.db import connection, connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Equipment
+
+# Equipment columns covered by the search index
+SEARCH_FIELDS = ('service_tag', 'serial_number', 'license_type', 'equipment_type')
+# Trigram indexes can only answer terms of at least this many characters
+MIN_TRIGRAM_LENGTH = 3
+# Global search: default and largest number of results
+SEARCH_RESULT_LIMIT = 50
+SEARCH_MAX_RESULT_LIMIT = 200
+# Migration that first installs the index; nothing is maintained before it is applied
+SEARCH_INDEX_MIGRATION = ('datacenter_app', '0010_equipment_search_index')
+
+
+class SearchBackend:
+    """
+    Substring search over SEARCH_FIELDS. This base class is the portable
+    fallback: plain `icontains` lookups, i.e. LIKE '%x%' table scans.
+    Backends override it to answer the same queries from an index.
+    """
+    vendor = None
+
+    def install(self, schema_editor):
+        """Create the index structures (idempotent) and index the existing rows."""
+
+    def uninstall(self, schema_editor):
+        """Drop the index structures."""
+
+    def ensure_installed(self, schema_editor):
+        """Re-create whatever is missing; run after every migrate."""
+        self.install(schema_editor)
+
+    def rebuild(self):
+        """Re-create anything missing and repopulate the index from the equipment table."""
+        with connection.schema_editor() as schema_editor:
+            self.install(schema_editor)
+
+    def filter(self, queryset, **terms):
+        """Equivalent of `queryset.filter(<field>__icontains=<term>, ...)` for the non-empty terms."""
+        for field, term in terms.items():
+            if term:
+                queryset = queryset.filter(**{f'{field}__icontains': term})
+        return queryset
+
+    def search(self, queryset, query):
+        """Rows of `queryset` where any of SEARCH_FIELDS contains `query`."""
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition)
+
+
+class SQLiteTrigramBackend(SearchBackend):
+    """
+    FTS5 table with the trigram tokenizer, using the equipment table as
+    external content so values are not stored twice. Triggers keep it in sync
+    with every write, including bulk_create/bulk_update from imports.
+
+    A migration that rebuilds the equipment table on SQLite drops the
+    triggers; they are put back after every migrate (see ensure_installed),
+    and `manage.py rebuild_search_index` re-creates them on demand.
+    """
+    vendor = 'sqlite'
+    table = 'equipment_search'
+
+    def _columns(self, prefix=''):
+        return ', '.join(f'{prefix}{field}' for field in SEARCH_FIELDS)
+
+    def _ddl(self):
+        content = Equipment._meta.db_table
+        columns = self._columns()
+        new_values = self._columns('new.')
+        old_values = self._columns('old.')
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+            f"{columns}, content='{content}', content_rowid='id', tokenize='trigram')",
+            f"CREATE TRIGGER IF NOT EXISTS {self.table}_ai AFTER INSERT ON {content} BEGIN "
+            f"INSERT INTO {self.table}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.table}_ad AFTER DELETE ON {content} BEGIN "
+            f"INSERT INTO {self.table}({self.table}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.table}_au AFTER UPDATE OF {columns} ON {content} BEGIN "
+            f"INSERT INTO {self.table}({self.table}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {self.table}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+        ]
+
+    def install(self, schema_editor):
+        for statement in self._ddl():
+            schema_editor.execute(statement)
+        # Index whatever the table already holds
+        schema_editor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+
+    def uninstall(self, schema_editor):
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {self.table}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def ensure_installed(self, schema_editor):
+        names = {self.table, *(f'{self.table}_{suffix}' for suffix in ('ai', 'ad', 'au'))}
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"SELECT name FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(names))})",
+                           list(names))
+            present = {name for name, in cursor.fetchall()}
+        # Rows written while a trigger was missing are unindexed, so anything missing means a full rebuild
+        if present != names:
+            self.install(schema_editor)
+
+    def _phrase(self, term):
+        # A quoted FTS5 string matches the term as a substring, wildcards included
+        return '"' + term.replace('"', '""') + '"'
+
+    def _match(self, queryset, expression):
+        sql = f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s"
+        return queryset.filter(id__in=RawSQL(sql, [expression]))
+
+    def filter(self, queryset, **terms):
+        indexed = {field: term for field, term in terms.items() if term and len(term) >= MIN_TRIGRAM_LENGTH}
+        short = {field: term for field, term in terms.items() if term and field not in indexed}
+        queryset = super().filter(queryset, **short)
+        if indexed:
+            # Column-filtered phrases rather than LIKE: FTS5 cannot use the index for LIKE ... ESCAPE
+            expression = ' AND '.join(f'{field}:{self._phrase(term)}' for field, term in indexed.items())
+            queryset = self._match(queryset, expression)
+        return queryset
+
+    def search(self, queryset, query):
+        if len(query) < MIN_TRIGRAM_LENGTH:
+            return super().search(queryset, query)
+        return self._match(queryset, self._phrase(query))
+
+
+class PostgresTrigramBackend(SearchBackend):
+    """
+    pg_trgm GIN indexes on the same expression Django's `icontains` compiles
+    to (UPPER(col::text)), so the regular lookups are index-assisted and the
+    index is maintained by PostgreSQL itself.
+    """
+    vendor = 'postgresql'
+
+    def _index_name(self, field):
+        return f'equipment_{field}_trgm'
+
+    def install(self, schema_editor):
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        table = Equipment._meta.db_table
+        for field in SEARCH_FIELDS:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self._index_name(field)} ON {table} '
+                f'USING gin ((UPPER("{field}"::text)) gin_trgm_ops)'
+            )
+
+    def uninstall(self, schema_editor):
+        for field in SEARCH_FIELDS:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {self._index_name(field)}")
+
+    def rebuild(self):
+        super().rebuild()
+        with connection.cursor() as cursor:
+            for field in SEARCH_FIELDS:
+                cursor.execute(f"REINDEX INDEX {self._index_name(field)}")
+
+
+SEARCH_BACKENDS = {backend.vendor: backend for backend in (SQLiteTrigramBackend, PostgresTrigramBackend)}
+
+
+def get_search_backend(vendor=None):
+    """Search backend for the database in use, or the plain `icontains` fallback."""
+    return SEARCH_BACKENDS.get(vendor or connection.vendor, SearchBackend)()
+
+
+def install_missing_search_index(sender, using, **kwargs):
+    """post_migrate handler putting back any part of the search index a migration dropped."""
+    db = connections[using]
+    if not MigrationRecorder(db).migration_qs.filter(app=SEARCH_INDEX_MIGRATION[0],
+                                                       name=SEARCH_INDEX_MIGRATION[1]).exists():
+        return
+    with db.schema_editor() as schema_editor:
+        get_search_backend(db.vendor).ensure_installed(schema_editor)
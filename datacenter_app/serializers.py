@@ -1,10 +1,23 @@
 from rest_framework import serializers
 from .models import *
 
+class DataCenterStatsSerializer(serializers.ModelSerializer):
+    live = serializers.IntegerField(source='live_count')
+    deleted = serializers.IntegerField(source='deleted_count')
+    expiring_soon = serializers.IntegerField(source='expiring_count')
+    expired = serializers.IntegerField(source='expired_count')
+
+    class Meta:
+        model = DataCenterStats
+        fields = ['live', 'deleted', 'expiring_soon', 'expired', 'computed_on']
+
 class DataCenterSerializer(serializers.ModelSerializer):
+    # Maintained counters (DataCenterStats), kept current by the writes and the nightly refresh
+    equipment_stats = DataCenterStatsSerializer(source='stats', read_only=True)
+
     class Meta:
         model = DataCenter
-        fields = ['id', 'name', 'description']
+        fields = ['id', 'name', 'description', 'equipment_stats']
 
 
 class EquipmentSerializer(serializers.ModelSerializer):
@@ -15,6 +28,88 @@ class EquipmentSerializer(serializers.ModelSerializer):
         model = Equipment
         fields = ['id', 'equipment_type', 'service_tag', 'license_type', 'serial_number', 'license_expired_date', 'datacenter']
 
+class EquipmentSearchSerializer(EquipmentSerializer):
+    datacenter_id = serializers.IntegerField(read_only=True)
+
+    class Meta(EquipmentSerializer.Meta):
+        fields = EquipmentSerializer.Meta.fields + ['datacenter_id']
+
+class EquipmentValuesSerializer:
+    """
+    Read-only fast path with the output of `EquipmentSerializer(many=True)`
+    for list endpoints: fetches only the requested columns with `values()`
+    and builds plain dicts, with no field objects or model instances per
+    row. The datacenter name comes from `datacenter` when every row belongs
+    to it, otherwise from a join.
+
+    `fields` is the `?fields=` parameter: a comma-separated subset of
+    EquipmentSerializer's fields (all of them when empty).
+    """
+    all_fields = EquipmentSerializer.Meta.fields
+    # Dictionary-encoded in the columnar form
+    DICTIONARY_FIELDS = ('equipment_type', 'license_type', 'datacenter')
+
+    def __init__(self, fields=None, datacenter=None):
+        requested = [field.strip() for field in (fields or '').split(',') if field.strip()]
+        unknown = [field for field in requested if field not in self.all_fields]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(self.all_fields)}")
+        # Output keeps EquipmentSerializer's field order whatever order was asked for
+        self.fields = [field for field in self.all_fields if field in requested] if requested else list(self.all_fields)
+        self.datacenter = datacenter
+        self.columns = [field for field in self.fields if field != 'datacenter']
+
+    def values(self, queryset, *extra):
+        """`queryset.values()` over the needed columns plus `extra` ones (e.g. what pagination seeks on)."""
+        columns = self.columns + [column for column in extra if column not in self.columns]
+        if 'datacenter' in self.fields and self.datacenter is None:
+            columns.append('datacenter__name')
+        return queryset.values(*columns)
+
+    def to_representation(self, rows):
+        columns = self.columns
+        has_date = 'license_expired_date' in columns
+        has_datacenter = 'datacenter' in self.fields
+        name = str(self.datacenter) if self.datacenter is not None else None
+        data = []
+        for row in rows:
+            item = {column: row[column] for column in columns}
+            if has_date:
+                item['license_expired_date'] = item['license_expired_date'].isoformat()
+            if has_datacenter:
+                item['datacenter'] = name if name is not None else row['datacenter__name']
+            data.append(item)
+        return data
+
+    def to_columns(self, rows):
+        """
+        Columnar form of the same rows: one array per field instead of one
+        object per row. Low-cardinality fields (DICTIONARY_FIELDS) hold
+        indexes into `dictionaries[field]` rather than repeating the strings.
+        """
+        rows = list(rows)
+        data = {}
+        dictionaries = {}
+        for field in self.fields:
+            if field == 'datacenter':
+                column = self.datacenter_column(rows)
+            else:
+                column = [row[field] for row in rows]
+            if field == 'license_expired_date':
+                column = [value.isoformat() for value in column]
+            if field in self.DICTIONARY_FIELDS:
+                codes = {}
+                column = [codes.setdefault(value, len(codes)) for value in column]
+                dictionaries[field] = list(codes)
+            data[field] = column
+        return {'columns': self.fields, 'count': len(rows), 'dictionaries': dictionaries, 'data': data}
+
+    def datacenter_column(self, rows):
+        if self.datacenter is not None:
+            return [str(self.datacenter)] * len(rows)
+        return [row['datacenter__name'] for row in rows]
+
+
 class AddEquipmentSerializer(serializers.ModelSerializer):
     # We exclude the 'datacenter' field from being input, since it's set in the view
     class Meta:
@@ -32,4 +127,23 @@ class AddEquipmentSerializer(serializers.ModelSerializer):
 class ModifyEquipmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Equipment
-        fields = ['equipment_type', 'service_tag', 'license_type', 'serial_number', 'license_expired_date']
\ No newline at end of file
+        fields = ['equipment_type', 'service_tag', 'license_type', 'serial_number', 'license_expired_date']
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source='id', read_only=True)
+    rows_per_second = serializers.ReadOnlyField()
+
+    class Meta:
+        model = ImportJob
+        fields = ['job_id', 'status', 'file_name', 'rows_processed', 'created_count', 'updated_count',
+                  'unchanged_count', 'failed_count', 'rows_per_second', 'date_format', 'error',
+                  'created_at', 'started_at', 'finished_at']
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source='id', read_only=True)
+    file_name = serializers.ReadOnlyField()
+
+    class Meta:
+        model = ExportJob
+        fields = ['job_id', 'status', 'file_format', 'service_tag', 'license_type', 'file_name', 'file_size',
+                  'error', 'created_at', 'started_at', 'finished_at']
\ No newline at end of file
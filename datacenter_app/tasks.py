@@ -28,7 +28,7 @@ def send_license_expiry_notifications():
     logger.info(f"About to send license expiry notifications to {recipients}")
     for days, subject, intro in notifications:
         target_date = today + timezone.timedelta(days=days)
-        equipments = Equipment.objects.filter(license_expired_date=target_date)
+        equipments = Equipment.live.filter(license_expired_date=target_date)
         if equipments.exists():
             # Professional, well-typed email content
             message = f"""
@@ -81,3 +81,150 @@ def send_mailpit_direct_smtp():
         logger.info("Direct SMTP test email sent from Celery task!")
     except Exception as e:
         logger.error(f"Direct SMTP test from Celery failed: {e}")
+
+@shared_task(bind=True)
+def run_equipment_import(self, job_id):
+    import os
+    from .importers import AmbiguousDateFormatError, MissingColumnsError, import_equipment_file, resolve_date_format
+    from .models import ImportJob
+
+    job = ImportJob.objects.select_related('datacenter').get(pk=job_id)
+    job.status = ImportJob.STATUS_RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=['status', 'started_at'])
+
+    # The import runs in a single transaction, so progress is published
+    # through the Celery result backend rather than the ImportJob row.
+    def report_progress(upserter):
+        if not self.request.id:
+            return
+        try:
+            self.update_state(state='PROGRESS', meta={
+                'rows_processed': upserter.processed_count,
+                'created_count': upserter.created_count,
+                'updated_count': upserter.updated_count,
+                'unchanged_count': upserter.unchanged_count,
+                'failed_count': len(upserter.errors),
+            })
+        except Exception as e:
+            # Progress is best-effort; never fail the import over it
+            logger.warning(f"Could not publish progress for import job {job_id}: {e}")
+
+    # Rejected rows are streamed to the report as they occur instead of being collected in memory
+    error_report_path = f"{os.path.splitext(job.file_path)[0]}-errors.txt"
+    try:
+        file_format = os.path.splitext(job.file_path)[1].lstrip('.')
+        with open(job.file_path, 'rb') as source:
+            result = import_equipment_file(job.datacenter, source, file_format, progress=report_progress,
+                                           date_format=resolve_date_format(job.date_format),
+                                           error_report_path=error_report_path)
+    except MissingColumnsError as e:
+        job.status = ImportJob.STATUS_FAILED
+        job.error = f"{e}. Available columns: {', '.join(e.available_columns)}"
+    except AmbiguousDateFormatError as e:
+        job.status = ImportJob.STATUS_FAILED
+        job.error = f"{e}. Retry with an explicit date_format."
+    except Exception as e:
+        logger.exception(f"Import job {job_id} failed")
+        job.status = ImportJob.STATUS_FAILED
+        job.error = str(e)
+    else:
+        job.status = ImportJob.STATUS_COMPLETED
+        job.rows_processed = result.processed_count
+        job.created_count = result.created_count
+        job.updated_count = result.updated_count
+        job.unchanged_count = result.unchanged_count
+        job.failed_count = len(result.errors)
+        job.date_format = result.date_format
+        if result.errors:
+            job.error_report_path = error_report_path
+    finally:
+        if os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        if not job.error_report_path and os.path.exists(error_report_path):
+            os.remove(error_report_path)
+
+    job.finished_at = timezone.now()
+    job.save()
+    logger.info(f"Import job {job_id} {job.status}: {job.created_count} created, {job.updated_count} updated, {job.unchanged_count} unchanged, {job.failed_count} failed")
+    return job.status
+
+
+@shared_task
+def purge_stale_upload_sessions():
+    import os
+    from .models import UploadSession
+
+    cutoff = timezone.now() - timedelta(hours=settings.UPLOAD_SESSION_MAX_AGE_HOURS)
+    stale_sessions = UploadSession.objects.filter(updated_at__lt=cutoff)
+    for session in stale_sessions:
+        if os.path.exists(session.file_path):
+            os.remove(session.file_path)
+    deleted, _ = stale_sessions.delete()
+    logger.info(f"Purged {deleted} stale upload session(s)")
+    return deleted
+
+
+@shared_task
+def run_equipment_export(job_id):
+    import os
+    import shutil
+    from .consolidated import open_consolidated_export
+    from .models import ExportJob
+    from .utils import open_export
+
+    job = ExportJob.objects.select_related('datacenter').get(pk=job_id)
+    job.status = ExportJob.STATUS_RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=['status', 'started_at'])
+
+    os.makedirs(settings.EXPORT_JOB_DIR, exist_ok=True)
+    job.file_path = os.path.join(settings.EXPORT_JOB_DIR, f"{job.id}.{job.file_format}")
+    try:
+        if job.datacenter is None:
+            artifact = open_consolidated_export(job.file_format)
+        else:
+            artifact = open_export(job.datacenter, job.file_format, job.service_tag or None, job.license_type or None)
+        # A copy of the (possibly cached) artifact, so cache eviction cannot pull it from under a download
+        with artifact, open(job.file_path, 'wb') as target:
+            shutil.copyfileobj(artifact, target)
+    except Exception as e:
+        logger.exception(f"Export job {job_id} failed")
+        job.status = ExportJob.STATUS_FAILED
+        job.error = str(e)
+        if os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        job.file_path = ''
+    else:
+        job.status = ExportJob.STATUS_COMPLETED
+        job.file_size = os.path.getsize(job.file_path)
+
+    job.finished_at = timezone.now()
+    job.save()
+    logger.info(f"Export job {job_id} {job.status}: {job.file_format}, {job.file_size or 0} bytes")
+    return job.status
+
+
+@shared_task
+def purge_expired_export_jobs():
+    import os
+    from .models import ExportJob
+
+    cutoff = timezone.now() - timedelta(hours=settings.EXPORT_JOB_MAX_AGE_HOURS)
+    expired_jobs = ExportJob.objects.filter(created_at__lt=cutoff)
+    for job in expired_jobs:
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+    deleted, _ = expired_jobs.delete()
+    logger.info(f"Purged {deleted} expired export job(s)")
+    return deleted
+
+
+@shared_task
+def refresh_datacenter_stats():
+    from .models import DataCenterStats
+
+    # Expiring/expired counters move with the date even when no equipment changed
+    refreshed = DataCenterStats.refresh_stale()
+    logger.info(f"Refreshed equipment counters of {len(refreshed)} datacenter(s)")
+    return len(refreshed)
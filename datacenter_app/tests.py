@@ -1,3 +1,1429 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import zipfile
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import billiard
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.models import F
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from openpyxl import load_workbook
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .autocomplete import AUTOCOMPLETE_LIMIT, AutocompleteCache, PrefixIndex, autocomplete_cache
+from .consolidated import run_parallel
+from .export_cache import ExportCache, export_cache_key
+from .exports import iter_sheet_xml, stream_workbook, stream_xlsx
+from .importers import (
+    AmbiguousDateFormatError, ImportErrors, InvalidRow, import_equipment_rows, infer_date_format, read_ndjson_rows,
+)
+from .middleware import RESPONSE_COMPRESSION_MIN_BYTES, CompressionMiddleware, accepted_encodings, zstandard
+from .models import DataCenter, DataCenterStats, Equipment, ExportJob, ImportJob, UploadSession
+from .serializers import EquipmentSerializer
+from .renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from .search import MIN_TRIGRAM_LENGTH, SearchBackend, SQLiteTrigramBackend, install_missing_search_index
+from .tasks import refresh_datacenter_stats, run_equipment_export, run_equipment_import
+from .utils import PDF_MIN_FONT_SIZE, EquipmentPDFRenderer, _fit_text, generate_equipment_pdf, open_export
+
+HEADER = ('Equipment Type', 'Service Tag', 'License Type', 'Serial Number', 'License Expiry Date')
+
+
+def equipment_row(n, expiry='2030-01-31', equipment_type='Server'):
+    return (equipment_type, f'TAG{n}', 'Basic', f'SN{n}', expiry)
+
+
+class EquipmentImportTests(TestCase):
+    def setUp(self):
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        self.other_datacenter = DataCenter.objects.create(name='DC2', description='Secondary')
+
+    def test_upsert_creates_updates_and_skips_unchanged_rows(self):
+        result = import_equipment_rows(self.datacenter, [HEADER, equipment_row(1), equipment_row(2)])
+        self.assertEqual((result.created_count, result.updated_count, result.unchanged_count), (2, 0, 0))
+
+        rows = [HEADER, equipment_row(1), equipment_row(2, equipment_type='Switch'), equipment_row(3)]
+        result = import_equipment_rows(self.datacenter, rows, batch_size=2)
+        self.assertEqual((result.created_count, result.updated_count, result.unchanged_count), (1, 1, 1))
+        self.assertEqual(len(result.errors), 0)
+        self.assertEqual(Equipment.objects.get(serial_number='SN2').equipment_type, 'Switch')
+        self.assertEqual(Equipment.objects.count(), 3)
+
+    def test_upsert_moves_equipment_between_datacenters(self):
+        import_equipment_rows(self.other_datacenter, [HEADER, equipment_row(1)])
+        versions = dict(DataCenter.objects.values_list('id', 'data_version'))
+
+        result = import_equipment_rows(self.datacenter, [HEADER, equipment_row(1)])
+
+        self.assertEqual(result.updated_count, 1)
+        self.assertEqual(Equipment.objects.get(serial_number='SN1').datacenter, self.datacenter)
+        for datacenter in (self.datacenter, self.other_datacenter):
+            datacenter.refresh_from_db()
+            self.assertGreater(datacenter.data_version, versions[datacenter.id])
+
+    def test_duplicates_in_file_are_rejected_across_batches(self):
+        rows = [
+            HEADER,
+            equipment_row(1),
+            equipment_row(2),
+            ('Server', 'TAG9', 'Basic', 'SN1', '2030-01-31'),
+            ('Server', 'TAG2', 'Basic', 'SN9', '2030-01-31'),
+            equipment_row(3),
+            equipment_row(3),
+        ]
+        result = import_equipment_rows(self.datacenter, rows, batch_size=2)
+
+        self.assertEqual(result.created_count, 3)
+        self.assertEqual(list(result.errors), [
+            'Row 4: Duplicate serial number SN1 in file',
+            'Row 5: Duplicate service tag TAG2 in file',
+            'Row 7: Duplicate serial number SN3 in file',
+        ])
+        self.assertEqual(Equipment.objects.get(serial_number='SN1').service_tag, 'TAG1')
+
+    def test_service_tag_owned_by_other_equipment_is_rejected(self):
+        import_equipment_rows(self.datacenter, [HEADER, equipment_row(1)])
+
+        result = import_equipment_rows(self.datacenter, [HEADER, ('Server', 'TAG1', 'Basic', 'SN2', '2030-01-31')])
+
+        self.assertEqual(result.created_count, 0)
+        self.assertEqual(list(result.errors), ['Row 2: Service tag TAG1 is already used by equipment SN1'])
+
+    def test_dry_run_writes_nothing(self):
+        import_equipment_rows(self.datacenter, [HEADER, equipment_row(1)])
+
+        rows = [HEADER, equipment_row(1, equipment_type='Switch'), equipment_row(2)]
+        result = import_equipment_rows(self.datacenter, rows, dry_run=True)
+
+        self.assertEqual((result.created_count, result.updated_count), (1, 1))
+        self.assertEqual(dict(result.field_change_counts), {'equipment_type': 1})
+        self.assertEqual(Equipment.objects.count(), 1)
+        self.assertEqual(Equipment.objects.get().equipment_type, 'Server')
+
+    def test_expiry_date_format_is_inferred_for_the_whole_file(self):
+        rows = [HEADER, equipment_row(1, expiry='25/12/2030'), equipment_row(2, expiry='03/04/2031'),
+                equipment_row(3, expiry='2031-04-03')]
+        result = import_equipment_rows(self.datacenter, rows)
+
+        self.assertEqual(result.date_format, 'DD/MM/YYYY')
+        self.assertEqual(Equipment.objects.get(serial_number='SN2').license_expired_date, date(2031, 4, 3))
+        self.assertEqual(list(result.errors), ["Row 4: Invalid license expiry date '2031-04-03' (expected DD/MM/YYYY)"])
+
+    def test_forced_date_format_skips_inference(self):
+        rows = [HEADER, equipment_row(1, expiry='03/04/2031')]
+        result = import_equipment_rows(self.datacenter, rows, date_format='%m/%d/%Y')
+
+        self.assertEqual(result.date_format, 'MM/DD/YYYY')
+        self.assertEqual(Equipment.objects.get().license_expired_date, date(2031, 3, 4))
+
+
+class DateFormatInferenceTests(SimpleTestCase):
+    def test_most_matching_format_wins(self):
+        self.assertEqual(infer_date_format(['12/31/2030', '01/02/2031', 'not a date']), '%m/%d/%Y')
+        self.assertEqual(infer_date_format(['2030-12-31']), '%Y-%m-%d')
+
+    def test_nothing_to_infer_from(self):
+        self.assertIsNone(infer_date_format([]))
+        self.assertIsNone(infer_date_format(['soon']))
+
+    def test_tied_formats_are_ambiguous(self):
+        with self.assertRaises(AmbiguousDateFormatError) as raised:
+            infer_date_format(['01/02/2031', '03/04/2031'])
+        self.assertEqual(raised.exception.candidate_formats, ['DD/MM/YYYY', 'MM/DD/YYYY'])
+
+
+class ImportErrorsTests(TestCase):
+    def test_messages_are_capped_and_streamed_to_the_report(self):
+        fd, report_path = tempfile.mkstemp(suffix='.txt')
+        os.close(fd)
+        self.addCleanup(os.remove, report_path)
+
+        errors = ImportErrors(limit=2, report_path=report_path)
+        for n in range(5):
+            errors.append(f'Row {n}: rejected')
+        errors.close()
+
+        self.assertEqual(len(errors), 5)
+        self.assertEqual(list(errors), ['Row 0: rejected', 'Row 1: rejected'])
+        self.assertTrue(errors.truncated)
+        with open(report_path) as report:
+            self.assertEqual(report.read().splitlines(), [f'Row {n}: rejected' for n in range(5)])
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        staging_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, staging_dir)
+        settings_override = override_settings(IMPORT_STAGING_DIR=staging_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('operator', password='secret'))
+        self.content = b"Equipment Type,Service Tag,License Type,Serial Number,License Expiry Date\r\n" \
+                       b"Server,TAG1,Basic,SN1,2030-01-31\r\nSwitch,TAG2,Basic,SN2,2030-02-28\r\n"
+
+        response = self.client.post(f'/api/datacenters/{self.datacenter.id}/equipments/uploads/',
+                                    {'file_name': 'equipment.csv', 'total_size': len(self.content)}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.upload_url = response.data['upload_url']
+        self.complete_url = response.data['complete_url']
+
+    def put_chunk(self, offset, chunk, checksum=None):
+        return self.client.generic('PUT', self.upload_url, chunk, content_type='application/octet-stream',
+                                   HTTP_X_UPLOAD_OFFSET=str(offset),
+                                   HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(chunk).hexdigest())
+
+    def test_chunks_are_assembled_in_order_and_imported(self):
+        first, second = self.content[:50], self.content[50:]
+        self.assertEqual(self.put_chunk(0, first).data, {'offset': 50, 'complete': False})
+
+        response = self.put_chunk(0, first)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], 50)
+
+        self.assertEqual(self.put_chunk(50, second).data, {'offset': len(self.content), 'complete': True})
+        session = UploadSession.objects.get()
+        with open(session.file_path, 'rb') as assembled:
+            self.assertEqual(assembled.read(), self.content)
+        self.assertEqual(os.listdir(os.path.dirname(session.file_path)), [os.path.basename(session.file_path)])
+
+        response = self.client.post(self.complete_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['imported_count'], 2)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_chunk_with_bad_checksum_is_refused(self):
+        response = self.put_chunk(0, self.content[:50], checksum='0' * 64)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['offset'], 0)
+        session = UploadSession.objects.get()
+        self.assertEqual(session.received_bytes, 0)
+        self.assertEqual(os.path.getsize(session.file_path), 0)
+        self.assertEqual(os.listdir(os.path.dirname(session.file_path)), [os.path.basename(session.file_path)])
+
+
+    def test_sessions_are_visible_to_their_owner_only(self):
+        self.client.force_authenticate(User.objects.create_user('someone-else', password='secret'))
+
+        self.assertEqual(self.client.get(self.upload_url).status_code, 404)
+        self.assertEqual(self.put_chunk(0, self.content).status_code, 404)
+        self.assertEqual(self.client.post(self.complete_url).status_code, 404)
+        self.assertEqual(self.client.delete(self.upload_url).status_code, 404)
+        session = UploadSession.objects.get()
+        self.assertEqual(session.received_bytes, 0)
+        self.assertEqual(os.listdir(os.path.dirname(session.file_path)), [os.path.basename(session.file_path)])
+
+
+class EquipmentPDFTests(SimpleTestCase):
+    def test_long_values_are_shrunk_or_wrapped_not_cut(self):
+        size, lines = _fit_text('SN-0001', 90, 'Helvetica', 8)
+        self.assertEqual((size, [text for text, _ in lines]), (8, ['SN-0001']))
+
+        size, lines = _fit_text('X' * 18, 90, 'Helvetica', 8)
+        self.assertLess(size, 8)
+        self.assertEqual(len(lines), 1)
+
+        serial = 'SERIAL' * 16
+        size, lines = _fit_text(serial, 90, 'Helvetica', 8)
+        self.assertEqual(size, PDF_MIN_FONT_SIZE)
+        self.assertGreater(len(lines), 1)
+        self.assertEqual(''.join(text for text, _ in lines), serial)
+        self.assertTrue(all(width <= 90 for _, width in lines))
+
+    def test_wrapped_rows_take_more_room_on_the_page(self):
+        short_rows = [(n, 'Server', f'TAG{n}', 'Basic', f'SN{n}', '2030-01-31') for n in range(100)]
+        long_rows = [(n, 'Server', f'TAG{n}', 'Basic', f'SN{n}' * 40, '2030-01-31') for n in range(100)]
+
+        renderers = []
+        for rows in (short_rows, long_rows):
+            renderer = EquipmentPDFRenderer(io.BytesIO())
+            renderer.render(rows)
+            self.assertEqual(renderer.row_count, 100)
+            renderers.append(renderer)
+        self.assertGreater(renderers[1].page_count, renderers[0].page_count)
+
+
+class DataVersionTests(TestCase):
+    def setUp(self):
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        self.other_datacenter = DataCenter.objects.create(name='DC2', description='Secondary')
+        self.equipment = Equipment.objects.create(datacenter=self.datacenter, equipment_type='Server',
+                                                  service_tag='TAG1', license_type='Basic', serial_number='SN1',
+                                                  license_expired_date=date(2030, 1, 31))
+
+    def versions(self):
+        return dict(DataCenter.objects.values_list('id', 'data_version'))
+
+    def assertBumped(self, before, *datacenters):
+        after = self.versions()
+        self.assertEqual({pk for pk in after if after[pk] != before[pk]}, {datacenter.id for datacenter in datacenters})
+
+    def test_save_and_delete_bump_the_datacenter(self):
+        before = self.versions()
+        self.equipment.license_type = 'Premium'
+        self.equipment.save()
+        self.assertBumped(before, self.datacenter)
+
+        before = self.versions()
+        self.equipment.delete()
+        self.assertBumped(before, self.datacenter)
+
+    def test_moving_equipment_bumps_both_datacenters(self):
+        equipment = Equipment.objects.get(pk=self.equipment.pk)
+        before = self.versions()
+        equipment.datacenter = self.other_datacenter
+        equipment.save()
+        self.assertBumped(before, self.datacenter, self.other_datacenter)
+
+    def test_queryset_update_and_delete_bump_the_datacenters_touched(self):
+        before = self.versions()
+        Equipment.objects.filter(pk=self.equipment.pk).update(license_type='Premium')
+        self.assertBumped(before, self.datacenter)
+
+        before = self.versions()
+        Equipment.live.filter(datacenter=self.datacenter).update(datacenter=self.other_datacenter)
+        self.assertBumped(before, self.datacenter, self.other_datacenter)
+
+        before = self.versions()
+        Equipment.objects.filter(serial_number='missing').update(license_type='Premium')
+        self.assertBumped(before)
+
+        before = self.versions()
+        Equipment.objects.all().delete()
+        self.assertBumped(before, self.other_datacenter)
+
+
+class ExportCacheTests(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        patcher = mock.patch('datacenter_app.utils.export_cache', ExportCache(cache_dir))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        import_equipment_rows(self.datacenter, [HEADER, equipment_row(1), equipment_row(2)])
+        self.datacenter.refresh_from_db()
+
+    def test_export_is_rendered_once_per_data_version(self):
+        with mock.patch('datacenter_app.utils.generate_equipment_pdf', wraps=generate_equipment_pdf) as render:
+            with open_export(self.datacenter, 'pdf') as first:
+                first_pdf = first.read()
+            with open_export(self.datacenter, 'pdf') as second:
+                self.assertEqual(second.read(), first_pdf)
+            self.assertEqual(render.call_count, 1)
+            self.assertTrue(os.path.exists(self.cache.path(export_cache_key(self.datacenter, 'pdf'))))
+
+            # An edit outside the API (admin, shell) still reaches a new cache key
+            Equipment.objects.filter(serial_number='SN1').update(license_type='Premium')
+            self.datacenter.refresh_from_db()
+            with open_export(self.datacenter, 'pdf') as third:
+                third.read()
+            self.assertEqual(render.call_count, 2)
+
+    def test_filtered_exports_are_cached_separately(self):
+        keys = {
+            export_cache_key(self.datacenter, 'xlsx'),
+            export_cache_key(self.datacenter, 'xlsx', service_tag='TAG1'),
+            export_cache_key(self.datacenter, 'pdf'),
+        }
+        self.assertEqual(len(keys), 3)
+
+
+class ExportJobTests(TestCase):
+    def setUp(self):
+        job_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, job_dir)
+        settings_override = override_settings(EXPORT_JOB_DIR=job_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = mock.patch('datacenter_app.views.run_equipment_export.apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        import_equipment_rows(self.datacenter, [HEADER, equipment_row(1)])
+        self.owner = User.objects.create_user('owner', password='secret')
+        self.client = APIClient()
+        self.export_url = f'/api/datacenters/{self.datacenter.id}/equipments/export-excel/?async=1'
+
+    def test_anonymous_users_cannot_queue_exports(self):
+        response = self.client.get(self.export_url)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(ExportJob.objects.exists())
+        self.apply_async.assert_not_called()
+
+    def test_jobs_are_visible_to_their_owner_only(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, 202)
+        job = ExportJob.objects.get()
+        self.assertEqual(job.created_by, self.owner)
+        self.apply_async.assert_called_once_with(args=[str(job.id)], task_id=str(job.id))
+        with mock.patch('datacenter_app.utils.export_cache', ExportCache(tempfile.mkdtemp(dir=settings.EXPORT_JOB_DIR))):
+            run_equipment_export(str(job.id))
+
+        status_url = response.data['status_url']
+        response = self.client.get(status_url)
+        self.assertEqual(response.data['status'], ExportJob.STATUS_COMPLETED)
+        response = self.client.get(response.data['download_url'], HTTP_RANGE='bytes=0-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'PK\x03\x04')
+
+        self.client.force_authenticate(User.objects.create_user('someone-else', password='secret'))
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+        self.assertEqual(self.client.get(f'{status_url}download/').status_code, 404)
+
+
+class ConsolidatedExportTests(TestCase):
+    def setUp(self):
+        work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, work_dir)
+        settings_override = override_settings(EXPORT_JOB_DIR=os.path.join(work_dir, 'jobs'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache = ExportCache(os.path.join(work_dir, 'cache'))
+        for patcher in (mock.patch('datacenter_app.utils.export_cache', cache),
+                        mock.patch('datacenter_app.consolidated.export_cache', cache),
+                        mock.patch('datacenter_app.consolidated.CONSOLIDATED_EXPORT_WORKERS', 1),
+                        mock.patch('datacenter_app.views.run_equipment_export.apply_async')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        for n, name in enumerate(('DC1', 'DC2')):
+            datacenter = DataCenter.objects.create(name=name, description='Site')
+            import_equipment_rows(datacenter, [HEADER, equipment_row(n)])
+        self.client = APIClient()
+
+    def test_exports_require_authentication(self):
+        for url in ('/api/datacenters/export-excel/', '/api/datacenters/export-pdf/',
+                    '/api/datacenters/export-bundle/'):
+            self.assertEqual(self.client.get(url).status_code, 401, url)
+
+    def test_report_bundle_has_both_reports_of_every_datacenter(self):
+        self.client.force_authenticate(User.objects.create_user('owner', password='secret'))
+        response = self.client.get('/api/datacenters/export-bundle/')
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(sorted(name.rsplit('.', 1)[1] for name in archive.namelist()), ['pdf', 'pdf', 'xlsx', 'xlsx'])
+
+    def test_pdf_bundle_in_the_request_and_as_a_job(self):
+        self.client.force_authenticate(User.objects.create_user('owner', password='secret'))
+        response = self.client.get('/api/datacenters/export-pdf/')
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(len(archive.namelist()), 2)
+
+        response = self.client.get('/api/datacenters/export-pdf/?async=1')
+        self.assertEqual(response.status_code, 202)
+        job = ExportJob.objects.get()
+        self.assertIsNone(job.datacenter)
+        self.assertEqual(job.file_format, ExportJob.FORMAT_PDF_BUNDLE)
+        run_equipment_export(str(job.id))
+
+        response = self.client.get(response.data['status_url'])
+        self.assertEqual(response.data['status'], ExportJob.STATUS_COMPLETED)
+        response = self.client.get(response.data['download_url'])
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(len(archive.namelist()), 2)
+
+
+    def test_request_renders_inline(self):
+        self.client.force_authenticate(User.objects.create_user('owner', password='secret'))
+        with mock.patch('datacenter_app.consolidated.CONSOLIDATED_EXPORT_WORKERS', 4), \
+                mock.patch('datacenter_app.consolidated.Pool') as pool:
+            response = self.client.get('/api/datacenters/export-excel/')
+
+        self.assertEqual(response.status_code, 200)
+        pool.assert_not_called()
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(workbook.sheetnames, ['DC1', 'DC2'])
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        import_equipment_rows(self.datacenter, [HEADER, *(equipment_row(n) for n in range(7))])
+        self.ids = list(Equipment.objects.order_by('id').values_list('id', flat=True))
+        deleted_at = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        # Three deleted on distinct dates, one sharing a date, three without a date
+        for offset, pk in zip((0, 1, 2, 2), self.ids[:4]):
+            Equipment.objects.filter(pk=pk).update(is_deleted=True, deleted_at=deleted_at + timedelta(days=offset))
+        Equipment.objects.filter(pk__in=self.ids[4:]).update(is_deleted=True, deleted_at=None)
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('operator', password='secret'))
+        self.url = f'/api/datacenters/{self.datacenter.id}/equipments/history/'
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data[link]
+        return pages
+
+    def test_history_pages_through_null_deleted_at(self):
+        # Most recently deleted first, ties broken by id, rows without a date last
+        expected = [self.ids[3], self.ids[2], self.ids[1], self.ids[0], self.ids[6], self.ids[5], self.ids[4]]
+        unpaginated = self.client.get(self.url).data
+        self.assertEqual([row['id'] for row in unpaginated], expected)
+
+        pages = self.walk(f'{self.url}?page_size=2', 'next')
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertEqual(len(pages), 4)
+
+        last_page = self.client.get(f'{self.url}?page_size=2')
+        while last_page.data['next']:
+            last_page = self.client.get(last_page.data['next'])
+        back = self.walk(last_page.data['previous'], 'previous')
+        self.assertEqual([pk for page in reversed(back) for pk in page], expected[:-1])
+
+    def test_ascending_order_keeps_nulls_last(self):
+        pages = self.walk(f'{self.url}?page_size=3&ordering=deleted_at', 'next')
+        expected = [self.ids[0], self.ids[1], self.ids[2], self.ids[3], self.ids[4], self.ids[5], self.ids[6]]
+        self.assertEqual([pk for page in pages for pk in page], expected)
+
+    def test_equipment_list_cursor_is_bound_to_its_ordering(self):
+        url = f'/api/datacenters/{self.datacenter.id}/equipments/'
+        Equipment.objects.update(is_deleted=False, deleted_at=None)
+        pages = self.walk(f'{url}?page_size=3&ordering=-service_tag', 'next')
+        self.assertEqual([pk for page in pages for pk in page], list(reversed(self.ids)))
+
+        next_url = self.client.get(f'{url}?page_size=3').data['next']
+        self.assertEqual(self.client.get(f'{next_url}&ordering=service_tag').status_code, 404)
+
+
+    def test_cursor_values_must_match_the_ordering_field(self):
+        def cursor(ordering, position):
+            payload = json.dumps({'o': ordering, 'p': position, 'r': 0}, separators=(',', ':'))
+            return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+        url = f'/api/datacenters/{self.datacenter.id}/equipments/'
+        self.assertEqual(cursor('id', ['x', 'abc']), 'eyJvIjoiaWQiLCJwIjpbIngiLCJhYmMiXSwiciI6MH0')
+        for query, position in (('', ['x', 'abc']), ('', [None, None]),
+                                ('&ordering=license_expired_date', ['not a date', self.ids[0]]),
+                                ('&ordering=service_tag', [{'a': 1}, self.ids[0]])):
+            ordering = query.rpartition('=')[2] or 'id'
+            response = self.client.get(f'{url}?cursor={cursor(ordering, position)}{query}')
+            self.assertEqual(response.status_code, 404, position)
+            self.assertEqual(response.data['detail'], 'Invalid cursor')
+
+        response = self.client.get(f'{self.url}?cursor={cursor("-deleted_at", ["2030-13-01T00:00:00+00:00", 1])}')
+        self.assertEqual(response.status_code, 404)
+
+        # Values of the right type written as strings are still accepted
+        response = self.client.get(f'{self.url}?cursor={cursor("-deleted_at", ["2030-01-03T00:00:00+00:00", str(self.ids[2])])}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']][:2], [self.ids[1], self.ids[0]])
+
+@skipUnlessDBFeature('supports_partial_indexes')
+class EquipmentIndexTests(TestCase):
+    """The partial indexes must be what the planner picks for the hot equipment queries."""
+
+    def setUp(self):
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        import_equipment_rows(self.datacenter, [HEADER, *(equipment_row(n) for n in range(20))])
+        Equipment.objects.filter(serial_number__in=['SN1', 'SN2']).update(is_deleted=True, deleted_at=datetime.now(timezone.utc))
+
+    def assertUsesIndex(self, queryset, index_name):
+        self.assertIn(index_name, queryset.explain())
+
+    def test_live_equipment_of_a_datacenter(self):
+        self.assertUsesIndex(Equipment.live.filter(datacenter=self.datacenter).order_by('id')[:100],
+                             'equipment_live_dc_idx')
+
+    def test_live_equipment_by_expiry_date(self):
+        self.assertUsesIndex(Equipment.live.filter(license_expired_date=date(2030, 1, 31)), 'equipment_live_expiry_idx')
+
+    def test_deleted_equipment_history(self):
+        history = Equipment.objects.filter(datacenter=self.datacenter, is_deleted=True)
+        self.assertUsesIndex(history.order_by(F('deleted_at').desc(nulls_last=True), '-id')[:100], 'equipment_history_idx')
+        self.assertUsesIndex(history.order_by('-deleted_at', '-id')[:100], 'equipment_history_idx')
+
+
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        import_equipment_rows(self.datacenter, [HEADER, equipment_row(1), equipment_row(2)])
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('operator', password='secret'))
+        self.url = f'/api/datacenters/{self.datacenter.id}/equipments/'
+
+    def test_unchanged_list_is_not_sent_again(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Accept', response['Vary'])
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('Accept', response['Vary'])
+
+        # Any write, including one outside the API views, changes the ETag
+        Equipment.objects.filter(serial_number='SN1').update(license_type='Premium')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_each_representation_has_its_own_etag(self):
+        json_etag = self.client.get(self.url)['ETag']
+        columnar = 'application/vnd.datacenter.columnar+json'
+
+        response = self.client.get(self.url, HTTP_ACCEPT=columnar, HTTP_IF_NONE_MATCH=json_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], columnar)
+        self.assertNotEqual(response['ETag'], json_etag)
+
+        response = self.client.get(self.url, HTTP_ACCEPT=columnar, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_datacenter_list_revalidates(self):
+        response = self.client.get('/api/datacenters/')
+        self.assertEqual(self.client.get('/api/datacenters/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        DataCenter.objects.create(name='DC2', description='Secondary')
+        self.assertEqual(self.client.get('/api/datacenters/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class DataCenterStatsTests(TestCase):
+    def setUp(self):
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('operator', password='secret'))
+        self.base_url = f'/api/datacenters/{self.datacenter.id}/equipments/'
+
+    def counters(self):
+        stats = DataCenterStats.objects.get(datacenter=self.datacenter)
+        return {field: getattr(stats, field) for field in DataCenterStats.COUNTER_FIELDS}
+
+    def test_new_datacenter_starts_at_zero(self):
+        self.assertEqual(self.counters(), dict.fromkeys(DataCenterStats.COUNTER_FIELDS, 0))
+
+    def test_writes_move_live_and_deleted_counters(self):
+        response = self.client.post(f'{self.base_url}add/', {
+            'equipment_type': 'Server', 'service_tag': 'TAG1', 'license_type': 'Basic',
+            'serial_number': 'SN1', 'license_expired_date': '2000-01-01',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        equipment_id = Equipment.objects.get().id
+        # Only live/deleted move per write; the expired bucket waits for the nightly recount
+        self.assertEqual(self.counters(), {'live_count': 1, 'deleted_count': 0, 'expiring_count': 0, 'expired_count': 0})
+
+        self.client.patch(f'{self.base_url}{equipment_id}/modify/', {'license_type': 'Premium'}, format='json')
+        self.assertEqual(self.counters()['live_count'], 1)
+
+        self.assertEqual(self.client.delete(f'{self.base_url}{equipment_id}/delete/').status_code, 200)
+        self.assertEqual(self.counters(), {'live_count': 0, 'deleted_count': 1, 'expiring_count': 0, 'expired_count': 0})
+
+        self.assertEqual(self.client.patch(f'{self.base_url}{equipment_id}/restore/').status_code, 200)
+        self.assertEqual(self.counters(), {'live_count': 1, 'deleted_count': 0, 'expiring_count': 0, 'expired_count': 0})
+
+        DataCenterStats.objects.update(computed_on=date(2000, 1, 1))
+        self.assertEqual(refresh_datacenter_stats(), 1)
+        self.assertEqual(self.counters(), {'live_count': 1, 'deleted_count': 0, 'expiring_count': 0, 'expired_count': 1})
+
+    def test_import_recounts(self):
+        rows = [HEADER, equipment_row(1, expiry='2000-01-01'), equipment_row(2), equipment_row(3)]
+        import_equipment_rows(self.datacenter, rows)
+        self.assertEqual(self.counters(), {'live_count': 3, 'deleted_count': 0, 'expiring_count': 0, 'expired_count': 1})
+
+        Equipment.objects.filter(serial_number='SN3').update(is_deleted=True, deleted_at=datetime.now(timezone.utc))
+        self.assertEqual(self.counters(), {'live_count': 2, 'deleted_count': 1, 'expiring_count': 0, 'expired_count': 1})
+
+    def test_datacenter_endpoints_do_not_write(self):
+        import_equipment_rows(self.datacenter, [HEADER, equipment_row(1)])
+        DataCenterStats.objects.update(computed_on=date(2000, 1, 1))
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            listing = self.client.get('/api/datacenters/')
+            detail = self.client.get(f'/api/datacenters/{self.datacenter.id}/')
+        self.assertEqual(listing.data[0]['equipment_stats']['live'], 1)
+        self.assertEqual(detail.data['equipment_stats']['live'], 1)
+        self.assertTrue(statements)
+        self.assertTrue(all(sql.lstrip().upper().startswith('SELECT') for sql in statements), statements)
+
+
+class ImportJobTests(TestCase):
+    def setUp(self):
+        staging_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, staging_dir)
+        settings_override = override_settings(IMPORT_STAGING_DIR=staging_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = mock.patch('datacenter_app.views.run_equipment_import.apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('owner', password='secret'))
+
+    def queue_import(self, content):
+        upload = io.BytesIO(content)
+        upload.name = 'equipment.csv'
+        response = self.client.post(f'/api/datacenters/{self.datacenter.id}/equipments/import-excel/?async=1',
+                                    {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        return response
+
+    def test_task_runs_the_job_and_reports_its_counts(self):
+        import_equipment_rows(self.datacenter, [HEADER, equipment_row(1), equipment_row(2)])
+        response = self.queue_import(
+            b"Equipment Type,Service Tag,License Type,Serial Number,License Expiry Date\r\n"
+            b"Server,TAG1,Basic,SN1,2030-01-31\r\n"
+            b"Switch,TAG2,Basic,SN2,2030-01-31\r\n"
+            b"Server,TAG3,Basic,SN3,2030-01-31\r\n"
+            b"Server,TAG3,Basic,SN4,2030-01-31\r\n"
+        )
+        status_url = response.data['status_url']
+        job = ImportJob.objects.get()
+        self.apply_async.assert_called_once_with(args=[str(job.id)], task_id=str(job.id))
+        self.assertEqual(self.client.get(status_url).data['status'], ImportJob.STATUS_PENDING)
+
+        self.assertEqual(run_equipment_import(str(job.id)), ImportJob.STATUS_COMPLETED)
+
+        data = self.client.get(status_url).data
+        self.assertEqual(data['status'], ImportJob.STATUS_COMPLETED)
+        self.assertEqual(
+            {field: data[field] for field in ('rows_processed', 'created_count', 'updated_count',
+                                              'unchanged_count', 'failed_count', 'date_format')},
+            {'rows_processed': 4, 'created_count': 1, 'updated_count': 1, 'unchanged_count': 1,
+             'failed_count': 1, 'date_format': 'YYYY-MM-DD'},
+        )
+        self.assertFalse(os.path.exists(job.file_path))
+
+        response = self.client.get(data['error_report_url'])
+        self.assertEqual(b''.join(response.streaming_content),
+                         b"Row 5: Duplicate service tag TAG3 in file\n")
+
+    def test_missing_columns_fail_the_job(self):
+        self.queue_import(b"Equipment Type,Serial Number\r\nServer,SN1\r\n")
+        job = ImportJob.objects.get()
+
+        self.assertEqual(run_equipment_import(str(job.id)), ImportJob.STATUS_FAILED)
+        job.refresh_from_db()
+        self.assertIn('Missing required columns', job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_jobs_are_visible_to_their_owner_only(self):
+        response = self.queue_import(b"Equipment Type,Service Tag,License Type,Serial Number\r\n"
+                                     b"Server,TAG1,Basic,SN1\r\n")
+        job = ImportJob.objects.get()
+        run_equipment_import(str(job.id))
+        status_url = response.data['status_url']
+        self.assertEqual(self.client.get(status_url).status_code, 200)
+
+        self.client.force_authenticate(User.objects.create_user('someone-else', password='secret'))
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+        self.assertEqual(self.client.get(f'{status_url}errors/').status_code, 404)
+
+
+class NDJSONImportTests(TestCase):
+    def setUp(self):
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('operator', password='secret'))
+
+    def test_header_is_the_union_of_the_sampled_keys(self):
+        rows = list(read_ndjson_rows(io.BytesIO(
+            b'{"Serial Number": "SN1", "Service Tag": "TAG1"}\n'
+            b'\n'
+            b'{"Equipment Type": "Server", "Serial Number": "SN2"}\n'
+        )))
+
+        self.assertEqual(rows, [
+            ('Serial Number', 'Service Tag', 'Equipment Type'),
+            ('SN1', 'TAG1', None),
+            (),
+            ('SN2', None, 'Server'),
+        ])
+
+    def test_malformed_lines_are_yielded_as_invalid_rows(self):
+        rows = list(read_ndjson_rows(io.BytesIO(b'{"Serial Number": "SN1"}\n{"Serial Number": \n[1, 2]\n')))
+
+        self.assertEqual(rows[:2], [('Serial Number',), ('SN1',)])
+        self.assertIsInstance(rows[2], InvalidRow)
+        self.assertTrue(rows[2].message.startswith('Invalid JSON - '))
+        self.assertIsInstance(rows[3], InvalidRow)
+        self.assertEqual(rows[3].message, 'Expected a JSON object')
+
+    def test_malformed_lines_are_reported_as_row_errors(self):
+        upload = io.BytesIO(
+            b'{"Equipment Type": "Server", "Service Tag": "TAG1", "Serial Number": "SN1"}\n'
+            b'not json\n'
+            b'{"Equipment Type": "Switch", "Service Tag": "TAG2", "Serial Number": "SN2", "License Type": "Pro"}\n'
+            b'{"Equipment Type": "Router", "Service Tag": "TAG3", "Serial Number": "SN3", "License Type": "Basic",'
+            b' "License Expiry Date": "2030-01-31"}\n'
+        )
+        upload.name = 'equipment.ndjson'
+
+        response = self.client.post(f'/api/datacenters/{self.datacenter.id}/equipments/import-excel/',
+                                    {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['imported_count'], 2)
+        # Lines buffered for date inference are reported before the rows validated after them
+        invalid_json, missing_fields = response.data['errors']
+        self.assertTrue(invalid_json.startswith('Row 2: Invalid JSON - '))
+        self.assertTrue(missing_fields.startswith('Row 1: Missing or empty required fields: License Type'))
+        self.assertEqual(Equipment.objects.get(serial_number='SN3').license_expired_date, date(2030, 1, 31))
+        self.assertEqual(set(Equipment.objects.values_list('serial_number', flat=True)), {'SN2', 'SN3'})
+
+
+class StreamXLSXTests(SimpleTestCase):
+    def load(self, chunks):
+        return load_workbook(io.BytesIO(b''.join(chunks)))
+
+    def test_streamed_workbook_reads_back(self):
+        workbook = self.load(stream_xlsx([
+            ('Equipment', ['ID', 'Name', 'Expiry', 'Active'], iter([
+                (1, 'Rack <A> & "B"', date(2030, 1, 31), True),
+                (2, None, datetime(2031, 6, 1, 12, 30), False),
+            ])),
+            ('Empty', ['ID'], iter([])),
+        ]))
+
+        self.assertEqual(workbook.sheetnames, ['Equipment', 'Empty'])
+        rows = list(workbook['Equipment'].iter_rows(values_only=True))
+        self.assertEqual(rows[0], ('ID', 'Name', 'Expiry', 'Active'))
+        self.assertEqual(rows[1], (1, 'Rack <A> & "B"', datetime(2030, 1, 31), True))
+        self.assertEqual(rows[2], (2, None, datetime(2031, 6, 1), False))
+        self.assertEqual(workbook['Equipment']['C2'].number_format, 'yyyy-mm-dd')
+        self.assertEqual(list(workbook['Empty'].iter_rows(values_only=True)), [('ID',)])
+
+    def test_illegal_control_characters_are_stripped(self):
+        workbook = self.load(stream_xlsx([
+            ('Sheet', ['Value'], iter([('bell\x07 null\x00 esc\x1b',), ('tab\tkept\nnewline',)])),
+        ]))
+
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(rows[1:], [('bell null esc',), ('tab\tkept\nnewline',)])
+
+    def test_sheet_titles_are_made_valid_and_unique(self):
+        workbook = self.load(stream_xlsx([
+            ('Rack [1]/2', ['A'], iter([])),
+            ('rack _1__2', ['A'], iter([])),
+            ('x' * 40, ['A'], iter([])),
+        ]))
+
+        self.assertEqual(workbook.sheetnames, ['Rack _1__2', 'rack _1__2_2', 'x' * 31])
+
+    def test_prerendered_sheets_are_stitched_into_one_workbook(self):
+        first = b''.join(iter_sheet_xml(['ID'], [(1,), (2,)]))
+        workbook = self.load(stream_workbook([
+            ('First', [first[:10], first[10:]]),
+            ('Second', iter_sheet_xml(None, [('no header',)])),
+        ]))
+
+        self.assertEqual(list(workbook['First'].iter_rows(values_only=True)), [('ID',), (1,), (2,)])
+        self.assertEqual(list(workbook['Second'].iter_rows(values_only=True)), [('no header',)])
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        other = DataCenter.objects.create(name='DC2', description='Secondary')
+        import_equipment_rows(self.datacenter, [
+            HEADER, equipment_row(1), equipment_row(2, equipment_type='Switch'), equipment_row(3),
+        ])
+        import_equipment_rows(other, [HEADER, equipment_row(4)])
+        Equipment.objects.get(serial_number='SN3').delete()
+        self.ids = dict(Equipment.objects.values_list('serial_number', 'id'))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('operator', password='secret'))
+
+    def export(self, kind, query=''):
+        response = self.client.get(f'/api/datacenters/{self.datacenter.id}/equipments/export-{kind}/{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_export(self):
+        response, body = self.export('csv')
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="equipments_{self.datacenter.id}.csv"')
+        self.assertEqual(list(csv.reader(io.StringIO(body.decode()))), [
+            ['ID', 'Equipment Type', 'Service Tag', 'License Type', 'Serial Number', 'License Expiry Date'],
+            [str(self.ids['SN1']), 'Server', 'TAG1', 'Basic', 'SN1', '2030-01-31'],
+            [str(self.ids['SN2']), 'Switch', 'TAG2', 'Basic', 'SN2', '2030-01-31'],
+        ])
+
+    def test_ndjson_export(self):
+        response, body = self.export('ndjson')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'],
+                         f'attachment; filename="equipments_{self.datacenter.id}.ndjson"')
+        self.assertEqual([json.loads(line) for line in body.decode().splitlines()], [
+            {'id': self.ids[serial], 'equipment_type': equipment_type, 'service_tag': tag, 'license_type': 'Basic',
+             'serial_number': serial, 'license_expired_date': '2030-01-31'}
+            for serial, tag, equipment_type in (('SN1', 'TAG1', 'Server'), ('SN2', 'TAG2', 'Switch'))
+        ])
+
+    def test_gzip_export_with_filters(self):
+        response, body = self.export('csv', '?gzip=1&service_tag=TAG2')
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(response['Content-Disposition'],
+                         f'attachment; filename="equipments_{self.datacenter.id}.csv.gz"')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        rows = list(csv.reader(io.StringIO(gzip.decompress(body).decode())))
+        self.assertEqual([row[4] for row in rows], ['Serial Number', 'SN2'])
+
+        response, body = self.export('ndjson', '?gzip=true')
+        self.assertEqual(response['Content-Disposition'],
+                         f'attachment; filename="equipments_{self.datacenter.id}.ndjson.gz"')
+        self.assertEqual([json.loads(line)['serial_number'] for line in gzip.decompress(body).splitlines()],
+                         ['SN1', 'SN2'])
+
+    def test_unknown_datacenter(self):
+        response = self.client.get('/api/datacenters/999/equipments/export-csv/')
+        self.assertEqual(response.status_code, 404)
+
+
+class ExportCacheStreamTests(SimpleTestCase):
+    key = '1-1-0123456789abcdef0123.xlsx'
+
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        self.cache = ExportCache(cache_dir)
+        self.produced = []
+
+    def chunks(self, name, started=None, proceed=None):
+        self.produced.append(name)
+        if started is not None:
+            started.set()
+            proceed.wait(5)
+        yield b'first,'
+        yield b'second'
+
+    def consume_in_thread(self, stream, results, name):
+        thread = threading.Thread(target=lambda: results.__setitem__(name, b''.join(stream)))
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        return thread
+
+    def test_lock_is_released_before_the_artifact_is_sent(self):
+        slow_client = self.cache.stream(self.key, self.chunks('first'))
+        self.assertEqual(next(slow_client), b'first,second')
+
+        # The first download is still open; a second request for the key must not wait for it
+        results = {}
+        thread = self.consume_in_thread(self.cache.stream(self.key, self.chunks('second')), results, 'second')
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results['second'], b'first,second')
+        self.assertEqual(self.produced, ['first'])
+        self.assertEqual(list(slow_client), [])
+
+    def test_concurrent_requests_for_a_key_share_one_render(self):
+        started, proceed = threading.Event(), threading.Event()
+        results = {}
+        first = self.consume_in_thread(
+            self.cache.stream(self.key, self.chunks('first', started, proceed)), results, 'first')
+        self.assertTrue(started.wait(5))
+        second = self.consume_in_thread(self.cache.stream(self.key, self.chunks('second')), results, 'second')
+
+        # The second request waits on the render lock while the first one renders
+        second.join(0.2)
+        self.assertTrue(second.is_alive())
+        proceed.set()
+        first.join(5)
+        second.join(5)
+
+        self.assertEqual(results, {'first': b'first,second', 'second': b'first,second'})
+        self.assertEqual(self.produced, ['first'])
+        self.assertEqual(sorted(os.listdir(self.cache.directory)), [f'.lock-{self.key}', self.key])
+
+    def test_failed_render_publishes_nothing(self):
+        def broken():
+            yield b'partial'
+            raise RuntimeError('database went away')
+
+        with self.assertRaises(RuntimeError):
+            b''.join(self.cache.stream(self.key, broken()))
+        self.assertIsNone(self.cache.open(self.key))
+        self.assertEqual(os.listdir(self.cache.directory), [f'.lock-{self.key}'])
+
+
+class RunParallelTests(SimpleTestCase):
+    def test_work_is_spread_over_child_processes(self):
+        pids = run_parallel(os.getpid, [()] * 4, workers=2)
+
+        self.assertEqual(len(pids), 4)
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_pool_can_be_started_from_a_daemonic_worker(self):
+        # Celery's prefork workers are daemonic billiard processes
+        results = billiard.SimpleQueue()
+        worker = billiard.Process(target=lambda: results.put(run_parallel(os.getpid, [()] * 2, workers=2)),
+                                  daemon=True)
+        worker.start()
+        worker.join(30)
+
+        self.assertEqual(worker.exitcode, 0)
+        self.assertNotIn(worker.pid, results.get())
+
+    def test_runs_inline_off_the_main_thread(self):
+        results = []
+        thread = threading.Thread(target=lambda: results.extend(run_parallel(os.getpid, [()] * 2, workers=2)))
+        thread.start()
+        thread.join(30)
+
+        self.assertEqual(results, [os.getpid()] * 2)
+
+
+def create_equipment(datacenter, n, **fields):
+    return Equipment.objects.create(**{
+        'datacenter': datacenter, 'equipment_type': 'Server', 'service_tag': f'TAG{n}', 'license_type': 'Basic',
+        'serial_number': f'SN{n}', 'license_expired_date': date(2030, 1, 31), **fields,
+    })
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite FTS5 backend')
+class SQLiteTrigramSearchTests(TestCase):
+    def setUp(self):
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        self.backend = SQLiteTrigramBackend()
+        for n, (service_tag, license_type) in enumerate((
+            ('Rack-01 "Prime"', 'Enterprise'), ('rack-02', 'Basic'), ('100%_sure', 'basic plus'),
+            ('TAG_X', 'Premium'), ('node "A"', 'BASIC'),
+        )):
+            create_equipment(self.datacenter, n, service_tag=service_tag, license_type=license_type)
+
+    def ids(self, queryset):
+        return sorted(queryset.values_list('id', flat=True))
+
+    def assertIndexIsConsistent(self):
+        # Raises when the external-content index disagrees with the equipment table
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.backend.table}({self.backend.table}, rank) VALUES ('integrity-check', 1)")
+
+    def test_filter_and_search_match_icontains(self):
+        fallback = SearchBackend()
+        equipments = Equipment.objects.all()
+        for term in ('rack', 'RACK-0', '"Prime"', 'e"', '100%', '%_s', '_X', 'ag_', 'ra', '%', 'k', 'nothing'):
+            self.assertEqual(self.ids(self.backend.filter(equipments, service_tag=term)),
+                             self.ids(fallback.filter(equipments, service_tag=term)), term)
+            self.assertEqual(self.ids(self.backend.search(equipments, term)),
+                             self.ids(fallback.search(equipments, term)), term)
+        terms = {'service_tag': 'rack', 'license_type': 'as'}
+        self.assertEqual(self.ids(self.backend.filter(equipments, **terms)),
+                         self.ids(fallback.filter(equipments, **terms)))
+        self.assertEqual(self.ids(self.backend.filter(equipments, service_tag='', license_type=None)),
+                         self.ids(equipments))
+
+    def test_short_terms_do_not_use_the_index(self):
+        short, indexed = 'rack'[:MIN_TRIGRAM_LENGTH - 1], 'rack'[:MIN_TRIGRAM_LENGTH]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(self.backend.filter(Equipment.objects.all(), service_tag=short)), 2)
+            self.assertEqual(len(self.backend.search(Equipment.objects.all(), short)), 2)
+        self.assertFalse(any(self.backend.table in query['sql'] for query in queries))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(self.backend.search(Equipment.objects.all(), indexed)), 2)
+        self.assertIn('MATCH', queries[0]['sql'])
+
+    def test_quotes_in_terms_are_escaped(self):
+        equipments = Equipment.objects.all()
+        self.assertEqual([eq.service_tag for eq in self.backend.search(equipments, '"A"')], ['node "A"'])
+        self.assertEqual([eq.service_tag for eq in self.backend.search(equipments, '01 "Pr')], ['Rack-01 "Prime"'])
+        # FTS5 syntax inside a term is matched literally rather than parsed
+        for term in ('a" OR "b', 'rack*', 'NOT rack', 'service_tag:rack'):
+            self.assertEqual(list(self.backend.search(equipments, term)), [], term)
+
+    def test_triggers_follow_every_write(self):
+        search = lambda term: sorted(eq.serial_number for eq in self.backend.search(Equipment.objects.all(), term))
+
+        equipment = create_equipment(self.datacenter, 10, service_tag='fresh-tag')
+        self.assertEqual(search('fresh'), ['SN10'])
+        equipment.service_tag = 'renamed-tag'
+        equipment.save()
+        self.assertEqual(search('fresh'), [])
+        self.assertEqual(search('renamed'), ['SN10'])
+        Equipment.objects.filter(pk=equipment.pk).update(license_type='Gold')
+        self.assertEqual(search('gold'), ['SN10'])
+        Equipment.objects.filter(pk=equipment.pk).delete()
+        self.assertEqual(search('renamed'), [])
+        self.assertEqual(search('gold'), [])
+
+        created = Equipment.objects.bulk_create([
+            Equipment(datacenter=self.datacenter, equipment_type='Switch', service_tag=f'bulk-{n}',
+                      license_type='Basic', serial_number=f'BULK{n}', license_expired_date=date(2030, 1, 31))
+            for n in range(3)
+        ])
+        self.assertEqual(search('bulk-'), ['BULK0', 'BULK1', 'BULK2'])
+        for equipment in created:
+            equipment.service_tag = equipment.service_tag.replace('bulk', 'moved')
+        Equipment.objects.bulk_update(created, ['service_tag'])
+        self.assertEqual(search('bulk-'), [])
+        self.assertEqual(search('moved-'), ['BULK0', 'BULK1', 'BULK2'])
+
+        import_equipment_rows(self.datacenter, [HEADER, equipment_row(20), equipment_row(21)])
+        import_equipment_rows(self.datacenter, [HEADER, equipment_row(20, equipment_type='Firewall')])
+        self.assertEqual(search('firewall'), ['SN20'])
+        self.assertIndexIsConsistent()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite FTS5 backend')
+class SearchIndexReinstallTests(TransactionTestCase):
+    def test_missing_triggers_are_reinstalled_after_migrate(self):
+        backend = SQLiteTrigramBackend()
+        datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {backend.table}_ai")
+        create_equipment(datacenter, 1, service_tag='unindexed')
+        self.assertEqual(list(backend.search(Equipment.objects.all(), 'unindexed')), [])
+
+        install_missing_search_index(sender=None, using=DEFAULT_DB_ALIAS)
+
+        self.assertEqual([eq.serial_number for eq in backend.search(Equipment.objects.all(), 'unindexed')], ['SN1'])
+        create_equipment(datacenter, 2, service_tag='indexed')
+        self.assertEqual(len(backend.search(Equipment.objects.all(), 'indexed')), 2)
+
+
+class EquipmentSearchViewTests(TestCase):
+    def setUp(self):
+        first = DataCenter.objects.create(name='DC1', description='Primary')
+        second = DataCenter.objects.create(name='DC2', description='Secondary')
+        for n in range(3):
+            create_equipment(first, n)
+        create_equipment(second, 3, license_type='Premium "Plus"')
+        create_equipment(second, 4, is_deleted=True)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('operator', password='secret'))
+
+    def search(self, query, status_code=200):
+        response = self.client.get('/api/equipments/search/', query)
+        self.assertEqual(response.status_code, status_code)
+        return response.data
+
+    def test_searches_live_equipment_of_every_datacenter(self):
+        results = self.search({'q': 'tag'})
+        self.assertEqual([row['serial_number'] for row in results], ['SN0', 'SN1', 'SN2', 'SN3'])
+        self.assertEqual(results[3]['datacenter_id'], DataCenter.objects.get(name='DC2').id)
+
+        self.assertEqual([row['serial_number'] for row in self.search({'q': 'sn1'})], ['SN1'])
+        self.assertEqual([row['serial_number'] for row in self.search({'q': '"plus"'})], ['SN3'])
+        self.assertEqual([row['serial_number'] for row in self.search({'q': '3'})], ['SN3'])
+        self.assertEqual(self.search({'q': 'SN4'}), [])
+
+    def test_limit_and_validation(self):
+        self.assertEqual(len(self.search({'q': 'tag', 'limit': 2})), 2)
+        self.assertEqual(len(self.search({'q': 'tag', 'limit': 0})), 1)
+        self.assertIn('error', self.search({'q': '  '}, 400))
+        self.assertIn('error', self.search({'q': 'tag', 'limit': 'all'}, 400))
+
+
+class FieldProjectionTests(TestCase):
+    def setUp(self):
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        import_equipment_rows(self.datacenter, [
+            HEADER, *(equipment_row(n, equipment_type='Server' if n % 2 else 'Switch') for n in range(5)),
+        ])
+        self.ids = list(Equipment.objects.order_by('id').values_list('id', flat=True))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('operator', password='secret'))
+        self.url = f'/api/datacenters/{self.datacenter.id}/equipments/'
+
+    def get(self, query):
+        response = self.client.get(f'{self.url}{query}')
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_default_output_matches_the_model_serializer(self):
+        expected = EquipmentSerializer(Equipment.objects.order_by('id'), many=True).data
+        self.assertEqual(self.get(''), json.loads(json.dumps(expected)))
+
+    def test_only_the_requested_fields_are_returned(self):
+        rows = self.get('?fields=serial_number, id,datacenter')
+        self.assertEqual(rows[0], {'id': self.ids[0], 'serial_number': 'SN0', 'datacenter': 'DC1'})
+        # Output order is the serializer's whatever order was asked for
+        self.assertEqual([list(row) for row in rows], [['id', 'serial_number', 'datacenter']] * 5)
+
+        # Columns fetched for the keyset seek are not leaked into the rows
+        page = self.get('?fields=id&ordering=license_expired_date&page_size=2')
+        self.assertEqual(page['results'], [{'id': self.ids[0]}, {'id': self.ids[1]}])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(f'{self.url}?fields=id,secret,import_hash')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.data['error'].startswith('Unknown field(s): secret, import_hash.'))
+
+        response = self.client.get(f'/api/datacenters/{self.datacenter.id}/equipments/history/?fields=nope')
+        self.assertEqual(response.status_code, 400)
+
+    def test_columnar_output_through_pagination(self):
+        columns, url = [], f'{self.url}?format=columnar&fields=equipment_type,id&page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response['Content-Type'], 'application/vnd.datacenter.columnar+json')
+            page = json.loads(response.content)
+            columns.append(page['results'])
+            url = page['next']
+
+        self.assertEqual([page['count'] for page in columns], [2, 2, 1])
+        self.assertEqual(columns[0], {
+            'columns': ['id', 'equipment_type'], 'count': 2, 'dictionaries': {'equipment_type': ['Switch', 'Server']},
+            'data': {'id': self.ids[:2], 'equipment_type': [0, 1]},
+        })
+        self.assertEqual([pk for page in columns for pk in page['data']['id']], self.ids)
+        decoded = [page['dictionaries']['equipment_type'][code]
+                   for page in columns for code in page['data']['equipment_type']]
+        self.assertEqual(decoded, ['Switch', 'Server', 'Switch', 'Server', 'Switch'])
+
+    def test_columnar_output_of_the_full_list(self):
+        data = self.get('?format=columnar')
+        self.assertEqual(data['columns'], EquipmentSerializer.Meta.fields)
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(data['dictionaries']['datacenter'], ['DC1'])
+        self.assertEqual(data['data']['datacenter'], [0] * 5)
+        self.assertEqual(data['data']['license_expired_date'], ['2030-01-31'] * 5)
+
+
+class RendererTests(SimpleTestCase):
+    data = {
+        'id': 7,
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'price': Decimal('12.50'),
+        'expiry': date(2030, 1, 31),
+        'deleted_at': datetime(2030, 1, 31, 8, 30, 15, 123456, tzinfo=timezone.utc),
+        'naive': datetime(2030, 1, 31, 8, 30),
+        'at': time(23, 59, 1),
+        'text': 'Säule "quoted"',
+        3: ['nested', {'ratio': 0.25, 'ok': True, 'none': None}],
+    }
+
+    @skipUnless(orjson is not None, 'orjson is not installed')
+    def test_fast_json_matches_drf_byte_for_byte(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+        self.assertEqual(FastJSONRenderer().render([]), b'[]')
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_indented_output_uses_drf(self):
+        rendered = FastJSONRenderer().render(self.data, 'application/json; indent=2')
+        self.assertEqual(rendered, JSONRenderer().render(self.data, 'application/json; indent=2'))
+        self.assertIn(b'\n  "id": 7', rendered)
+
+    @skipUnless(msgpack is not None, 'msgpack is not installed')
+    def test_messagepack_decodes_to_the_json_values(self):
+        rendered = MessagePackRenderer().render(self.data)
+        self.assertEqual(msgpack.unpackb(rendered, strict_map_key=False),
+                         {int(key) if key == '3' else key: value
+                          for key, value in json.loads(JSONRenderer().render(self.data)).items()})
+        self.assertEqual(MessagePackRenderer().render(None), b'')
+
+
+@skipUnless(msgpack is not None, 'msgpack is not installed')
+class MessagePackNegotiationTests(TestCase):
+    def test_equipment_list_as_messagepack(self):
+        datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        import_equipment_rows(datacenter, [HEADER, equipment_row(1)])
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('operator', password='secret'))
+
+        response = client.get(f'/api/datacenters/{datacenter.id}/equipments/', HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content),
+                         client.get(f'/api/datacenters/{datacenter.id}/equipments/').json())
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = b'{"serial_number": "SN0001", "service_tag": "TAG0001"}' * 100
+
+    def respond(self, response, accept_encoding='gzip, deflate, br, zstd'):
+        request = RequestFactory().get('/api/equipments/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, body=None, **headers):
+        response = HttpResponse(self.body if body is None else body, content_type='application/json')
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def decode(self, response):
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        coding = response.get('Content-Encoding')
+        if coding == 'gzip':
+            return gzip.decompress(content)
+        if coding == 'zstd':
+            return zstandard.ZstdDecompressor().decompressobj().decompress(content)
+        return content
+
+    def test_accept_encoding_quality_values(self):
+        self.assertEqual(accepted_encodings('gzip;q=0, zstd;q=0.5, BR , deflate;q=bad'), {'zstd', 'br'})
+        self.assertEqual(accepted_encodings(''), set())
+
+        cases = [('gzip', 'gzip'), ('identity', None), ('br', None), ('gzip;q=0', None),
+                 ('gzip;q=1.0, zstd;q=0', 'gzip')]
+        if zstandard is not None:
+            cases += [('gzip, zstd', 'zstd'), ('zstd;q=0.1, gzip;q=0', 'zstd')]
+        for accept_encoding, expected in cases:
+            response = self.respond(self.json_response(), accept_encoding)
+            self.assertEqual(response.get('Content-Encoding'), expected, accept_encoding)
+            self.assertEqual(self.decode(response), self.body, accept_encoding)
+
+    def test_compressed_responses_vary_on_accept_encoding(self):
+        response = self.respond(self.json_response(ETag='"v1"', Vary='Accept'), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept, Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"v1"')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+    @skipUnless(zstandard is not None, 'zstandard is not installed')
+    def test_zstd_response_headers(self):
+        response = self.respond(self.json_response(ETag='"v1"'), 'zstd')
+        self.assertEqual(response['Content-Encoding'], 'zstd')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"v1"')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(self.decode(response), self.body)
+
+    def test_small_responses_are_left_alone(self):
+        small = b'x' * (RESPONSE_COMPRESSION_MIN_BYTES - 1)
+        response = self.respond(self.json_response(small))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+        self.assertEqual(response.content, small)
+
+        response = self.respond(self.json_response(b'x' * RESPONSE_COMPRESSION_MIN_BYTES))
+        self.assertTrue(response.has_header('Content-Encoding'))
+
+    def test_encoded_ranged_and_compressed_formats_are_left_alone(self):
+        for response in (
+            self.json_response(**{'Content-Encoding': 'br'}),
+            self.json_response(**{'Accept-Ranges': 'bytes'}),
+            HttpResponse(self.body, content_type='application/pdf'),
+            StreamingHttpResponse(iter([self.body]), content_type='application/zip'),
+            StreamingHttpResponse(iter([self.body]), content_type='application/gzip'),
+            FileResponse(io.BytesIO(self.body),
+                         content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+        ):
+            encoding = response.get('Content-Encoding')
+            response = self.respond(response)
+            self.assertEqual(response.get('Content-Encoding'), encoding, response['Content-Type'])
+            self.assertFalse(response.has_header('Vary'), response['Content-Type'])
+            self.assertEqual(self.decode(response) if encoding is None else response.content, self.body)
+
+    def test_streaming_text_is_compressed_as_it_is_produced(self):
+        for accept_encoding in ('gzip', 'zstd') if zstandard is not None else ('gzip',):
+            chunks = [b'id,serial_number\r\n', *(f'{n},SN{n}\r\n'.encode() for n in range(500))]
+            response = self.respond(StreamingHttpResponse(iter(chunks), content_type='text/csv'), accept_encoding)
+            self.assertEqual(response['Content-Encoding'], accept_encoding)
+            self.assertFalse(response.has_header('Content-Length'))
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            self.assertEqual(self.decode(response), b''.join(chunks))
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def test_prefix_matching(self):
+        index = PrefixIndex(['Premium', 'basic', 'Basic Plus', 'premium', 'Enterprise', 'Basic Plus'])
+
+        self.assertEqual(len(index), 5)
+        self.assertEqual(index.match('BAS'), ['basic', 'Basic Plus'])
+        self.assertEqual(index.match('prem'), ['Premium', 'premium'])
+        self.assertEqual(index.match('basic p'), ['Basic Plus'])
+        self.assertEqual(index.match('z'), [])
+        self.assertEqual(index.match('Enterprises'), [])
+        self.assertEqual(index.match(''), ['basic', 'Basic Plus', 'Enterprise', 'Premium', 'premium'])
+
+    def test_limit(self):
+        index = PrefixIndex([f'TAG{n:03}' for n in range(50)] + ['OTHER'])
+
+        self.assertEqual(index.match('tag', 3), ['TAG000', 'TAG001', 'TAG002'])
+        self.assertEqual(index.match('TAG04', 100), [f'TAG04{n}' for n in range(10)])
+        self.assertEqual(index.match('', 2), ['OTHER', 'TAG000'])
+        self.assertEqual(len(index.match('')), 51)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        # Datacenter ids are reused between tests, so entries of an earlier test must not be served
+        autocomplete_cache.clear()
+        self.addCleanup(autocomplete_cache.clear)
+        self.datacenter = DataCenter.objects.create(name='DC1', description='Primary')
+        import_equipment_rows(self.datacenter, [
+            HEADER, *(equipment_row(n) for n in range(AUTOCOMPLETE_LIMIT + 5)),
+        ])
+        Equipment.objects.filter(serial_number='SN1').update(license_type='Premium')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('operator', password='secret'))
+        self.url = f'/api/datacenters/{self.datacenter.id}/equipments/'
+
+    def suggest(self, field, query=''):
+        response = self.client.get(f'{self.url}{field}/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_prefix_and_limit(self):
+        self.assertEqual(self.suggest('license-types'), ['Basic', 'Premium'])
+        self.assertEqual(self.suggest('license-types', '?q=pre'), ['Premium'])
+        self.assertEqual(self.suggest('service-tags', '?q=tag1&limit=3'), ['TAG1', 'TAG10', 'TAG11'])
+        # A query without a limit gets the default number of suggestions, no query gets everything
+        self.assertEqual(len(self.suggest('service-tags', '?q=tag')), AUTOCOMPLETE_LIMIT)
+        self.assertEqual(len(self.suggest('service-tags')), AUTOCOMPLETE_LIMIT + 5)
+        self.assertEqual(self.suggest('service-tags', '?q=TAG2&limit=0'), ['TAG2'])
+        self.assertEqual(self.suggest('service-tags', '?q=nope'), [])
+
+        response = self.client.get(f'{self.url}service-tags/?limit=ten')
+        self.assertEqual(response.status_code, 400)
+
+    def test_index_is_served_from_memory_until_the_data_version_changes(self):
+        self.assertEqual(self.suggest('license-types'), ['Basic', 'Premium'])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.suggest('license-types', '?q=b'), ['Basic'])
+        self.assertFalse(any('license_type' in query['sql'] for query in queries))
+
+        equipment = Equipment.objects.get(serial_number='SN2')
+        equipment.license_type = 'Enterprise'
+        equipment.save()
+        self.assertEqual(self.suggest('license-types'), ['Basic', 'Enterprise', 'Premium'])
+
+        Equipment.objects.get(serial_number='SN1').delete()
+        self.assertEqual(self.suggest('license-types'), ['Basic', 'Enterprise'])
+        self.assertNotIn('TAG1', self.suggest('service-tags', '?q=TAG1'))
+
+        import_equipment_rows(self.datacenter, [HEADER, equipment_row(1000)])
+        self.assertEqual(self.suggest('service-tags', '?q=tag100'), ['TAG1000'])
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = AutocompleteCache(max_size=2)
+        other = DataCenter.objects.create(name='DC2', description='Secondary')
+        cache.get(self.datacenter, 'license_type')
+        cache.get(self.datacenter, 'service_tag')
+        cache.get(self.datacenter, 'license_type')
+        cache.get(other, 'license_type')
+
+        self.assertEqual(list(cache.entries), [(self.datacenter.id, 'license_type'), (other.id, 'license_type')])
\ No newline at end of file
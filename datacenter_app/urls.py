@@ -13,7 +13,13 @@ urlpatterns = [
     # Protected API Routes
     path('datacenters/', DataCenterListView.as_view(), name='datacenter-list'),
     path('datacenters/<int:pk>/', DataCenterDetailView.as_view(), name='datacenter-detail'),
+    path('datacenters/export-excel/', ConsolidatedExportExcelView.as_view(), name='export_all_datacenters'),
+    path('datacenters/export-pdf/', ConsolidatedExportPDFView.as_view(), name='export_all_datacenters_pdf'),
+    path('datacenters/export-bundle/', ReportBundleView.as_view(), name='export_report_bundle'),
+    path('datacenters/export-jobs/<uuid:job_id>/', ExportJobStatusView.as_view(), name='consolidated_export_job_status'),
+    path('datacenters/export-jobs/<uuid:job_id>/download/', ExportJobDownloadView.as_view(), name='consolidated_export_job_download'),
 
+    path('equipments/search/', EquipmentSearchView.as_view(), name='equipment_search'),
     path('datacenters/<int:datacenter_id>/equipments/', EquipmentFetchView.as_view(), name='fetch_equipments'),
     path('datacenters/<int:datacenter_id>/equipments/add/', EquipmentAddToDataCenterView.as_view(), name='add-equipment-to-datacenter'),
     path('datacenters/<int:datacenter_id>/equipments/<int:equipment_id>/modify/', EquipmentModifyView.as_view(), name='modify_equipment'),
@@ -24,6 +30,15 @@ urlpatterns = [
     path('datacenters/<int:datacenter_id>/equipments/service-tags/', EquipmentServiceTagAutocompleteView.as_view(), name='service_tag_autocomplete'),
     path('datacenters/<int:datacenter_id>/equipments/export-excel/', EquipmentExportExcelView.as_view(), name='export_equipments'),
     path('datacenters/<int:datacenter_id>/equipments/export-pdf/', EquipmentExportPDFView.as_view(), name='export_equipments_pdf'),
+    path('datacenters/<int:datacenter_id>/equipments/export-csv/', EquipmentExportCSVView.as_view(), name='export_equipments_csv'),
+    path('datacenters/<int:datacenter_id>/equipments/export-ndjson/', EquipmentExportNDJSONView.as_view(), name='export_equipments_ndjson'),
+    path('datacenters/<int:datacenter_id>/equipments/export-jobs/<uuid:job_id>/', ExportJobStatusView.as_view(), name='export_job_status'),
+    path('datacenters/<int:datacenter_id>/equipments/export-jobs/<uuid:job_id>/download/', ExportJobDownloadView.as_view(), name='export_job_download'),
     path('datacenters/<int:datacenter_id>/equipments/import-excel/', EquipmentImportExcelView.as_view(), name='import_equipments_excel'),
+    path('datacenters/<int:datacenter_id>/equipments/uploads/', UploadSessionCreateView.as_view(), name='create_upload_session'),
+    path('datacenters/<int:datacenter_id>/equipments/uploads/<uuid:upload_id>/', UploadSessionView.as_view(), name='upload_session'),
+    path('datacenters/<int:datacenter_id>/equipments/uploads/<uuid:upload_id>/complete/', UploadSessionCompleteView.as_view(), name='complete_upload_session'),
+    path('datacenters/<int:datacenter_id>/equipments/import-jobs/<uuid:job_id>/', ImportJobStatusView.as_view(), name='import_job_status'),
+    path('datacenters/<int:datacenter_id>/equipments/import-jobs/<uuid:job_id>/errors/', ImportJobErrorReportView.as_view(), name='import_job_errors'),
     path('datacenters/<int:datacenter_id>/equipments/send-pdf/', EquipmentSendPDFByEmailView.as_view(), name='send_equipments_pdf_email'),
 ]
@@ -1,53 +1,219 @@
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from io import BytesIO
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
-
-def generate_equipment_pdf(equipments):
-    buffer = BytesIO()
-    
-    # Create a document with a page size of letter
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    
-    # Setup the table data (headers and rows)
-    data = [
-        ["ID", "Equipment Type", "Service Tag", "License Type", "Serial Number", "License Expiry Date"]
-    ]
-    
-    for equipment in equipments:
-        data.append([
-            str(equipment.id),
-            equipment.equipment_type,
-            equipment.service_tag,
-            equipment.license_type,
-            equipment.serial_number,
-            str(equipment.license_expired_date)
-        ])
-    
-    # Create the table with data
-    table = Table(data)
-    
-    # Add styling for the table
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),  # Header row background
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-        ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
-        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-        ("TOPPADDING", (0, 1), (-1, -1), 10),
-        ("BOTTOMPADDING", (0, 1), (-1, -1), 10),
-        ("LEFTPADDING", (0, 0), (-1, -1), 5),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 5),
-    ]))
-    
-    # Build the document (add the table to the PDF)
-    doc.build([table])
-    
+from functools import lru_cache
+from .exports import EXPORT_HEADERS, export_queryset, iter_export_rows, stream_xlsx
+from .export_cache import export_cache, export_cache_key
+
+# Rows are laid out one at a time as they are read from the cursor; a row
+# only grows past PDF_ROW_HEIGHT when a cell has to wrap.
+PDF_MARGIN = 36
+PDF_ROW_HEIGHT = 18
+PDF_HEADER_HEIGHT = 24
+PDF_CELL_PADDING = 5
+PDF_FONT = "Helvetica"
+PDF_HEADER_FONT = "Helvetica-Bold"
+PDF_FONT_SIZE = 8
+# Long values are drawn smaller, down to this size, before they are wrapped
+PDF_MIN_FONT_SIZE = 6
+PDF_LINE_SPACING = 1.2
+# Relative column widths for ID, type, service tag, license type, serial, expiry
+PDF_COLUMN_WEIGHTS = (0.7, 1.6, 1.3, 1.4, 1.5, 1.3)
+
+
+@lru_cache(maxsize=4096)
+def _fit_text(text, width, font, size):
+    """
+    Fit `text` in `width` points without dropping any of it: the font is
+    shrunk down to PDF_MIN_FONT_SIZE and, if that is not enough, the text is
+    wrapped. Returns the font size and a tuple of (line, drawn width).
+    Cached, since types and licenses repeat a lot.
+    """
+    text_width = stringWidth(text, font, size)
+    while text_width > width and size > PDF_MIN_FONT_SIZE:
+        size = max(size - 0.5, PDF_MIN_FONT_SIZE)
+        text_width = stringWidth(text, font, size)
+    if text_width <= width:
+        return size, ((text, text_width),)
+
+    # Serial numbers and service tags have no spaces, so wrap on characters
+    lines = []
+    line = ""
+    for char in text:
+        if line and stringWidth(line + char, font, size) > width:
+            lines.append(line)
+            line = char
+        else:
+            line += char
+    lines.append(line)
+    return size, tuple((line, stringWidth(line, font, size)) for line in lines)
+
+
+class EquipmentPDFRenderer:
+    """
+    Draws the equipment table directly on a reportlab canvas, page by page,
+    with the header repeated on each page. Only one page of rows is held at a
+    time; each page is compressed into the document as soon as it is drawn.
+    Values too long for their column are drawn smaller or wrapped, never cut.
+    """
+
+    def __init__(self, output, pagesize=letter, headers=EXPORT_HEADERS):
+        self.canvas = canvas.Canvas(output, pagesize=pagesize, pageCompression=1)
+        self.page_width, self.page_height = pagesize
+        self.headers = headers
+        self.page_count = 0
+        self.row_count = 0
+
+        table_width = self.page_width - 2 * PDF_MARGIN
+        total_weight = sum(PDF_COLUMN_WEIGHTS)
+        self.column_widths = [table_width * weight / total_weight for weight in PDF_COLUMN_WEIGHTS]
+        self.column_edges = [PDF_MARGIN]
+        for width in self.column_widths:
+            self.column_edges.append(self.column_edges[-1] + width)
+        self.column_centers = [
+            (left + right) / 2 for left, right in zip(self.column_edges, self.column_edges[1:])
+        ]
+        self.text_widths = [width - 2 * PDF_CELL_PADDING for width in self.column_widths]
+
+        self.body_height = self.page_height - 2 * PDF_MARGIN - PDF_HEADER_HEIGHT
+        self.table_top = self.page_height - PDF_MARGIN
+
+    def _layout_row(self, row):
+        """Fit each cell of `row` in its column; returns the row height and the cells."""
+        cells = [
+            _fit_text("" if value is None else str(value), width, PDF_FONT, PDF_FONT_SIZE)
+            for value, width in zip(row, self.text_widths)
+        ]
+        text_height = max(
+            (size * PDF_LINE_SPACING * len(lines) for size, lines in cells if len(lines) > 1), default=0
+        )
+        return max(PDF_ROW_HEIGHT, text_height + 2 * PDF_CELL_PADDING), cells
+
+    def _draw_header(self):
+        c = self.canvas
+        top = self.table_top
+        c.setFillColor(colors.grey)
+        c.rect(PDF_MARGIN, top - PDF_HEADER_HEIGHT, self.column_edges[-1] - PDF_MARGIN, PDF_HEADER_HEIGHT, stroke=0, fill=1)
+        c.setFillColor(colors.whitesmoke)
+        baseline = top - PDF_HEADER_HEIGHT / 2 - PDF_FONT_SIZE / 3
+        for header, center, width in zip(self.headers, self.column_centers, self.text_widths):
+            size, lines = _fit_text(header, width, PDF_HEADER_FONT, PDF_FONT_SIZE)
+            c.setFont(PDF_HEADER_FONT, size)
+            c.drawCentredString(center, baseline, "".join(line for line, _ in lines))
+
+    def _draw_page(self, page_rows):
+        """Draw one full page of laid out rows: body background, header, cells and grid."""
+        self.page_count += 1
+        self.row_count += len(page_rows)
+        c = self.canvas
+        top = self.table_top
+        body_top = top - PDF_HEADER_HEIGHT
+        bottom = body_top - sum(height for height, _ in page_rows)
+        right = self.column_edges[-1]
+
+        # One background rectangle for the body instead of one per cell
+        c.setFillColor(colors.whitesmoke)
+        c.rect(PDF_MARGIN, bottom, right - PDF_MARGIN, body_top - bottom, stroke=0, fill=1)
+        self._draw_header()
+
+        # All cells of the page go into a single text object
+        c.setFillColor(colors.black)
+        cells = c.beginText()
+        row_top = body_top
+        for height, row in page_rows:
+            middle = row_top - height / 2
+            for (size, lines), center in zip(row, self.column_centers):
+                cells.setFont(PDF_FONT, size)
+                leading = size * PDF_LINE_SPACING
+                # Lines are centred as a block in the row
+                baseline = middle + (len(lines) - 1) * leading / 2 - size / 3
+                for text, text_width in lines:
+                    cells.setTextOrigin(center - text_width / 2, baseline)
+                    cells.textOut(text)
+                    baseline -= leading
+            row_top -= height
+        c.drawText(cells)
+
+        c.setStrokeColor(colors.black)
+        c.setLineWidth(1)
+        for x in self.column_edges:
+            c.line(x, top, x, bottom)
+        c.line(PDF_MARGIN, top, right, top)
+        y = body_top
+        c.line(PDF_MARGIN, y, right, y)
+        for height, _ in page_rows:
+            y -= height
+            c.line(PDF_MARGIN, y, right, y)
+
+        c.setFont(PDF_FONT, PDF_FONT_SIZE)
+        c.drawRightString(right, PDF_MARGIN / 2, f"Page {self.page_count}")
+        c.showPage()
+
+    def render(self, rows):
+        """Lay out `rows` (tuples in EXPORT_HEADERS order) and finalise the document."""
+        page_rows = []
+        used_height = 0
+        for row in rows:
+            height, cells = self._layout_row(row)
+            if page_rows and used_height + height > self.body_height:
+                self._draw_page(page_rows)
+                page_rows = []
+                used_height = 0
+            page_rows.append((height, cells))
+            used_height += height
+        # Always emit at least one page so an empty report still has its header
+        if page_rows or not self.page_count:
+            self._draw_page(page_rows)
+        self.canvas.save()
+
+
+def generate_equipment_pdf(equipments, output=None):
+    """
+    Render the equipment report for a queryset (or an iterable of export row
+    tuples) into `output`, a new BytesIO by default, and return it rewound.
+    """
+    buffer = output if output is not None else BytesIO()
+
+    rows = iter_export_rows(equipments) if hasattr(equipments, 'values_list') else equipments
+    EquipmentPDFRenderer(buffer).render(rows)
+
     # Save and return the buffer with the PDF data
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
+
+
+def open_export(datacenter, file_format, service_tag=None, license_type=None):
+    """
+    Open the Excel ('xlsx') or PDF ('pdf') export of a datacenter for its
+    current data version, rendering it into the export cache on a miss.
+    """
+    cache_key = export_cache_key(datacenter, file_format, service_tag=service_tag, license_type=license_type)
+    equipments = export_queryset(datacenter, service_tag, license_type)
+
+    def render(output):
+        if file_format == 'pdf':
+            generate_equipment_pdf(equipments, output)
+        else:
+            output.writelines(stream_xlsx([("Equipments", EXPORT_HEADERS, iter_export_rows(equipments))]))
+
+    # Identical concurrent requests wait for one render and share it
+    return export_cache.get_or_write(cache_key, render)
+
+
+def iter_export(datacenter, file_format, service_tag=None, license_type=None, block_size=64 * 1024):
+    """
+    Yield the bytes of an Excel or PDF export, from the export cache when
+    possible. A miss is rendered into the cache first and then read back.
+    """
+    cache_key = export_cache_key(datacenter, file_format, service_tag=service_tag, license_type=license_type)
+    artifact = export_cache.open(cache_key)
+    if artifact is None:
+        if file_format == 'xlsx':
+            rows = iter_export_rows(export_queryset(datacenter, service_tag, license_type))
+            yield from export_cache.stream(cache_key, stream_xlsx([("Equipments", EXPORT_HEADERS, rows)]))
+            return
+        artifact = open_export(datacenter, file_format, service_tag, license_type)
+    with artifact:
+        yield from iter(lambda: artifact.read(block_size), b'')
\ No newline at end of file
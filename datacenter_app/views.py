@@ -1,6 +1,8 @@
 from rest_framework import status
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
@@ -9,15 +11,35 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from .models import *
 from .serializers import *
-import openpyxl
-from openpyxl.utils import get_column_letter
-from django.http import HttpResponse
-from .utils import generate_equipment_pdf
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from .utils import open_export
+from .export_cache import export_cache, export_cache_key
+from .consolidated import open_consolidated_export, stream_report_bundle
+from .exports import (
+    CSV_CONTENT_TYPE, EXPORT_FIELDS, EXPORT_HEADERS, GZIP_CONTENT_TYPE, NDJSON_CONTENT_TYPE, XLSX_CONTENT_TYPE,
+    export_queryset, gzip_stream, iter_export_rows, stream_csv, stream_ndjson, stream_xlsx,
+)
+from .importers import (
+    DATE_FORMAT_LABELS, AmbiguousDateFormatError, MissingColumnsError, detect_import_format,
+    import_equipment_file, resolve_date_format, stage_upload, append_upload_chunk, receive_upload_chunk
+)
+from .tasks import run_equipment_export, run_equipment_import
+from .http import negotiated_etag, not_modified, ranged_file_response, set_validators
+from .pagination import HistoryPagination, KeysetPagination
+from .renderers import ColumnarJSONRenderer
+from .autocomplete import AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_MAX_LIMIT, autocomplete_cache
+from .search import SEARCH_MAX_RESULT_LIMIT, SEARCH_RESULT_LIMIT, get_search_backend
 from django.core.mail import EmailMessage
 from django.conf import settings
 import binascii
-from openpyxl import load_workbook
 from django.utils import timezone
+from celery.result import AsyncResult
+import os
+import uuid
 
 # Custom Token View with better error handling
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -55,9 +77,20 @@ class DataCenterListView(APIView):
 
     def get(self, request):
         try:
-            data_centers = DataCenter.objects.all()
+            # Any datacenter added, removed, edited or with changed equipment moves the marker
+            marker = DataCenter.objects.aggregate(
+                count=Count('id'), version=Sum('data_version'), modified=Max('modified_at'),
+                stats_modified=Max('stats__updated_at'),
+            )
+            last_modified = max(filter(None, (marker['modified'], marker['stats_modified'])), default=timezone.now())
+            etag = negotiated_etag(request, f"datacenters-{marker['count']}-{marker['version'] or 0}-{last_modified.timestamp():.6f}")
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+
+            data_centers = DataCenter.objects.select_related('stats')
             serializer = DataCenterSerializer(data_centers, many=True)
-            return Response(serializer.data)
+            return set_validators(Response(serializer.data), etag, last_modified)
         except Exception as e:
             return Response(
                 {"error": "Failed to fetch datacenters"},
@@ -71,7 +104,7 @@ class DataCenterDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            data_center = DataCenter.objects.get(pk=pk)
+            data_center = DataCenter.objects.select_related('stats').get(pk=pk)
             serializer = DataCenterSerializer(data_center)
             return Response(serializer.data)
         except DataCenter.DoesNotExist:
@@ -84,8 +117,20 @@ class DataCenterDetailView(APIView):
                 {"error": "Failed to fetch datacenter details"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
-class EquipmentFetchView(APIView):
+
+class ColumnarListMixin:
+    """`?format=columnar` on an equipment list returns one array per field instead of one object per row."""
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+
+    def is_columnar(self, request):
+        return request.accepted_renderer.format == ColumnarJSONRenderer.format
+
+    def represent(self, request, serializer, rows):
+        if self.is_columnar(request):
+            return serializer.to_columns(rows)
+        return serializer.to_representation(rows)
+
+class EquipmentFetchView(ColumnarListMixin, APIView):
     def get(self, request, datacenter_id):
         # Get query parameters for search
         service_tag = request.GET.get('service_tag', '').strip()
@@ -95,22 +140,58 @@ class EquipmentFetchView(APIView):
             # Get the DataCenter by ID
             datacenter = DataCenter.objects.get(pk=datacenter_id)
 
+            # Nothing changed since the client's copy: answer without running the list query
+            etag = negotiated_etag(request, f"equipments-{datacenter.id}-{datacenter.data_version}")
+            response = not_modified(request, etag, datacenter.modified_at)
+            if response is not None:
+                return response
+
             # Start with all equipment for this datacenter
-            equipments = Equipment.objects.filter(datacenter=datacenter, is_deleted=False)
+            equipments = Equipment.live.filter(datacenter=datacenter)
 
-            # Apply search filters if provided
-            if service_tag:
-                equipments = equipments.filter(service_tag__icontains=service_tag)
-            if license_type:
-                equipments = equipments.filter(license_type__icontains=license_type)
+            # Apply search filters if provided (answered from the search index)
+            equipments = get_search_backend().filter(equipments, service_tag=service_tag, license_type=license_type)
 
-            # Serialize the equipment data
-            serializer = EquipmentSerializer(equipments, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            # Only the requested columns (?fields=), serialized straight from values() rows
+            try:
+                serializer = EquipmentValuesSerializer(request.GET.get('fields'), datacenter=datacenter)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Opt-in keyset pagination (?page_size= / ?cursor=), full list otherwise
+            paginator = KeysetPagination()
+            rows = serializer.values(equipments, *paginator.seek_columns(request))
+            page = paginator.paginate_queryset(rows, request, view=self)
+            if page is not None:
+                response = paginator.get_paginated_response(self.represent(request, serializer, page))
+                return set_validators(response, etag, datacenter.modified_at)
+
+            data = self.represent(request, serializer, serializer.values(equipments).order_by('id'))
+            return set_validators(Response(data, status=status.HTTP_200_OK), etag, datacenter.modified_at)
 
         except DataCenter.DoesNotExist:
             return Response({"error": "DataCenter not found"}, status=status.HTTP_404_NOT_FOUND)
 
+class EquipmentSearchView(APIView):
+    """Search live equipment of every datacenter by service tag, serial number, license or type."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return Response({"error": "Query parameter 'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.GET.get('limit', SEARCH_RESULT_LIMIT)), 1), SEARCH_MAX_RESULT_LIMIT)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        equipments = Equipment.live.select_related('datacenter')
+        equipments = get_search_backend().search(equipments, query).order_by('id')[:limit]
+        serializer = EquipmentSearchSerializer(equipments, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 class EquipmentAddToDataCenterView(APIView):
     def post(self, request, datacenter_id):
         try:
@@ -137,7 +218,7 @@ class EquipmentModifyView(APIView):
             datacenter = DataCenter.objects.get(pk=datacenter_id)
 
             # Retrieve the Equipment instance by its ID
-            equipment = Equipment.objects.get(pk=equipment_id, datacenter=datacenter, is_deleted=False)
+            equipment = Equipment.live.get(pk=equipment_id, datacenter=datacenter)
 
             # Use the ModifyEquipmentSerializer to validate and update the data
             serializer = ModifyEquipmentSerializer(equipment, data=request.data, partial=True)
@@ -165,7 +246,7 @@ class EquipmentDeleteView(APIView):
             datacenter = DataCenter.objects.get(pk=datacenter_id)
 
             # Retrieve the Equipment instance by its ID and check if it belongs to the specified DataCenter
-            equipment = Equipment.objects.get(pk=equipment_id, datacenter=datacenter, is_deleted=False)
+            equipment = Equipment.live.get(pk=equipment_id, datacenter=datacenter)
             
             # Store equipment info for response
             equipment_info = {
@@ -208,7 +289,7 @@ class EquipmentDeleteView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # New view to fetch soft-deleted equipment (history)
-class EquipmentHistoryView(APIView):
+class EquipmentHistoryView(ColumnarListMixin, APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
@@ -216,13 +297,35 @@ class EquipmentHistoryView(APIView):
         try:
             datacenter = DataCenter.objects.get(pk=datacenter_id)
 
+            etag = negotiated_etag(request, f"history-{datacenter.id}-{datacenter.data_version}")
+            response = not_modified(request, etag, datacenter.modified_at)
+            if response is not None:
+                return response
+
             deleted_equipments = Equipment.objects.filter(datacenter=datacenter, is_deleted=True)
 
-            serializer = EquipmentSerializer(deleted_equipments, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            try:
+                serializer = EquipmentValuesSerializer(request.GET.get('fields'), datacenter=datacenter)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Opt-in keyset pagination (?page_size= / ?cursor=), full list otherwise
+            paginator = HistoryPagination()
+            rows = serializer.values(deleted_equipments, *paginator.seek_columns(request))
+            page = paginator.paginate_queryset(rows, request, view=self)
+            if page is not None:
+                response = paginator.get_paginated_response(self.represent(request, serializer, page))
+                return set_validators(response, etag, datacenter.modified_at)
+
+            rows = serializer.values(deleted_equipments).order_by(F('deleted_at').desc(nulls_last=True), '-id')
+            return set_validators(Response(self.represent(request, serializer, rows), status=status.HTTP_200_OK),
+                                  etag, datacenter.modified_at)
 
         except DataCenter.DoesNotExist:
             return Response({"error": "DataCenter not found"}, status=status.HTTP_404_NOT_FOUND)
+        except NotFound:
+            # An invalid cursor; left to DRF's exception handler
+            raise
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -250,37 +353,88 @@ class EquipmentRestoreView(APIView):
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class EquipmentLicenseTypeAutocompleteView(APIView):
+class EquipmentAutocompleteView(APIView):
+    """
+    Distinct values of `field` among the datacenter's live equipment, served
+    from an in-memory prefix index. `?q=` filters by (case-insensitive)
+    prefix and `?limit=` caps the suggestions; without either the full
+    list is returned.
+    """
+    field = None
+
     def get(self, request, datacenter_id):
         try:
             # Get the DataCenter by ID
             datacenter = DataCenter.objects.get(pk=datacenter_id)
 
-            # Get all distinct license types for the equipments in the given DataCenter
-            license_types = Equipment.objects.filter(datacenter=datacenter, is_deleted=False).values_list('license_type', flat=True).distinct()
+            etag = negotiated_etag(request, f"{self.field}s-{datacenter.id}-{datacenter.data_version}")
+            response = not_modified(request, etag, datacenter.modified_at)
+            if response is not None:
+                return response
 
-            # Return the license types as a list
-            return Response(list(license_types), status=status.HTTP_200_OK)
+            query = request.GET.get('q', '').strip()
+            limit = request.GET.get('limit')
+            try:
+                if limit is not None:
+                    limit = min(max(int(limit), 1), AUTOCOMPLETE_MAX_LIMIT)
+                elif query:
+                    limit = AUTOCOMPLETE_LIMIT
+            except ValueError:
+                return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Rebuilt from the database only after the datacenter's equipment changed
+            index = autocomplete_cache.get(datacenter, self.field)
+            response = Response(index.match(query, limit), status=status.HTTP_200_OK)
+            return set_validators(response, etag, datacenter.modified_at)
 
         except DataCenter.DoesNotExist:
             return Response({"error": "DataCenter not found"}, status=status.HTTP_404_NOT_FOUND)
-        
-class EquipmentServiceTagAutocompleteView(APIView):
-    def get(self, request, datacenter_id):
-        try:
-            # Get the DataCenter by ID
-            datacenter = DataCenter.objects.get(pk=datacenter_id)
 
-            # Get all distinct service tags for the equipments in the given DataCenter
-            service_tags = Equipment.objects.filter(datacenter=datacenter, is_deleted=False).values_list('service_tag', flat=True).distinct()
+class EquipmentLicenseTypeAutocompleteView(EquipmentAutocompleteView):
+    field = 'license_type'
 
-            # Return the service tags as a list
-            return Response(list(service_tags), status=status.HTTP_200_OK)
+class EquipmentServiceTagAutocompleteView(EquipmentAutocompleteView):
+    field = 'service_tag'
 
-        except DataCenter.DoesNotExist:
-            return Response({"error": "DataCenter not found"}, status=status.HTTP_404_NOT_FOUND)
-        
-class EquipmentExportExcelView(APIView):
+class ExportJobMixin:
+    """
+    `?async=1` on an export view queues a background ExportJob instead of
+    rendering in the request. Jobs belong to the user who queued them, so
+    this mode requires authentication even where the export itself does not.
+    """
+
+    def wants_async(self, request):
+        return request.GET.get('async', '').lower() in ('1', 'true', 'yes')
+
+    def queue_export(self, request, datacenter, file_format, service_tag, license_type):
+        if not request.user.is_authenticated:
+            return Response({"error": "Authentication required"}, status=401)
+
+        job = ExportJob.objects.create(datacenter=datacenter, created_by=request.user, file_format=file_format,
+                                       service_tag=service_tag or '', license_type=license_type or '')
+        try:
+            run_equipment_export.apply_async(args=[str(job.id)], task_id=str(job.id))
+        except Exception as e:
+            print(f"Failed to queue export job {job.id}: {e}")
+            job.delete()
+            return Response({
+                "error": "Background export queue is unavailable",
+                "details": str(e)
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        print(f"Queued {file_format} export job {job.id} for {datacenter.name if datacenter else 'all datacenters'}")
+        if datacenter is None:
+            status_url = reverse('consolidated_export_job_status', args=[job.id])
+        else:
+            status_url = reverse('export_job_status', args=[datacenter.id, job.id])
+        return Response({
+            "message": "Export queued.",
+            "job_id": str(job.id),
+            "status": job.status,
+            "status_url": status_url
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class EquipmentExportExcelView(ExportJobMixin, APIView):
     def get(self, request, datacenter_id):
         # Get query parameters for filtering
         service_tag = request.GET.get('service_tag', None)
@@ -290,50 +444,83 @@ class EquipmentExportExcelView(APIView):
             # Get the DataCenter by ID
             datacenter = DataCenter.objects.get(pk=datacenter_id)
 
-            # Get all equipments for the given DataCenter
-            equipments = Equipment.objects.filter(datacenter=datacenter, is_deleted=False)
-
-            # Apply filters if provided
-            if service_tag:
-                equipments = equipments.filter(service_tag__icontains=service_tag)
-            if license_type:
-                equipments = equipments.filter(license_type__icontains=license_type)
-
-            # Create a new Excel workbook and worksheet
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Equipments"
-
-            # Add headers to the worksheet
-            headers = ["ID", "Equipment Type", "Service Tag", "License Type", "Serial Number", "License Expiry Date"]
-            for col_num, header in enumerate(headers, 1):
-                col_letter = get_column_letter(col_num)
-                ws[f"{col_letter}1"] = header
-
-            # Add equipment data to the worksheet
-            for row_num, equipment in enumerate(equipments, 2):
-                ws[f"A{row_num}"] = equipment.id
-                ws[f"B{row_num}"] = equipment.equipment_type
-                ws[f"C{row_num}"] = equipment.service_tag
-                ws[f"D{row_num}"] = equipment.license_type
-                ws[f"E{row_num}"] = equipment.serial_number
-                ws[f"F{row_num}"] = equipment.license_expired_date
-
-            # Create the HttpResponse for file download
-            response = HttpResponse(
-                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            # Background mode: render in a Celery worker and download later
+            if self.wants_async(request):
+                return self.queue_export(request, datacenter, ExportJob.FORMAT_XLSX, service_tag, license_type)
+
+            # Get all equipments for the given DataCenter, with filters if provided
+            equipments = export_queryset(datacenter, service_tag, license_type)
+
+            # Repeat downloads of unchanged data are served from the export cache
+            cache_key = export_cache_key(datacenter, 'xlsx', service_tag=service_tag, license_type=license_type)
+            cached = export_cache.open(cache_key)
+            if cached is not None:
+                response = FileResponse(cached, content_type=XLSX_CONTENT_TYPE)
+            else:
+                # Render the workbook into the cache when the download starts, then send the cached file
+                workbook = stream_xlsx([("Equipments", EXPORT_HEADERS, iter_export_rows(equipments))])
+                response = StreamingHttpResponse(export_cache.stream(cache_key, workbook), content_type=XLSX_CONTENT_TYPE)
             response['Content-Disposition'] = f'attachment; filename="equipments_{datacenter_id}.xlsx"'
-
-            # Save the workbook to the HttpResponse
-            wb.save(response)
             return response
 
         except DataCenter.DoesNotExist:
             return Response({"error": "DataCenter not found"}, status=404)
-        
 
-class EquipmentExportPDFView(APIView):
+
+class EquipmentExportStreamView(APIView):
+    """
+    Machine-friendly export of the same filtered set as the Excel export.
+
+    Rows are generated lazily from a chunked cursor; `?gzip=1` compresses
+    the stream on the fly and serves it as a .gz download.
+    """
+    file_extension = None
+    content_type = None
+
+    def render(self, rows):
+        raise NotImplementedError
+
+    def get(self, request, datacenter_id):
+        service_tag = request.GET.get('service_tag', None)
+        license_type = request.GET.get('license_type', None)
+        use_gzip = request.GET.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+        try:
+            datacenter = DataCenter.objects.get(pk=datacenter_id)
+        except DataCenter.DoesNotExist:
+            return Response({"error": "DataCenter not found"}, status=404)
+
+        equipments = export_queryset(datacenter, service_tag, license_type)
+        content = self.render(iter_export_rows(equipments))
+        file_name = f"equipments_{datacenter_id}.{self.file_extension}"
+        content_type = self.content_type
+        if use_gzip:
+            content = gzip_stream(content)
+            file_name += ".gz"
+            content_type = GZIP_CONTENT_TYPE
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{file_name}"'
+        return response
+
+
+class EquipmentExportCSVView(EquipmentExportStreamView):
+    file_extension = "csv"
+    content_type = CSV_CONTENT_TYPE
+
+    def render(self, rows):
+        return stream_csv(EXPORT_HEADERS, rows)
+
+
+class EquipmentExportNDJSONView(EquipmentExportStreamView):
+    file_extension = "ndjson"
+    content_type = NDJSON_CONTENT_TYPE
+
+    def render(self, rows):
+        return stream_ndjson(EXPORT_FIELDS, rows)
+
+
+class EquipmentExportPDFView(ExportJobMixin, APIView):
     def get(self, request, datacenter_id):
         # Get query parameters for filtering
         service_tag = request.GET.get('service_tag', None)
@@ -343,20 +530,15 @@ class EquipmentExportPDFView(APIView):
             # Get the DataCenter by ID
             datacenter = DataCenter.objects.get(pk=datacenter_id)
 
-            # Get all equipments for the given DataCenter
-            equipments = Equipment.objects.filter(datacenter=datacenter, is_deleted=False)
-
-            # Apply filters if provided
-            if service_tag:
-                equipments = equipments.filter(service_tag__icontains=service_tag)
-            if license_type:
-                equipments = equipments.filter(license_type__icontains=license_type)
+            # Background mode: render in a Celery worker and download later
+            if self.wants_async(request):
+                return self.queue_export(request, datacenter, ExportJob.FORMAT_PDF, service_tag, license_type)
 
-            # Generate the PDF file
-            pdf_buffer = generate_equipment_pdf(equipments)
+            # Generate the PDF file, unless it is cached for the current data version
+            pdf_file = open_export(datacenter, 'pdf', service_tag, license_type)
 
             # Create the HTTP Response for file download
-            response = HttpResponse(pdf_buffer, content_type='application/pdf')
+            response = FileResponse(pdf_file, content_type='application/pdf')
             response['Content-Disposition'] = f'attachment; filename="equipments_{datacenter_id}.pdf"'
             return response
 
@@ -383,77 +565,31 @@ class EquipmentImportExcelView(APIView):
             print(error_msg)
             return Response({"error": error_msg}, status=400)
             
-        excel_file = request.FILES['file']
+        return self.import_file(request, datacenter_id, request.FILES['file'])
+
+    def import_file(self, request, datacenter_id, excel_file):
+        """Import an uploaded (or reassembled) file; query options are read from `request`."""
         print(f"Processing file: {excel_file.name} ({excel_file.size} bytes)")
-        
+
         try:
             # Check file extension
-            if not excel_file.name.lower().endswith(('.xlsx', '.xls')):
-                error_msg = f"Invalid file type: {excel_file.name}. Please upload a valid Excel file (.xlsx or .xls)."
+            file_format = detect_import_format(excel_file.name, excel_file.content_type)
+            if file_format is None:
+                error_msg = f"Invalid file type: {excel_file.name}. Please upload a valid Excel (.xlsx or .xls), CSV or NDJSON file."
                 print(error_msg)
                 return Response({"error": error_msg}, status=400)
 
-            try:
-                # Read the Excel file
-                wb = load_workbook(excel_file, data_only=True)
-                ws = wb.active
-
-                # Get headers from first row and create a mapping of lowercase header to column index
-                headers = []
-                header_map = {}
-                for idx, cell in enumerate(ws[1]):
-                    header = str(cell.value).strip().lower() if cell.value else f"column_{idx+1}"
-                    headers.append(header)
-                    header_map[header] = idx
-
-                # Map headers to their positions
-                header_positions = {}
-                for idx, header in enumerate(headers):
-                    header_lower = str(header).lower().strip()
-                    header_positions[header_lower] = idx
-
-                # Map of possible column names to their standard names and positions
-                column_mapping = {
-                    'equipment type': ('equipment_type', 'equipment type', 'type', 'equipment'),
-                    'service tag': ('service_tag', 'service tag', 'service', 'tag'),
-                    'license type': ('license_type', 'license type', 'license'),
-                    'serial number': ('serial_number', 'serial number', 'serial', 'sn'),
-                    'license expiry date': ('license_expired_date', 'license expiry', 'expiry date', 'expires', 'expiry')
-                }
-
-                # Find column positions
-                column_positions = {}
-                for display_name, aliases in column_mapping.items():
-                    for alias in aliases:
-                        if alias in header_positions:
-                            column_positions[display_name] = header_positions[alias]
-                            break
-
-                # Check for required columns
-                required_columns = ['equipment type', 'service tag', 'license type', 'serial number']
-                missing_columns = [col for col in required_columns if col not in column_positions]
-                
-                if missing_columns:
+            # Optional explicit expiry date format; inferred from the file otherwise
+            date_format = None
+            if request.GET.get('date_format'):
+                date_format = resolve_date_format(request.GET['date_format'])
+                if date_format is None:
                     return Response({
-                        "error": "Missing required columns in the Excel file.",
-                        "missing_columns": missing_columns,
-                        "available_columns": headers
+                        "error": f"Unsupported date format: {request.GET['date_format']}",
+                        "supported_formats": list(DATE_FORMAT_LABELS.values())
                     }, status=400)
 
-                # Map of display names to model fields
-                field_mapping = {
-                    'equipment type': {'field': 'equipment_type', 'required': True},
-                    'service tag': {'field': 'service_tag', 'required': True},
-                    'license type': {'field': 'license_type', 'required': True},
-                    'serial number': {'field': 'serial_number', 'required': True},
-                    'license expiry date': {'field': 'license_expired_date', 'required': False}
-                }
-
-
-                new_equipments = []
-                updated_count = 0
-                error_messages = []
-                
+            try:
                 # Get the datacenter object
                 try:
                     datacenter = DataCenter.objects.get(pk=datacenter_id)
@@ -461,192 +597,94 @@ class EquipmentImportExcelView(APIView):
                 except DataCenter.DoesNotExist:
                     return Response({"error": f"DataCenter with ID {datacenter_id} not found"}, status=404)
 
-                # Process each row starting from row 2
-                print("\n=== Starting to process rows ===")
-                for row_num, row in enumerate(ws.iter_rows(min_row=2), start=2):
-                    try:
-                        print(f"\n--- Processing row {row_num} ---")
-                        row_values = [cell.value for cell in row]
-                        print(f"Row values: {row_values}")
-                        
-                        # Skip empty rows
-                        if all(cell.value is None for cell in row):
-                            print(f"Row {row_num}: Skipping empty row")
-                            continue
-                            
-                        equipment_data = {}
-                        
-                        # Extract data based on column positions
-                        print("Extracting data from columns:")
-                        for display_name, field_info in field_mapping.items():
-                            field_name = field_info['field']
-                            is_required = field_info['required']
-                            
-                            if display_name in column_positions:
-                                col_idx = column_positions[display_name]
-                                if col_idx < len(row):
-                                    value = row[col_idx].value
-                                    print(f"  {display_name} (col {col_idx}): {value} (type: {type(value).__name__ if value else 'None'})")
-                                    
-                                    # Skip None values for non-required fields
-                                    if value is None and not is_required:
-                                        print(f"  - Skipping optional field {field_name}: None")
-                                        continue
-                                        
-                                    if value is not None:
-                                        # Convert to string for text fields
-                                        if field_name != 'license_expired_date':
-                                            equipment_data[field_name] = str(value).strip()
-                                            print(f"  - Set {field_name} = {equipment_data[field_name]}")
-                                        # Handle date field
-                                        elif value:
-                                            if hasattr(value, 'strftime'):  # Already a date object
-                                                equipment_data[field_name] = value.date() if hasattr(value, 'date') else value
-                                                print(f"  - Set date from date object: {equipment_data[field_name]}")
-                                            else:
-                                                try:
-                                                    # Try to parse date string
-                                                    from datetime import datetime
-                                                    value_str = str(value).strip()
-                                                    if value_str:  # Only try to parse if not empty string
-                                                        for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d', '%d-%m-%Y', '%m-%d-%Y'):
-                                                            try:
-                                                                equipment_data[field_name] = datetime.strptime(value_str, fmt).date()
-                                                                print(f"  - Parsed date '{value_str}' as {equipment_data[field_name]} with format '{fmt}'")
-                                                                break
-                                                            except ValueError:
-                                                                continue
-                                                except Exception as e:
-                                                    print(f"Error parsing date '{value}': {str(e)}")
-                                                    equipment_data[field_name] = None
-                            else:
-                                print(f"  {display_name}: Column not found")
-                        
-                        # Skip empty rows
-                        print(f"Equipment data extracted: {equipment_data}")
-                        if not any(equipment_data.values()):
-                            error_msg = f"Row {row_num}: Empty row skipped"
-                            error_messages.append(error_msg)
-                            print(error_msg)
-                            continue
-                            
-                        print(f"Row {row_num} data after extraction:")
-                        for k, v in equipment_data.items():
-                            print(f"  {k}: {v} (type: {type(v).__name__ if v else 'None'})")
-
-                        # Debug log the row data with column names
-                        print(f"\nProcessing row {row_num}:")
-                        for col_name, value in equipment_data.items():
-                            print(f"  {col_name}: {value} (type: {type(value).__name__})")
-
-                        # Validate required fields with more details
-                        required_fields = {
-                            'equipment_type': 'Equipment Type',
-                            'service_tag': 'Service Tag',
-                            'license_type': 'License Type',
-                            'serial_number': 'Serial Number'
-                        }
-                        
-                        # Make license_expired_date optional and set a default future date if not provided
-                        if 'license_expired_date' not in equipment_data or equipment_data['license_expired_date'] is None:
-                            from datetime import datetime, timedelta
-                            equipment_data['license_expired_date'] = (datetime.now() + timedelta(days=365)).date()  # Default to 1 year from now
-                        
-                        missing_fields = []
-                        for field, display_name in required_fields.items():
-                            value = equipment_data.get(field)
-                            if not value and value != 0:  # 0 is valid for some fields
-                                missing_fields.append(display_name)
-                            elif isinstance(value, str) and not value.strip():
-                                missing_fields.append(f"{display_name} (empty string)")
-                        
-                        if missing_fields:
-                            error_msg = (f"Row {row_num}: Missing or empty required fields: {', '.join(missing_fields)}. "
-                                        f"Available columns: {', '.join(equipment_data.keys())}")
-                            error_messages.append(error_msg)
-                            print(f"ERROR: {error_msg}")
-                            continue
-
-                        # Just validate the serial number is present
-                        try:
-                            serial = str(equipment_data.get('serial_number', '')).strip()
-                            if not serial:
-                                error_msg = f"Row {row_num}: Empty serial number"
-                                error_messages.append(error_msg)
-                                print(error_msg)
-                                continue
-                        except Exception as e:
-                            error_msg = f"Row {row_num}: Invalid serial number - {str(e)}"
-                            error_messages.append(error_msg)
-                            print(error_msg)
-                            continue
-
-                        try:
-                            serial = str(equipment_data['serial_number']).strip()
-                            
-                            # Check if equipment with this serial number already exists
-                            existing_equipment = Equipment.objects.filter(serial_number=serial).first()
-                            
-                            if existing_equipment:
-                                # Update existing equipment
-                                existing_equipment.equipment_type = str(equipment_data['equipment_type']).strip()
-                                existing_equipment.service_tag = str(equipment_data['service_tag']).strip()
-                                existing_equipment.license_type = str(equipment_data['license_type']).strip()
-                                existing_equipment.license_expired_date = equipment_data['license_expired_date']
-                                existing_equipment.datacenter = datacenter
-                                existing_equipment.full_clean()
-                                existing_equipment.save()
-                                print(f"Row {row_num}: Updated existing equipment - {existing_equipment}")
-                                updated_count += 1
-                            else:
-                                # Create new equipment
-                                equipment = Equipment(
-                                    equipment_type=str(equipment_data['equipment_type']).strip(),
-                                    service_tag=str(equipment_data['service_tag']).strip(),
-                                    license_type=str(equipment_data['license_type']).strip(),
-                                    serial_number=serial,
-                                    license_expired_date=equipment_data['license_expired_date'],
-                                    datacenter=datacenter
-                                )
-                                equipment.full_clean()
-                                equipment.save()
-                                new_equipments.append(equipment)
-                                print(f"Row {row_num}: Added new equipment - {equipment}")
-                                
-                            print(f"Assigned to datacenter: {datacenter.name} (ID: {datacenter.id})")
-                        except Exception as e:
-                            error_msg = f"Row {row_num}: Error creating equipment - {str(e)}"
-                            error_messages.append(error_msg)
-                            print(error_msg)
-
-                    except Exception as e:
-                        error_messages.append(f"Row {row_num}: {str(e)}")
-                        continue
+                # Dry run: report what the import would change without writing anything
+                dry_run = request.GET.get('dry_run', '').lower() in ('1', 'true', 'yes')
 
-                # Create each equipment individually to handle duplicates
-                created_count = 0
-                for equipment in new_equipments:
+                # Background mode: stage the upload to disk and hand it to Celery
+                if not dry_run and request.GET.get('async', '').lower() in ('1', 'true', 'yes'):
+                    job = ImportJob(datacenter=datacenter, created_by=request.user, file_name=excel_file.name,
+                                    date_format=DATE_FORMAT_LABELS.get(date_format, ''))
+                    job.file_path = stage_upload(excel_file, job.id, file_format)
+                    job.save()
                     try:
-                        equipment.save()
-                        created_count += 1
+                        run_equipment_import.apply_async(args=[str(job.id)], task_id=str(job.id))
                     except Exception as e:
-                        error_messages.append(f"Error saving equipment {equipment.service_tag}: {str(e)}")
-                        continue
+                        print(f"Failed to queue import job {job.id}: {e}")
+                        if os.path.exists(job.file_path):
+                            os.remove(job.file_path)
+                        job.delete()
+                        return Response({
+                            "error": "Background import queue is unavailable",
+                            "details": str(e)
+                        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+                    print(f"Queued import job {job.id} for {excel_file.name}")
+                    return Response({
+                        "message": "Import queued.",
+                        "job_id": str(job.id),
+                        "status": job.status,
+                        "status_url": reverse('import_job_status', args=[datacenter.id, job.id])
+                    }, status=status.HTTP_202_ACCEPTED)
+
+                # Stream the sheet through header detection, row normalisation,
+                # validation and batched bulk_create/bulk_update in one transaction
+                # (or a read-only diff against the existing equipment for a dry run)
+                try:
+                    result = import_equipment_file(datacenter, excel_file, file_format,
+                                                   date_format=date_format, dry_run=dry_run)
+                except MissingColumnsError as e:
+                    return Response({
+                        "error": "Missing required columns in the uploaded file.",
+                        "missing_columns": e.missing_columns,
+                        "available_columns": e.available_columns
+                    }, status=400)
+                except AmbiguousDateFormatError as e:
+                    return Response({
+                        "error": "Could not determine the license expiry date format.",
+                        "candidate_formats": e.candidate_formats,
+                        "suggestion": "Pass the format explicitly, e.g. ?date_format=DD/MM/YYYY."
+                    }, status=400)
+
+                if dry_run:
+                    return Response({
+                        "dry_run": True,
+                        "message": f"{result.created_count} would be created, {result.updated_count} updated "
+                                   f"({result.moved_count} moved from another datacenter), "
+                                   f"{result.unchanged_count} unchanged, {len(result.errors)} rejected.",
+                        "create_count": result.created_count,
+                        "update_count": result.updated_count,
+                        "move_count": result.moved_count,
+                        "unchanged_count": result.unchanged_count,
+                        "error_count": len(result.errors),
+                        "field_change_counts": dict(result.field_change_counts),
+                        "updates": result.updates,
+                        "updates_truncated": result.updated_count > len(result.updates),
+                        "date_format": result.date_format,
+                        "errors": result.errors.messages,
+                        "errors_truncated": result.errors.truncated,
+                    }, status=status.HTTP_200_OK)
+
+                error_messages = result.errors
+                created_count = result.created_count
+                updated_count = result.updated_count
+                print(f"Import finished: {created_count} created, {updated_count} updated in {datacenter.name} (ID: {datacenter.id})")
 
                 # Prepare response
                 response_data = {
-                    "message": f"Successfully processed {len(new_equipments) + updated_count} equipment items ({len(new_equipments)} new, {updated_count} updated).",
-                    "imported_count": len(new_equipments),
+                    "message": f"Successfully processed {created_count + updated_count + result.unchanged_count} equipment items ({created_count} new, {updated_count} updated, {result.unchanged_count} unchanged).",
+                    "imported_count": created_count,
                     "updated_count": updated_count,
+                    "unchanged_count": result.unchanged_count,
                     "error_count": len(error_messages),
+                    "date_format": result.date_format,
                 }
                 
                 if error_messages:
-                    response_data["errors"] = error_messages
+                    response_data["errors"] = error_messages.messages
+                    response_data["errors_truncated"] = error_messages.truncated
                     response_data["suggestions"] = [
                         "Please check that all required fields are present and correctly formatted.",
                         "Ensure serial numbers are unique.",
-                        "Check that date fields are in a valid format (YYYY-MM-DD, DD/MM/YYYY, or MM/DD/YYYY)."
+                        f"Check that all dates in the file use the same format (this file was read as {result.date_format})."
                     ]
 
                 return Response(response_data, status=status.HTTP_200_OK)
@@ -654,9 +692,9 @@ class EquipmentImportExcelView(APIView):
             except Exception as e:
                 import traceback
                 error_trace = traceback.format_exc()
-                print(f"Error processing Excel file: {error_trace}")
+                print(f"Error processing import file: {error_trace}")
                 return Response({
-                    "error": "Error processing Excel file",
+                    "error": "Error processing import file",
                     "details": str(e),
                     "suggestion": "Please check the file format and ensure all required columns are present.",
                     "required_columns": ["Equipment Type", "Service Tag", "License Type", "Serial Number"],
@@ -676,6 +714,339 @@ class EquipmentImportExcelView(APIView):
             }, status=500)
 
 
+class UploadSessionCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request, datacenter_id):
+        file_name = str(request.data.get('file_name', '')).strip()
+        content_type = str(request.data.get('content_type', '')).strip()
+        if not file_name:
+            return Response({"error": "file_name is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if detect_import_format(file_name, content_type) is None:
+            return Response({
+                "error": f"Invalid file type: {file_name}. Please upload a valid Excel (.xlsx or .xls), CSV or NDJSON file."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        total_size = request.data.get('total_size')
+        if total_size not in (None, ''):
+            try:
+                total_size = int(total_size)
+                if total_size < 0:
+                    raise ValueError
+            except (TypeError, ValueError):
+                return Response({"error": "total_size must be a non-negative integer"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            total_size = None
+
+        try:
+            datacenter = DataCenter.objects.get(pk=datacenter_id)
+        except DataCenter.DoesNotExist:
+            return Response({"error": "DataCenter not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        session = UploadSession(datacenter=datacenter, created_by=request.user, file_name=file_name,
+                                content_type=content_type, total_size=total_size)
+        upload_dir = os.path.join(settings.IMPORT_STAGING_DIR, 'uploads')
+        os.makedirs(upload_dir, exist_ok=True)
+        session.file_path = os.path.join(upload_dir, f"{session.id}.part")
+        open(session.file_path, 'wb').close()
+        session.save()
+
+        return Response({
+            "upload_id": str(session.id),
+            "offset": 0,
+            "max_chunk_size": settings.UPLOAD_CHUNK_MAX_SIZE,
+            "upload_url": reverse('upload_session', args=[datacenter.id, session.id]),
+            "complete_url": reverse('complete_upload_session', args=[datacenter.id, session.id])
+        }, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionView(APIView):
+    """
+    Chunk endpoint of a resumable upload.
+
+    PUT sends the raw chunk bytes as the request body with the `X-Upload-Offset`
+    and `X-Chunk-SHA256` headers. GET returns the offset to resume from.
+    Sessions are only visible to the user who created them.
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request, datacenter_id, upload_id):
+        try:
+            session = UploadSession.objects.get(pk=upload_id, datacenter_id=datacenter_id, created_by=request.user)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload session not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "upload_id": str(session.id),
+            "file_name": session.file_name,
+            "offset": session.received_bytes,
+            "total_size": session.total_size,
+            "complete": session.is_complete
+        }, status=status.HTTP_200_OK)
+
+    def put(self, request, datacenter_id, upload_id):
+        try:
+            offset = int(request.headers.get('X-Upload-Offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({"error": "X-Upload-Offset header must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        checksum = request.headers.get('X-Chunk-SHA256', '')
+        if not checksum:
+            return Response({"error": "X-Chunk-SHA256 header is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if length <= 0:
+            return Response({"error": "Empty chunk"}, status=status.HTTP_400_BAD_REQUEST)
+        if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+            return Response({
+                "error": f"Chunk too large, the maximum is {settings.UPLOAD_CHUNK_MAX_SIZE} bytes"
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        try:
+            session = UploadSession.objects.get(pk=upload_id, datacenter_id=datacenter_id, created_by=request.user)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload session not found"}, status=status.HTTP_404_NOT_FOUND)
+        # Checked again under the lock below; this only avoids reading a body that is bound to be refused
+        if offset != session.received_bytes:
+            return Response({
+                "error": "Offset does not match the bytes received so far",
+                "offset": session.received_bytes
+            }, status=status.HTTP_409_CONFLICT)
+        if session.total_size is not None and offset + length > session.total_size:
+            return Response({"error": "Chunk exceeds the announced total_size"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The body is read from the client before any lock is taken, so a slow client cannot hold one
+        chunk_path = f"{session.file_path}.{uuid.uuid4().hex}.chunk"
+        if not receive_upload_chunk(request, length, checksum, chunk_path):
+            return Response({
+                "error": "Chunk checksum mismatch or incomplete body, please resend it",
+                "offset": session.received_bytes
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                try:
+                    session = UploadSession.objects.select_for_update().get(
+                        pk=upload_id, datacenter_id=datacenter_id, created_by=request.user)
+                except UploadSession.DoesNotExist:
+                    return Response({"error": "Upload session not found"}, status=status.HTTP_404_NOT_FOUND)
+
+                # Chunks must be sent in order; a retry of an already stored chunk tells the client where to resume
+                if offset != session.received_bytes:
+                    return Response({
+                        "error": "Offset does not match the bytes received so far",
+                        "offset": session.received_bytes
+                    }, status=status.HTTP_409_CONFLICT)
+
+                append_upload_chunk(session.file_path, offset, chunk_path)
+                session.received_bytes = offset + length
+                session.save(update_fields=['received_bytes', 'updated_at'])
+        finally:
+            if os.path.exists(chunk_path):
+                os.remove(chunk_path)
+
+        return Response({"offset": session.received_bytes, "complete": session.is_complete}, status=status.HTTP_200_OK)
+
+    def delete(self, request, datacenter_id, upload_id):
+        try:
+            session = UploadSession.objects.get(pk=upload_id, datacenter_id=datacenter_id, created_by=request.user)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload session not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if os.path.exists(session.file_path):
+            os.remove(session.file_path)
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadSessionCompleteView(EquipmentImportExcelView):
+    """Hand an assembled upload to the regular import (same dry_run/async/date_format options)."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request, datacenter_id, upload_id):
+        try:
+            session = UploadSession.objects.get(pk=upload_id, datacenter_id=datacenter_id, created_by=request.user)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload session not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if not session.received_bytes or (session.total_size is not None and not session.is_complete):
+            return Response({
+                "error": "Upload is not complete",
+                "offset": session.received_bytes,
+                "total_size": session.total_size
+            }, status=status.HTTP_409_CONFLICT)
+
+        with open(session.file_path, 'rb') as assembled:
+            upload = UploadedFile(file=assembled, name=session.file_name,
+                                  content_type=session.content_type, size=session.received_bytes)
+            response = self.import_file(request, datacenter_id, upload)
+
+        # Keep the upload after a dry run or a failed import so it can be retried without re-sending it
+        if response.status_code < 300 and request.GET.get('dry_run', '').lower() not in ('1', 'true', 'yes'):
+            os.remove(session.file_path)
+            session.delete()
+        return response
+
+
+class ImportJobStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request, datacenter_id, job_id):
+        try:
+            # Only the user who started an import can follow it or read its rejected rows
+            job = ImportJob.objects.get(pk=job_id, datacenter_id=datacenter_id, created_by=request.user)
+        except ImportJob.DoesNotExist:
+            return Response({"error": "Import job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # While the job runs its counters live in the Celery result backend
+        if job.status == ImportJob.STATUS_RUNNING:
+            try:
+                progress = AsyncResult(str(job.id)).info
+            except Exception:
+                progress = None
+            if isinstance(progress, dict):
+                for field in ('rows_processed', 'created_count', 'updated_count', 'unchanged_count', 'failed_count'):
+                    setattr(job, field, progress.get(field, 0))
+
+        data = ImportJobSerializer(job).data
+        if job.error_report_path:
+            data['error_report_url'] = reverse('import_job_errors', args=[datacenter_id, job.id])
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ImportJobErrorReportView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request, datacenter_id, job_id):
+        try:
+            # Only the user who started an import can follow it or read its rejected rows
+            job = ImportJob.objects.get(pk=job_id, datacenter_id=datacenter_id, created_by=request.user)
+        except ImportJob.DoesNotExist:
+            return Response({"error": "Import job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if not job.error_report_path or not os.path.exists(job.error_report_path):
+            return Response({"error": "No error report available for this job"}, status=status.HTTP_404_NOT_FOUND)
+
+        return FileResponse(
+            open(job.error_report_path, 'rb'),
+            as_attachment=True,
+            filename=f"import_errors_{job.id}.txt",
+            content_type='text/plain'
+        )
+
+
+class ConsolidatedExportView(ExportJobMixin, APIView):
+    """
+    One export covering every datacenter: a workbook with a sheet per
+    datacenter, or a zip bundle of their PDF reports. The result is cached
+    until any datacenter changes. A request renders the datacenters one by
+    one; `?async=1` renders them in parallel in a Celery worker.
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+    file_format = None
+    file_name = None
+    content_type = None
+
+    def get(self, request):
+        datacenters = list(DataCenter.objects.order_by('name', 'id'))
+        if not datacenters:
+            return Response({"error": "No datacenters found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if self.wants_async(request):
+            return self.queue_export(request, None, self.file_format, None, None)
+
+        try:
+            # Never fork a process pool from a request
+            artifact = open_consolidated_export(self.file_format, datacenters, workers=1)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        response = FileResponse(artifact, content_type=self.content_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.file_name}"'
+        return response
+
+
+class ConsolidatedExportExcelView(ConsolidatedExportView):
+    file_format = ExportJob.FORMAT_XLSX
+    file_name = "equipments_all_datacenters.xlsx"
+    content_type = XLSX_CONTENT_TYPE
+
+
+class ConsolidatedExportPDFView(ConsolidatedExportView):
+    file_format = ExportJob.FORMAT_PDF_BUNDLE
+    file_name = "equipments_all_datacenters_pdf.zip"
+    content_type = "application/zip"
+
+
+class ReportBundleView(APIView):
+    """Excel and PDF reports of every datacenter in one zip, streamed as its entries are produced."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        datacenters = list(DataCenter.objects.order_by('name', 'id'))
+        if not datacenters:
+            return Response({"error": "No datacenters found"}, status=status.HTTP_404_NOT_FOUND)
+
+        response = StreamingHttpResponse(stream_report_bundle(datacenters), content_type="application/zip")
+        response['Content-Disposition'] = 'attachment; filename="equipment_reports.zip"'
+        return response
+
+
+class ExportJobStatusView(APIView):
+    """Status of an export job; routed per datacenter and, for consolidated exports, without one."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request, job_id, datacenter_id=None):
+        try:
+            # Only the user who queued an export can follow or download it
+            job = ExportJob.objects.get(pk=job_id, datacenter_id=datacenter_id, created_by=request.user)
+        except ExportJob.DoesNotExist:
+            return Response({"error": "Export job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        data = ExportJobSerializer(job).data
+        if job.status == ExportJob.STATUS_COMPLETED:
+            if datacenter_id is None:
+                data['download_url'] = reverse('consolidated_export_job_download', args=[job.id])
+            else:
+                data['download_url'] = reverse('export_job_download', args=[datacenter_id, job.id])
+        return Response(data, status=status.HTTP_200_OK)
+
+
+EXPORT_JOB_CONTENT_TYPES = {
+    ExportJob.FORMAT_XLSX: XLSX_CONTENT_TYPE,
+    ExportJob.FORMAT_PDF: 'application/pdf',
+    ExportJob.FORMAT_PDF_BUNDLE: 'application/zip',
+}
+
+
+class ExportJobDownloadView(APIView):
+    """Download a finished export; supports Range requests so interrupted downloads can resume."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request, job_id, datacenter_id=None):
+        try:
+            # Only the user who queued an export can follow or download it
+            job = ExportJob.objects.get(pk=job_id, datacenter_id=datacenter_id, created_by=request.user)
+        except ExportJob.DoesNotExist:
+            return Response({"error": "Export job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if job.status != ExportJob.STATUS_COMPLETED:
+            return Response({"error": "Export is not ready", "status": job.status}, status=status.HTTP_409_CONFLICT)
+        if not job.file_path or not os.path.exists(job.file_path):
+            return Response({"error": "Export file has expired"}, status=status.HTTP_410_GONE)
+
+        content_type = EXPORT_JOB_CONTENT_TYPES[job.file_format]
+        return ranged_file_response(request, job.file_path, content_type, job.file_name,
+                                    etag=f'"{job.id}-{job.file_size}"')
+
+
 class EquipmentSendPDFByEmailView(APIView):
     def post(self, request, datacenter_id):
         try:
@@ -690,14 +1061,14 @@ class EquipmentSendPDFByEmailView(APIView):
             except DataCenter.DoesNotExist:
                 return Response({'error': 'Datacenter not found'}, status=404)
 
-            equipments = Equipment.objects.filter(datacenter=datacenter, is_deleted=False)
+            equipments = Equipment.live.filter(datacenter=datacenter)
             if not equipments.exists():
                 return Response({'error': 'No equipment found for this datacenter'}, status=404)
 
-            # Generate PDF
+            # Generate PDF (shares the cached artifact of the unfiltered PDF export)
             try:
-                pdf_buffer = generate_equipment_pdf(equipments)
-                pdf_bytes = pdf_buffer.getvalue()
+                with open_export(datacenter, 'pdf') as pdf_file:
+                    pdf_bytes = pdf_file.read()
                 if not pdf_bytes or len(pdf_bytes) < 100:
                     return Response({'error': 'Failed to generate PDF report'}, status=500)
             except Exception as e:
@@ -28,4 +28,16 @@ app.conf.beat_schedule = {
         'task': 'datacenter_app.tasks.send_license_expiry_notifications',
         'schedule': crontab()  # Runs daily at 8am
     },
+    'purge-stale-upload-sessions': {
+        'task': 'datacenter_app.tasks.purge_stale_upload_sessions',
+        'schedule': crontab(minute=0, hour=3)
+    },
+    'purge-expired-export-jobs': {
+        'task': 'datacenter_app.tasks.purge_expired_export_jobs',
+        'schedule': crontab(minute=30, hour=3)
+    },
+    'refresh-datacenter-stats': {
+        'task': 'datacenter_app.tasks.refresh_datacenter_stats',
+        'schedule': crontab(minute=5, hour=0)
+    },
 }
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 import environ
 import os
+from importlib.util import find_spec
 
 # Initialise environment variables
 env = environ.Env()
@@ -53,6 +54,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'datacenter_app.middleware.CompressionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -141,6 +143,13 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    # Picked by the Accept header; JSON stays the default
+    'DEFAULT_RENDERER_CLASSES': [
+        'datacenter_app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        # MessagePack needs the optional msgpack package
+        *(['datacenter_app.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+    ],
 }
 
 # CORS settings for local development
@@ -158,6 +167,45 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
 
 
+# --- Equipment Import ---
+# Rows prefetched and written per bulk_create/bulk_update round-trip
+EQUIPMENT_IMPORT_BATCH_SIZE = env.int('EQUIPMENT_IMPORT_BATCH_SIZE', default=500)
+# Rejected-row messages returned in import responses; background jobs write all of them to the error report
+EQUIPMENT_IMPORT_ERROR_LIMIT = env.int('EQUIPMENT_IMPORT_ERROR_LIMIT', default=1000)
+# Uploads for background import jobs are staged here until the Celery task has run
+IMPORT_STAGING_DIR = env('IMPORT_STAGING_DIR', default=str(BASE_DIR / 'import_staging'))
+# Chunked uploads: largest accepted chunk, and how long an idle session is kept
+UPLOAD_CHUNK_MAX_SIZE = env.int('UPLOAD_CHUNK_MAX_SIZE', default=16 * 1024 * 1024)
+UPLOAD_SESSION_MAX_AGE_HOURS = env.int('UPLOAD_SESSION_MAX_AGE_HOURS', default=24)
+
+# --- Equipment Listing ---
+# Opt-in keyset pagination of the equipment and history lists
+EQUIPMENT_PAGE_SIZE = env.int('EQUIPMENT_PAGE_SIZE', default=100)
+EQUIPMENT_MAX_PAGE_SIZE = env.int('EQUIPMENT_MAX_PAGE_SIZE', default=1000)
+# Autocomplete: in-memory prefix indexes kept per process, and default/largest number of suggestions
+AUTOCOMPLETE_CACHE_SIZE = env.int('AUTOCOMPLETE_CACHE_SIZE', default=64)
+AUTOCOMPLETE_LIMIT = env.int('AUTOCOMPLETE_LIMIT', default=20)
+AUTOCOMPLETE_MAX_LIMIT = env.int('AUTOCOMPLETE_MAX_LIMIT', default=1000)
+
+# --- Equipment Export ---
+# Rows fetched per cursor round-trip while streaming an export
+EQUIPMENT_EXPORT_CHUNK_SIZE = env.int('EQUIPMENT_EXPORT_CHUNK_SIZE', default=2000)
+# Generated Excel/PDF exports are cached here, evicting least recently used files beyond the size limit
+EXPORT_CACHE_DIR = env('EXPORT_CACHE_DIR', default=str(BASE_DIR / 'export_cache'))
+EXPORT_CACHE_MAX_BYTES = env.int('EXPORT_CACHE_MAX_BYTES', default=512 * 1024 * 1024)
+# Artifacts of background export jobs, removed with the job after EXPORT_JOB_MAX_AGE_HOURS
+EXPORT_JOB_DIR = env('EXPORT_JOB_DIR', default=str(BASE_DIR / 'export_jobs'))
+EXPORT_JOB_MAX_AGE_HOURS = env.int('EXPORT_JOB_MAX_AGE_HOURS', default=24)
+# Processes rendering datacenters in parallel for the all-datacenters export (0 = one per core)
+CONSOLIDATED_EXPORT_WORKERS = env.int('CONSOLIDATED_EXPORT_WORKERS', default=0)
+
+# --- API Responses ---
+# Responses at least this large are gzip/zstd compressed for clients that accept it
+RESPONSE_COMPRESSION_MIN_BYTES = env.int('RESPONSE_COMPRESSION_MIN_BYTES', default=1024)
+# zstd is used when the optional zstandard package is installed
+RESPONSE_ZSTD_LEVEL = env.int('RESPONSE_ZSTD_LEVEL', default=3)
+
+
 # --- Email Configuration for Local and Production Flexibility ---
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = env('EMAIL_HOST', default='127.0.0.1')  # Use explicit IPv4 address